@@ -0,0 +1,65 @@
+"""add daily stats
+
+Revision ID: 3f9d2b7c41a8
+Revises: c0e77576e816
+Create Date: 2026-10-19 20:02:37.518230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9d2b7c41a8"
+down_revision: Union[str, Sequence[str], None] = "c0e77576e816"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("new_users", sa.Integer(), nullable=False),
+        sa.Column("new_products", sa.Integer(), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.Column("approvals", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("day"),
+    )
+    op.create_table(
+        "daily_poster_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("products_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("day", "user_id", name="unique_daily_poster_day_user"),
+    )
+
+    # Заполнение по истории; одобрения раньше не сохранялись — начинаем с нуля
+    op.execute(
+        "INSERT INTO daily_poster_stats (day, user_id, products_count) "
+        "SELECT DATE(created_at), user_id, COUNT(*) FROM product "
+        "GROUP BY DATE(created_at), user_id"
+    )
+    op.execute(
+        "INSERT INTO daily_stats (day, new_users, new_products, views, approvals) "
+        "SELECT day, SUM(new_users), SUM(new_products), SUM(views), 0 FROM ("
+        'SELECT DATE(created_at) AS day, 1 AS new_users, 0 AS new_products, 0 AS views FROM "user" '
+        "UNION ALL SELECT DATE(created_at), 0, 1, 0 FROM product "
+        "UNION ALL SELECT DATE(viewed_at), 0, 0, 1 FROM product_view"
+        ") AS events GROUP BY day"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_poster_stats")
+    op.drop_table("daily_stats")
@@ -0,0 +1,37 @@
+"""add user notification_mode
+
+Revision ID: 5c2e7a9d0b14
+Revises: d4b8e1f93a62
+Create Date: 2026-10-19 21:37:25.602948
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2e7a9d0b14"
+down_revision: Union[str, Sequence[str], None] = "d4b8e1f93a62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user",
+        sa.Column(
+            "notification_mode",
+            sa.String(length=16),
+            server_default="instant",
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("user", "notification_mode")
@@ -0,0 +1,33 @@
+"""add user directory indexes
+
+Revision ID: 8a41e6d0c2f5
+Revises: 3f9d2b7c41a8
+Create Date: 2026-10-19 20:41:09.870214
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a41e6d0c2f5"
+down_revision: Union[str, Sequence[str], None] = "3f9d2b7c41a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_user_created_at_id", "user", ["created_at", "id"], unique=False)
+    op.create_index(
+        "ix_product_view_user_id", "product_view", ["user_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_product_view_user_id", table_name="product_view")
+    op.drop_index("ix_user_created_at_id", table_name="user")
@@ -0,0 +1,94 @@
+"""add chat_attachment
+
+Revision ID: c0e77576e816
+Revises: 77cc5390307b
+Create Date: 2026-10-19 18:20:11.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c0e77576e816"
+down_revision: Union[str, Sequence[str], None] = "77cc5390307b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (kind, старая таблица, колонка с file_id) — порядок задаёт position
+OLD_TABLES = (
+    ("photo", "chat_photo", "photo_url"),
+    ("video", "chat_video", "video_url"),
+    ("sticker", "chat_sticker", "sticker_url"),
+    ("audio", "chat_audio", "audio_url"),
+    ("voice", "chat_voice", "voice_url"),
+    ("document", "chat_document", "document_url"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "chat_attachment",
+        sa.Column("message_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("file_id", sa.String(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["message_id"], ["chat_message.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_chat_attachment_message_id_position",
+        "chat_attachment",
+        ["message_id", "position"],
+        unique=False,
+    )
+
+    # Перенос данных: все вложения сообщения по порядку видов, внутри вида — по id
+    union = " UNION ALL ".join(
+        f"SELECT chat_id AS message_id, '{kind}' AS kind, {column} AS file_id, "
+        f"{order} AS kind_order, id AS old_id FROM {table} WHERE {column} IS NOT NULL"
+        for order, (kind, table, column) in enumerate(OLD_TABLES)
+    )
+    op.execute(
+        "INSERT INTO chat_attachment (message_id, kind, file_id, position) "
+        "SELECT message_id, kind, file_id, "
+        "ROW_NUMBER() OVER (PARTITION BY message_id ORDER BY kind_order, old_id) - 1 "
+        f"FROM ({union}) AS old_attachments "
+        "WHERE message_id IS NOT NULL"
+    )
+
+    for _, table, _ in OLD_TABLES:
+        op.drop_table(table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for kind, table, column in OLD_TABLES:
+        op.create_table(
+            table,
+            sa.Column("chat_id", sa.Integer(), nullable=False),
+            sa.Column(column, sa.String(), nullable=True),
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["chat_id"], ["chat_message.id"], ondelete="CASCADE"
+            ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.execute(
+            f"INSERT INTO {table} (chat_id, {column}) "
+            f"SELECT message_id, file_id FROM chat_attachment "
+            f"WHERE kind = '{kind}' ORDER BY message_id, position"
+        )
+
+    op.drop_index(
+        "ix_chat_attachment_message_id_position", table_name="chat_attachment"
+    )
+    op.drop_table("chat_attachment")
@@ -0,0 +1,49 @@
+"""add product search trgm index
+
+Revision ID: d4b8e1f93a62
+Revises: 8a41e6d0c2f5
+Create Date: 2026-10-19 21:03:52.114730
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4b8e1f93a62"
+down_revision: Union[str, Sequence[str], None] = "8a41e6d0c2f5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# То же выражение, что PRODUCT_SEARCH_DOCUMENT в app/admin/crud.py
+SEARCH_DOCUMENT = (
+    "coalesce(name, '') || ' ' || coalesce(description, '')"
+    " || ' ' || coalesce(contact, '')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Триграммный индекс есть только в PostgreSQL; в SQLite поиск остаётся ILIKE
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY — чтобы не блокировать запись в product на время построения
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_search_trgm "
+            f"ON product USING gin (({SEARCH_DOCUMENT}) gin_trgm_ops) "
+            "WHERE publication = true"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_product_search_trgm")
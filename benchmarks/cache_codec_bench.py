@@ -0,0 +1,99 @@
+"""Бенчмарк форматов кэша ленты объявлений и страниц категорий.
+
+Запуск из корня репозитория:
+
+    python benchmarks/cache_codec_bench.py
+
+Сравнивает прежний формат (json.dumps словаря с ключами в каждой записи)
+с компактными схемами `core/cache_codec.py` для каждого установленного
+кодека: время encode/decode и размер значения в Redis.
+"""
+
+import datetime
+import json
+import random
+import timeit
+
+from rovmarket_bot.core.cache_codec import (
+    ALL_ADS,
+    CATEGORIES_PAGE,
+    CODECS,
+    decode,
+    encode,
+)
+
+PRODUCTS = 5000
+CATEGORIES = 10
+REPEAT = 5
+
+
+def make_catalogue(count: int) -> dict:
+    """Лента в том виде, в каком её собирает get_all_ads_cached."""
+    rnd = random.Random(42)
+    now = datetime.datetime(2025, 1, 1)
+    data = {"product_ids": [], "products": {}, "photos": {}}
+    for i in range(count, 0, -1):
+        pid = str(i)
+        data["product_ids"].append(pid)
+        data["products"][pid] = {
+            "name": f"Товар {i} — {rnd.choice(['велосипед', 'диван', 'iPhone 13', 'коляска'])}",
+            "description": "Отличное состояние, торг уместен. " * rnd.randint(1, 8),
+            "price": rnd.choice(["договорная", 1500, 250000, 1500000]),
+            "contact": rnd.choice(["via_bot", "79991234567", "@seller_name"]),
+            "geo": rnd.choice([None, {"latitude": 47.23, "longitude": 39.72}]),
+            "created_at": (now + datetime.timedelta(minutes=i)).isoformat(),
+        }
+        # file_id Telegram — ~80 символов
+        data["photos"][pid] = [
+            f"AgACAgIAAxkBAAI{rnd.getrandbits(256):064x}"[:80]
+            for _ in range(rnd.randint(0, 5))
+        ]
+    return data
+
+
+def make_categories(count: int) -> list[dict]:
+    return [{"id": i + 1, "name": f"Категория {i + 1}"} for i in range(count)]
+
+
+def measure(label: str, dumps, loads, value) -> None:
+    payload = dumps(value)
+    encode_time = min(timeit.repeat(lambda: dumps(value), number=1, repeat=REPEAT))
+    decode_time = min(timeit.repeat(lambda: loads(payload), number=1, repeat=REPEAT))
+    print(
+        f"  {label:<8} encode {encode_time * 1e6:9.0f} us  "
+        f"decode {decode_time * 1e6:9.0f} us  size {len(payload):9} B"
+    )
+
+
+def compare(title: str, schema, value) -> None:
+    print(title)
+    measure(
+        "legacy",
+        lambda v: json.dumps(v).encode(),
+        lambda data: json.loads(data),
+        value,
+    )
+    for name, codec in CODECS.items():
+        measure(
+            name,
+            lambda v, codec=codec: encode(schema, v, codec),
+            lambda data: decode(schema, data),
+            value,
+        )
+
+
+def main():
+    catalogue = make_catalogue(PRODUCTS)
+    for codec in CODECS.values():
+        assert decode(ALL_ADS, encode(ALL_ADS, catalogue, codec)) == catalogue
+
+    compare(f"all_ads_display_data ({PRODUCTS} объявлений)", ALL_ADS, catalogue)
+    compare(
+        f"categories_page ({CATEGORIES} категорий)",
+        CATEGORIES_PAGE,
+        make_categories(CATEGORIES),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Микробенчмарк рендера карточек объявлений.
+
+Запуск из корня репозитория:
+
+    python benchmarks/cards_bench.py
+
+Сравнивает «холодный» рендер (кэш сбрасывается перед каждым проходом)
+с повторным рендером той же страницы (мемоизированный путь).
+"""
+
+import datetime
+import random
+import timeit
+
+from rovmarket_bot.core.cards import (
+    HTML,
+    MARKDOWN,
+    render_full_card,
+    render_short_card,
+    to_card_record,
+)
+
+PAGE_SIZE = 5
+PAGES = 200
+REPEAT = 5
+
+
+def make_products(count: int) -> list[dict]:
+    rnd = random.Random(42)
+    now = datetime.datetime(2025, 1, 1)
+    products = []
+    for i in range(count):
+        products.append(
+            {
+                "id": i + 1,
+                "name": f"Товар *{i}* [б/у]",
+                "description": "Отличное состояние, торг_уместен. " * rnd.randint(1, 8),
+                "price": rnd.choice([None, 0, 1500, 250000, 1500000]),
+                "contact": rnd.choice(["via_bot", "79991234567", "@seller_name"]),
+                "geo": rnd.choice([None, {"latitude": 55.75, "longitude": 37.62}]),
+                "created_at": (now + datetime.timedelta(hours=i)).isoformat(),
+            }
+        )
+    return products
+
+
+def main():
+    products = make_products(PAGE_SIZE * PAGES)
+    records = [to_card_record(p) for p in products]
+
+    def render_all():
+        for record in records:
+            render_short_card(record, MARKDOWN)
+            render_full_card(record, HTML)
+
+    def cold():
+        render_short_card.cache_clear()
+        render_full_card.cache_clear()
+        render_all()
+
+    to_records = min(
+        timeit.repeat(
+            lambda: [to_card_record(p) for p in products], number=1, repeat=REPEAT
+        )
+    )
+    cold_time = min(timeit.repeat(cold, number=1, repeat=REPEAT))
+    render_all()
+    warm_time = min(timeit.repeat(render_all, number=1, repeat=REPEAT))
+
+    n = len(records)
+    print(f"records: {n}")
+    print(f"to_card_record: {to_records / n * 1e6:.2f} us/card")
+    print(f"render cold:    {cold_time / n * 1e6:.2f} us/card (short + full)")
+    print(f"render cached:  {warm_time / n * 1e6:.2f} us/card (short + full)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import func, delete
+from sqlalchemy import func, delete, literal_column, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -9,12 +9,17 @@ from rovmarket_bot.core.models.user import User
 from rovmarket_bot.core.models.product_view import ProductView
 from rovmarket_bot.core.models.complaint import Complaint
 from rovmarket_bot.core.models.product import Product
+from rovmarket_bot.core.models.product_photo import ProductPhoto
+from rovmarket_bot.core.models.product_video import ProductVideo
 from rovmarket_bot.core.models.advertisement import Advertisement, AdMedia
 from rovmarket_bot.core.models.categories import Categories
+from rovmarket_bot.core.models.daily_stats import DailyStats, DailyPosterStats
 from sqlalchemy.future import select
+from rovmarket_bot.core.stats import bump_daily_stats
 
 USERS_PER_PAGE = 50
 COMPLAINTS_PER_PAGE = 3
+MODERATION_PAGE_SIZE = 5
 ADS_PER_PAGE = 10
 
 
@@ -42,31 +47,85 @@ async def get_users_count(session) -> int:
     return total
 
 
-async def get_users_page(session: AsyncSession, page: int, per_page: int):
-    offset = (page - 1) * per_page
-    result = await session.execute(
-        select(User).order_by(User.created_at.desc()).offset(offset).limit(per_page)
-    )
-    users = result.scalars().all()
-    return users
+# Курсор каталога пользователей: (created_at, id) последнего показанного
+UsersCursor = tuple[datetime, int]
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
-async def get_users_view_counts(session) -> dict[int, int]:
-    result = await session.execute(
-        select(ProductView.user_id, func.count()).group_by(ProductView.user_id)
+
+def encode_users_cursor(user: User) -> str:
+    """Курсор для callback_data: микросекунды created_at и id."""
+    created_at = user.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"{micros}_{user.id}"
+
+
+def decode_users_cursor(raw: str) -> UsersCursor | None:
+    try:
+        micros, user_id = raw.split("_")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(user_id)
+    except ValueError:
+        return None
+
+
+async def get_users_page(
+    session: AsyncSession, per_page: int, after: UsersCursor | None = None
+) -> tuple[list[tuple[User, int]], bool]:
+    """Страница каталога пользователей (новые сверху) с их числом просмотров.
+
+    Keyset-пагинация по (created_at, id) вместо OFFSET; просмотры считаются
+    коррелированным подзапросом только для пользователей страницы
+    (индекс ix_product_view_user_id). Возвращает [(user, views)] и флаг
+    «есть ещё».
+    """
+    views = (
+        select(func.count(ProductView.id))
+        .where(ProductView.user_id == User.id)
+        .correlate(User)
+        .scalar_subquery()
     )
-    counts = dict(result.all())
-    return counts
+    stmt = (
+        select(User, views)
+        .order_by(User.created_at.desc(), User.id.desc())
+        .limit(per_page + 1)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(User.created_at, User.id) < tuple_(*after))
 
+    rows = [(user, count) for user, count in (await session.execute(stmt)).all()]
+    return rows[:per_page], len(rows) > per_page
 
-# Получить все жалобы с пользователями (связь через user)
-async def get_all_complaints(session: AsyncSession):
-    result = await session.execute(
-        select(Complaint)
-        .options(selectinload(Complaint.user))  # <- здесь ключевой момент
-        .order_by(Complaint.created_at.desc())
+
+async def get_complaints_count(session: AsyncSession) -> int:
+    total = await session.scalar(select(func.count()).select_from(Complaint))
+    return total or 0
+
+
+async def get_complaints_page(
+    session: AsyncSession, per_page: int, after_id: int | None = None
+) -> tuple[list[dict], bool]:
+    """Страница жалоб (новые сверху) с автором; курсор — id последней показанной.
+
+    Возвращает строки-словари и флаг «есть ещё».
+    """
+    stmt = (
+        select(
+            Complaint.id,
+            Complaint.title,
+            Complaint.created_at,
+            User.id.label("user_id"),
+            User.username,
+        )
+        .join(User, User.id == Complaint.user_id)
+        .order_by(Complaint.id.desc())
+        .limit(per_page + 1)
     )
-    return result.scalars().all()
+    if after_id is not None:
+        stmt = stmt.where(Complaint.id < after_id)
+    rows = [dict(row) for row in (await session.execute(stmt)).mappings().all()]
+    return rows[:per_page], len(rows) > per_page
 
 
 # Удалить жалобу по id
@@ -76,32 +135,40 @@ async def delete_complaint(session: AsyncSession, complaint_id: int):
 
 
 async def get_stats_for_period(session: AsyncSession, period_start: datetime):
-    # Кол-во пользователей, зарегистрированных с period_start
-    users_count = await session.scalar(
-        select(func.count()).select_from(User).where(User.created_at >= period_start)
-    )
-
-    # Кол-во объявлений, созданных с period_start
-    products_count = await session.scalar(
-        select(func.count())
-        .select_from(Product)
-        .where(Product.created_at >= period_start)
-    )
+    """Статистика с даты period_start по суточным счётчикам (см. core/stats.py)."""
+    start_day = period_start.date()
+
+    totals = (
+        await session.execute(
+            select(
+                func.coalesce(func.sum(DailyStats.new_users), 0),
+                func.coalesce(func.sum(DailyStats.new_products), 0),
+                func.coalesce(func.sum(DailyStats.views), 0),
+                func.coalesce(func.sum(DailyStats.approvals), 0),
+            ).where(DailyStats.day >= start_day)
+        )
+    ).one()
 
-    # Пользователь, создавший больше всего объявлений за период
+    # Пользователь, создавший больше всего объявлений за период, — сразу с именем
+    posted = func.sum(DailyPosterStats.products_count).label("count")
     result = await session.execute(
-        select(Product.user_id, func.count(Product.id).label("count"))
-        .where(Product.created_at >= period_start)
-        .group_by(Product.user_id)
-        .order_by(func.count(Product.id).desc())
+        select(User.username, User.telegram_id, posted)
+        .join(User, User.id == DailyPosterStats.user_id)
+        .where(DailyPosterStats.day >= start_day)
+        .group_by(User.id, User.username, User.telegram_id)
+        .order_by(posted.desc())
         .limit(1)
     )
     top_user = result.first()
 
     return {
-        "users_count": users_count or 0,
-        "products_count": products_count or 0,
-        "top_user_id": top_user.user_id if top_user else None,
+        "users_count": totals[0],
+        "products_count": totals[1],
+        "views_count": totals[2],
+        "approvals_count": totals[3],
+        "top_user_name": (
+            (top_user.username or f"ID {top_user.telegram_id}") if top_user else None
+        ),
         "top_user_products_count": top_user.count if top_user else 0,
     }
 
@@ -134,18 +201,110 @@ async def create_advertisement(
     return ad
 
 
-# Получить все неопубликованные объявления (publication IS NULL)
-async def get_unpublished_products(session: AsyncSession) -> list[Product]:
-    result = await session.execute(
-        select(Product)
+def _first_photo():
+    return (
+        select(ProductPhoto.photo_url)
+        .where(ProductPhoto.product_id == Product.id)
+        .order_by(ProductPhoto.id)
+        .limit(1)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+
+
+def _first_video():
+    return (
+        select(ProductVideo.video_file_id)
+        .where(ProductVideo.product_id == Product.id)
+        .order_by(ProductVideo.id)
+        .limit(1)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+
+
+# Очередь модерации: объявления с publication IS NULL, старые первыми
+async def get_pending_queue_stats(session: AsyncSession) -> tuple[int, int | None]:
+    """Сколько объявлений ждёт модерации и id самого нового из них."""
+    total, last_id = (
+        await session.execute(
+            select(func.count(), func.max(Product.id)).where(
+                Product.publication == None
+            )
+        )
+    ).one()
+    return total or 0, last_id
+
+
+async def get_pending_products_page(
+    session: AsyncSession, per_page: int, after_id: int | None = None
+) -> tuple[list[dict], bool]:
+    """Следующие `per_page` объявлений на модерации после `after_id`.
+
+    Вместо загрузки всей очереди с фото, видео и автором — только поля
+    карточки и первое медиа подзапросами. Возвращает строки-словари и
+    флаг «есть ещё».
+    """
+    stmt = (
+        select(
+            Product.id,
+            Product.name,
+            Product.description,
+            Product.price,
+            Product.contact,
+            _first_photo().label("photo"),
+            _first_video().label("video"),
+        )
         .where(Product.publication == None)
-        .options(
-            selectinload(Product.photos),
-            selectinload(Product.videos),
-            selectinload(Product.user),
+        .order_by(Product.id)
+        .limit(per_page + 1)
+    )
+    if after_id is not None:
+        stmt = stmt.where(Product.id > after_id)
+    rows = [dict(row) for row in (await session.execute(stmt)).mappings().all()]
+    return rows[:per_page], len(rows) > per_page
+
+
+async def moderate_pending_products(
+    session: AsyncSession,
+    publication: bool,
+    *,
+    product_ids: list[int] | None = None,
+    category_id: int | None = None,
+    after_id: int | None = None,
+    last_id: int | None = None,
+) -> list:
+    """Одобрить (publication=True) или отклонить ожидающие объявления одним UPDATE.
+
+    Отбор — выбранные `product_ids` и/или фильтр: категория и диапазон id
+    (after_id, last_id]. Уже рассмотренные объявления не трогаются. Всё в
+    одной транзакции; возвращает строки изменённых объявлений
+    (id, name, description, price, user_id), упорядоченные по id.
+    """
+    stmt = update(Product).where(Product.publication == None)
+    if product_ids is not None:
+        stmt = stmt.where(Product.id.in_(product_ids))
+    if category_id is not None:
+        stmt = stmt.where(Product.category_id == category_id)
+    if after_id is not None:
+        stmt = stmt.where(Product.id > after_id)
+    if last_id is not None:
+        stmt = stmt.where(Product.id <= last_id)
+
+    result = await session.execute(
+        stmt.values(publication=publication).returning(
+            Product.id,
+            Product.name,
+            Product.description,
+            Product.price,
+            Product.user_id,
         )
     )
-    return list(result.unique().scalars().all())
+    moderated = sorted(result.all(), key=lambda row: row.id)
+    if moderated and publication:
+        await bump_daily_stats(session, approvals=len(moderated))
+    await session.commit()
+    return moderated
 
 
 # Принять объявление (publication = True)
@@ -155,6 +314,7 @@ async def approve_product(session: AsyncSession, product_id: int):
 
     if product:
         product.publication = True
+        await bump_daily_stats(session, approvals=1)
         await session.commit()
 
 
@@ -202,7 +362,11 @@ async def get_published_products_page(
     result = await session.execute(
         select(Product)
         .where(Product.publication == True)
-        .options(selectinload(Product.photos), selectinload(Product.videos), selectinload(Product.user))
+        .options(
+            selectinload(Product.photos),
+            selectinload(Product.videos),
+            selectinload(Product.user),
+        )
         .order_by(Product.created_at.desc())
         .offset(offset)
         .limit(3)
@@ -210,29 +374,69 @@ async def get_published_products_page(
     return list(result.scalars().all())
 
 
-async def get_published_product_by_id(
+# Текст, по которому ищет админ: название, описание и контакт. Выражение
+# совпадает с GIN-индексом ix_product_search_trgm (pg_trgm) — не менять
+# одно без другого, иначе PostgreSQL перестанет использовать индекс.
+PRODUCT_SEARCH_DOCUMENT = literal_column(
+    "(coalesce(product.name, '') || ' ' || coalesce(product.description, '')"
+    " || ' ' || coalesce(product.contact, ''))"
+)
+
+
+def _admin_product_row():
+    """Лёгкая строка объявления для админ-поиска: поля карточки и первое фото."""
+    return select(
+        Product.id,
+        Product.name,
+        Product.description,
+        Product.price,
+        Product.contact,
+        Product.geo,
+        Product.created_at,
+        _first_photo().label("photo"),
+    ).where(Product.publication == True)
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def get_published_product_row(
     session: AsyncSession, product_id: int
-) -> Product | None:
-    result = await session.execute(
-        select(Product)
-        .where(Product.id == product_id, Product.publication == True)
-        .options(selectinload(Product.photos), selectinload(Product.videos), selectinload(Product.user))
-    )
-    return result.unique().scalar_one_or_none()
+) -> dict | None:
+    result = await session.execute(_admin_product_row().where(Product.id == product_id))
+    row = result.mappings().first()
+    return dict(row) if row else None
 
 
-async def search_published_products_by_name(
+async def search_published_products(
     session: AsyncSession, query: str, limit: int = 10
-) -> list[Product]:
-    # Поиск по подстроке в названии, только опубликованные
-    result = await session.execute(
-        select(Product)
-        .where(Product.publication == True, Product.name.ilike(f"%{query}%"))
-        .options(selectinload(Product.photos), selectinload(Product.user))
-        .order_by(Product.created_at.desc())
+) -> list[dict]:
+    """Поиск опубликованных объявлений по названию, описанию и контакту.
+
+    В PostgreSQL подстрочный ILIKE обслуживает триграммный GIN-индекс,
+    а результаты ранжируются: совпадение в названии, затем близость
+    (word_similarity), затем свежесть. В SQLite — тот же ILIKE без индекса.
+    """
+    pattern = _like_pattern(query)
+    stmt = (
+        _admin_product_row()
+        .where(PRODUCT_SEARCH_DOCUMENT.ilike(pattern, escape="\\"))
         .limit(limit)
     )
-    return list(result.scalars().all())
+    name_match = Product.name.ilike(pattern, escape="\\")
+    if session.bind.dialect.name == "postgresql":
+        stmt = stmt.order_by(
+            name_match.desc(),
+            func.word_similarity(query, PRODUCT_SEARCH_DOCUMENT).desc(),
+            Product.created_at.desc(),
+        )
+    else:
+        stmt = stmt.order_by(name_match.desc(), Product.created_at.desc())
+
+    result = await session.execute(stmt)
+    return [dict(row) for row in result.mappings().all()]
 
 
 # Получить объявление по ID с фото и пользователем
@@ -242,7 +446,11 @@ async def get_product_with_photos_and_user(
     result = await session.execute(
         select(Product)
         .where(Product.id == product_id)
-        .options(selectinload(Product.photos), selectinload(Product.videos), selectinload(Product.user))
+        .options(
+            selectinload(Product.photos),
+            selectinload(Product.videos),
+            selectinload(Product.user),
+        )
     )
     return result.scalar_one_or_none()
 
@@ -266,20 +474,3 @@ async def get_all_categories(session: AsyncSession) -> list[Categories]:
 async def delete_category(session: AsyncSession, category_id: int):
     await session.execute(delete(Categories).where(Categories.id == category_id))
     await session.commit()
-
-
-async def get_subscriber_telegram_ids_for_category(
-    session: AsyncSession, category_id: int, exclude_user_id: int | None = None
-) -> list[int]:
-    stmt = (
-        select(User.telegram_id)
-        .join(UserCategoryNotification, User.id == UserCategoryNotification.user_id)
-        .where(UserCategoryNotification.category_id == category_id)
-        .distinct()
-    )
-    if exclude_user_id is not None:
-        stmt = stmt.where(User.id != exclude_user_id)
-    result = await session.execute(stmt)
-    tg_ids = [row[0] for row in result.all()]
-    # Ensure uniqueness at Python level as well
-    return list({tg_id for tg_id in tg_ids if tg_id is not None})
@@ -1,5 +1,4 @@
 import html
-import re
 from datetime import timedelta, timezone
 
 from aiogram import Router, F
@@ -15,10 +14,10 @@ from aiogram.types import (
     InputMediaPhoto,
     InputMediaVideo,
 )
-from sqlalchemy import or_
 
 from rovmarket_bot.core.models import db_helper, BotSettings
 from .crud import *
+from .moderation import bulk_moderate
 from .keyboard import menu_admin, menu_stats, menu_back, build_admin_settings_keyboard
 from rovmarket_bot.app.settings.crud import (
     get_or_create_bot_settings,
@@ -28,9 +27,16 @@ from .states import AdCreationStates
 from rovmarket_bot.core.cache import (
     invalidate_cache_on_new_ad,
     invalidate_categories_cache,
+    get_cached_gallery,
+    set_cached_gallery,
+    bump_product_version,
 )
 from rovmarket_bot.app.search.redis_search import index_product_in_redis
 from rovmarket_bot.core.config import bot
+from rovmarket_bot.core.stats import bump_daily_stats
+from rovmarket_bot.core.jobs import enqueue_job
+from rovmarket_bot.core.metrics import render_summary
+from rovmarket_bot.core.cards import to_card_record, render_admin_card
 
 ADS_PER_PAGE = 3
 MAX_CAPTION_LENGTH = 750  # ограничение для подписи
@@ -39,17 +45,6 @@ MAX_DESCRIPTION_LENGTH = 600  # ограничение для описания
 router = Router()
 
 
-def format_price(price):
-    try:
-        # Попытка преобразовать в число
-        price_int = int(price)
-        # Форматируем с пробелами для тысяч и добавляем ₽
-        return f"{price_int:,}".replace(",", " ") + " ₽"
-    except (ValueError, TypeError):
-        # Если цена не число, возвращаем её как есть
-        return price
-
-
 # Состояния FSM для рассылки
 class BroadcastStates(StatesGroup):
     waiting_for_text = State()
@@ -248,18 +243,21 @@ async def send_broadcast(message: Message, state: FSMContext):
 
 @router.callback_query(F.data.startswith("all_users"))
 async def all_users_paginated(callback: CallbackQuery):
+    # "all_users?page=1" из меню или "all_users=<страница>:<курсор>" с кнопки «Загрузить еще»
+    page, after = 1, None
     data_parts = callback.data.split("=")
-    try:
-        page = int(data_parts[1]) if len(data_parts) > 1 else 1
-    except ValueError:
-        page = 1
+    if len(data_parts) == 2 and ":" in data_parts[1]:
+        raw_page, raw_cursor = data_parts[1].split(":", 1)
+        cursor = decode_users_cursor(raw_cursor)
+        if raw_page.isdigit() and cursor is not None:
+            page, after = int(raw_page), cursor
 
     USERS_PER_PAGE = 5  # Показываем по 5 пользователей за раз
 
-    async with db_helper.session_factory() as session:
-        total_users = await get_users_count(session)
-        users = await get_users_page(session, page, USERS_PER_PAGE)
-        view_counts = await get_users_view_counts(session)
+    async with db_helper.session_factory(readonly=True) as session:
+        # Общее число нужно только в заголовке первой страницы
+        total_users = await get_users_count(session) if page == 1 else None
+        users, has_more = await get_users_page(session, USERS_PER_PAGE, after)
 
     if not users:
         await callback.message.answer("🙁 Пользователи не найдены.")
@@ -276,8 +274,7 @@ async def all_users_paginated(callback: CallbackQuery):
     current_message = header
     messages = []
 
-    for user in users:
-        views = view_counts.get(user.id, 0)
+    for user, views in users:
         user_info = (
             f"🆔 <b>ID:</b> {user.id}\n"
             f"👤 <b>Telegram ID:</b> <code>{user.telegram_id}</code>\n"
@@ -299,15 +296,16 @@ async def all_users_paginated(callback: CallbackQuery):
         messages.append(current_message)
 
     # Пагинация
-    total_pages = (total_users + USERS_PER_PAGE - 1) // USERS_PER_PAGE
     keyboard = []
 
     # Кнопка "Загрузить еще" если есть еще пользователи
-    if page < total_pages:
+    if has_more:
+        cursor = encode_users_cursor(users[-1][0])
         keyboard.append(
             [
                 InlineKeyboardButton(
-                    text="⬇️ Загрузить еще", callback_data=f"all_users={page + 1}"
+                    text="⬇️ Загрузить еще",
+                    callback_data=f"all_users={page + 1}:{cursor}",
                 )
             ]
         )
@@ -336,45 +334,83 @@ async def all_users_paginated(callback: CallbackQuery):
     await callback.answer()
 
 
-# Вывод жалоб
-@router.callback_query(F.data == "complaints")
-async def complaints_list(callback: CallbackQuery):
-    async with db_helper.session_factory() as session:
-        complaints = await get_all_complaints(session)
+async def send_complaints_page(message: Message, after_id: int | None = None):
+    """Очередная страница жалоб; «Показать ещё» продолжает с последней показанной."""
+    async with db_helper.session_factory(readonly=True) as session:
+        complaints, has_more = await get_complaints_page(
+            session, COMPLAINTS_PER_PAGE, after_id
+        )
 
     if not complaints:
-        await callback.message.answer("✅ Все жалобы были рассмотрены. Ничего нового.")
-        await callback.answer()
+        await message.answer("✅ Все жалобы были рассмотрены. Ничего нового.")
         return
 
-    total_complaints = len(complaints)
-    await callback.message.answer(
-        f"🚨 <b>Всего жалоб:</b> {total_complaints}\n🗂 Список жалоб:", parse_mode="HTML"
-    )
-
     for complaint in complaints:
-        user = complaint.user
-
+        username = complaint["username"]
         text = (
-            f"📝 <b>Жалоба:</b> {complaint.title}\n"
-            f"👤 <b>Пользователь:</b> @{user.username if user.username else '—'} (ID {user.id})\n"
-            f"📅 <b>Дата:</b> {complaint.created_at.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"📝 <b>Жалоба:</b> {html.escape(complaint['title'])}\n"
+            f"👤 <b>Пользователь:</b> @{html.escape(username) if username else '—'} (ID {complaint['user_id']})\n"
+            f"📅 <b>Дата:</b> {complaint['created_at'].strftime('%Y-%m-%d %H:%M:%S')}\n"
             f"──────────────"
         )
+        markup = InlineKeyboardMarkup(
+            inline_keyboard=[
+                [
+                    InlineKeyboardButton(
+                        text=f"❌ Закрыть жалобу #{complaint['id']}",
+                        callback_data=f"complaint_close:{complaint['id']}",
+                    )
+                ]
+            ]
+        )
+        await message.answer(text, parse_mode="HTML", reply_markup=markup)
 
-        buttons = [
+    buttons = []
+    if has_more:
+        buttons.append(
             [
                 InlineKeyboardButton(
-                    text=f"❌ Закрыть жалобу #{complaint.id}",
-                    callback_data=f"complaint_close:{complaint.id}",
+                    text="⬇️ Показать ещё",
+                    callback_data=f"complaints_page:{complaints[-1]['id']}",
                 )
-            ],
-            [InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")],
-        ]
-        markup = InlineKeyboardMarkup(inline_keyboard=buttons)
+            ]
+        )
+    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")])
+    await message.answer(
+        "Есть ещё жалобы." if has_more else "Это все жалобы.",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
+    )
 
-        await callback.message.answer(text, parse_mode="HTML", reply_markup=markup)
 
+# Вывод жалоб
+@router.callback_query(F.data == "complaints")
+async def complaints_list(callback: CallbackQuery):
+    async with db_helper.session_factory(readonly=True) as session:
+        total_complaints = await get_complaints_count(session)
+
+    if not total_complaints:
+        await callback.message.answer("✅ Все жалобы были рассмотрены. Ничего нового.")
+        await callback.answer()
+        return
+
+    await callback.message.answer(
+        f"🚨 <b>Всего жалоб:</b> {total_complaints}\n🗂 Список жалоб:", parse_mode="HTML"
+    )
+    await send_complaints_page(callback.message)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("complaints_page:"))
+async def complaints_next_page(callback: CallbackQuery):
+    try:
+        after_id = int(callback.data.split(":")[1])
+    except ValueError:
+        await callback.answer("Некорректная страница.", show_alert=True)
+        return
+
+    # Кнопка «Показать ещё» больше не нужна — следующая страница придёт ниже
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await send_complaints_page(callback.message, after_id)
     await callback.answer()
 
 
@@ -392,8 +428,7 @@ async def complaint_close(callback: CallbackQuery):
         await delete_complaint(session, complaint_id)
 
     await callback.answer("✅ Жалоба закрыта.")
-    # Обновляем список жалоб
-    await complaints_list(callback)
+    await callback.message.edit_text(f"✅ Жалоба #{complaint_id} закрыта.")
 
 
 @router.callback_query(F.data.startswith("stats"))
@@ -413,20 +448,17 @@ async def stats_handler(callback: CallbackQuery):
     now = datetime.now(timezone.utc)
     period_start = now - period_map[period_str]
 
-    async with db_helper.session_factory() as session:
+    async with db_helper.session_factory(readonly=True) as session:
         stats = await get_stats_for_period(session, period_start)
 
-        # Получим имя пользователя с top_user_id (если есть)
-        top_user_name = "—"
-        if stats["top_user_id"] is not None:
-            user = await session.get(User, stats["top_user_id"])
-            if user:
-                top_user_name = user.username or f"ID {user.telegram_id}"
+    top_user_name = stats["top_user_name"] or "—"
 
     text = (
         f"📊 *Статистика за {period_str}:*\n\n"
         f"👥 Зарегистрировано пользователей: **{stats['users_count']}**\n"
         f"📢 Создано объявлений: **{stats['products_count']}**\n"
+        f"✅ Одобрено модерацией: **{stats['approvals_count']}**\n"
+        f"👁 Просмотров объявлений: **{stats['views_count']}**\n"
         f"🏆 Топ пользователь по объявлениям: **{top_user_name}** — "
         f"**{stats['top_user_products_count']}** объявлений\n"
     )
@@ -435,101 +467,308 @@ async def stats_handler(callback: CallbackQuery):
     await callback.answer()
 
 
+def build_moderation_caption(product: dict) -> str:
+    description = product["description"] or ""
+    if len(description) > MAX_DESCRIPTION_LENGTH:
+        description = description[: MAX_DESCRIPTION_LENGTH - 3] + "..."
+
+    contact_text = (
+        "Связь через бота" if product["contact"] == "via_bot" else product["contact"]
+    )
+
+    caption = (
+        f"<b>{product['name']}</b>\n\n"
+        f"{description}\n\n"
+        f"<b>Цена:</b> {product['price'] or 'договорная'}\n"
+        f"<b>Контакт:</b> {contact_text}\n"
+    )
+
+    if len(caption) > MAX_CAPTION_LENGTH:
+        caption = caption[: MAX_CAPTION_LENGTH - 3] + "..."
+    return caption
+
+
+async def send_moderation_card(message: Message, product: dict):
+    buttons = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="📷 Показать фото",
+                    callback_data=f"button_show_photos_admin:{product['id']}",
+                )
+            ],
+            [
+                InlineKeyboardButton(
+                    text="❌ Отклонить", callback_data=f"decline:{product['id']}"
+                ),
+                InlineKeyboardButton(
+                    text="✅ Принять", callback_data=f"approve:{product['id']}"
+                ),
+            ],
+        ]
+    )
+    caption = build_moderation_caption(product)
+
+    try:
+        if product["photo"]:
+            await message.answer_photo(
+                product["photo"],
+                caption=caption,
+                parse_mode="HTML",
+                reply_markup=buttons,
+            )
+        elif product["video"]:
+            await message.answer_video(
+                product["video"],
+                caption=caption,
+                parse_mode="HTML",
+                reply_markup=buttons,
+            )
+        else:
+            await message.answer(caption, parse_mode="HTML", reply_markup=buttons)
+    except Exception as e:
+        pass
+
+
+@router.callback_query(F.data == "perf_stats")
+async def perf_stats_handler(callback: CallbackQuery):
+    # Агрегаты процесса, обработавшего этот апдейт (см. core/metrics.py)
+    text = render_summary()
+    await callback.message.answer(text[:4096], parse_mode=None, reply_markup=menu_back)
+    await callback.answer()
+
+
 @router.callback_query(F.data == "publication")
 async def show_publication(callback: CallbackQuery):
+    # Очередь модерации — с primary: по показанному диапазону id кнопки
+    # «Принять/Отклонить все» пишут в primary, и отставание реплики
+    # не должно добавить в него объявления, которых модератор не видел
     async with db_helper.session_factory() as session:
-        products = await get_unpublished_products(session)
+        total, last_id = await get_pending_queue_stats(session)
 
-    for product in products:
-        # Определяем первое медиа: фото или видео
-        first_media = None
-        if product.photos:
-            first_media = ("photo", product.photos[0].photo_url)
-        elif getattr(product, "videos", None):
-            first_media = ("video", product.videos[0].video_file_id)
-
-        description = product.description or ""
-        if len(description) > MAX_DESCRIPTION_LENGTH:
-            description = description[: MAX_DESCRIPTION_LENGTH - 3] + "..."
-
-        contact_text = (
-            "Связь через бота" if product.contact == "via_bot" else product.contact
-        )
+    if not total:
+        await callback.message.answer("✅ Новых объявлений на модерации нет.")
+        await callback.answer()
+        return
 
-        caption = (
-            f"<b>{product.name}</b>\n\n"
-            f"{description}\n\n"
-            f"<b>Цена:</b> {product.price or 'договорная'}\n"
-            f"<b>Контакт:</b> {contact_text}\n"
+    buttons = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="👁 По одному", callback_data="mod_page:1:0"),
+                InlineKeyboardButton(
+                    text=f"📚 По {MODERATION_PAGE_SIZE}",
+                    callback_data=f"mod_page:{MODERATION_PAGE_SIZE}:0",
+                ),
+            ],
+            # Вся очередь на момент открытия: пришедшие позже объявления не затрагиваются
+            [
+                InlineKeyboardButton(
+                    text=f"❌ Отклонить все ({total})",
+                    callback_data=f"mod_bulk:decline:0:{last_id}",
+                ),
+                InlineKeyboardButton(
+                    text=f"✅ Принять все ({total})",
+                    callback_data=f"mod_bulk:approve:0:{last_id}",
+                ),
+            ],
+            [InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")],
+        ]
+    )
+    await callback.message.answer(
+        f"📢 <b>На модерации:</b> {total}\nКак просматривать очередь?",
+        parse_mode="HTML",
+        reply_markup=buttons,
+    )
+    await callback.answer()
+
+
+# Следующие объявления очереди: mod_page:<сколько>:<id последнего показанного>
+@router.callback_query(F.data.startswith("mod_page:"))
+async def show_publication_page(callback: CallbackQuery):
+    try:
+        _, per_page, after_id = callback.data.split(":")
+        per_page, after_id = int(per_page), int(after_id)
+    except ValueError:
+        await callback.answer("Некорректная страница.", show_alert=True)
+        return
+    per_page = max(1, min(per_page, MODERATION_PAGE_SIZE))
+
+    async with db_helper.session_factory() as session:
+        products, has_more = await get_pending_products_page(
+            session, per_page, after_id
         )
 
-        if len(caption) > MAX_CAPTION_LENGTH:
-            caption = caption[: MAX_CAPTION_LENGTH - 3] + "..."
+    # Кнопки прошлого шага больше не нужны
+    try:
+        await callback.message.edit_reply_markup(reply_markup=None)
+    except TelegramBadRequest:
+        pass
 
-        buttons = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="📷 Показать фото",
-                        callback_data=f"button_show_photos_admin:{product.id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="❌ Отклонить", callback_data=f"decline:{product.id}"
-                    ),
-                    InlineKeyboardButton(
-                        text="✅ Принять", callback_data=f"approve:{product.id}"
-                    ),
-                ],
-                [InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")],
+    if not products:
+        await callback.message.answer("✅ Очередь модерации пуста.")
+        await callback.answer()
+        return
+
+    for product in products:
+        await send_moderation_card(callback.message, product)
+
+    last_id = products[-1]["id"]
+    buttons = []
+    if len(products) > 1:
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text="❌ Отклонить все показанные",
+                    callback_data=f"mod_bulk:decline:{after_id}:{last_id}",
+                ),
+                InlineKeyboardButton(
+                    text="✅ Принять все показанные",
+                    callback_data=f"mod_bulk:approve:{after_id}:{last_id}",
+                ),
             ]
         )
-
-        try:
-            if first_media:
-                if first_media[0] == "photo":
-                    await callback.message.answer_photo(
-                        first_media[1],
-                        caption=caption,
-                        parse_mode="HTML",
-                        reply_markup=buttons,
-                    )
-                else:
-                    await callback.message.answer_video(
-                        first_media[1],
-                        caption=caption,
-                        parse_mode="HTML",
-                        reply_markup=buttons,
-                    )
-            else:
-                await callback.message.answer(
-                    caption, parse_mode="HTML", reply_markup=buttons
+    if has_more:
+        buttons.append(
+            [
+                InlineKeyboardButton(
+                    text="▶️ Следующие",
+                    callback_data=f"mod_page:{per_page}:{last_id}",
                 )
-        except Exception as e:
-            pass
+            ]
+        )
+    buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")])
+    await callback.message.answer(
+        (
+            "В очереди есть ещё объявления."
+            if has_more
+            else "Это последние объявления в очереди."
+        ),
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons),
+    )
+    await callback.answer()
+
 
+# Массовая модерация страницы или всей очереди: mod_bulk:<approve|decline>:<after_id>:<last_id>
+@router.callback_query(F.data.startswith("mod_bulk:"))
+async def bulk_moderation_confirm(callback: CallbackQuery):
+    _, action, after_id, last_id = callback.data.split(":")
+    question = (
+        "Вы уверены, что хотите опубликовать все выбранные объявления?"
+        if action == "approve"
+        else "Вы уверены, что хотите отклонить все выбранные объявления?"
+    )
+    buttons = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="✅ Да",
+                    callback_data=f"mod_bulk_yes:{action}:{after_id}:{last_id}",
+                ),
+                InlineKeyboardButton(
+                    text="❌ Нет", callback_data=f"{action}_confirm_no"
+                ),
+            ]
+        ]
+    )
+    await callback.message.answer(question, reply_markup=buttons)
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("mod_bulk_yes:"))
+async def bulk_moderation_yes(callback: CallbackQuery):
+    try:
+        _, action, after_id, last_id = callback.data.split(":")
+        after_id, last_id = int(after_id), int(last_id)
+    except ValueError:
+        await callback.answer("Некорректный запрос.", show_alert=True)
+        return
+
+    if action == "approve":
+        await process_bulk_approve(callback, after_id, last_id)
+    else:
+        await process_bulk_decline(callback, after_id, last_id)
+
+
+async def process_bulk_approve(callback: CallbackQuery, after_id: int, last_id: int):
+    result = await bulk_moderate(
+        True,
+        after_id=after_id,
+        last_id=last_id,
+        report_chat_id=callback.message.chat.id,
+    )
+
+    if not result.product_ids:
+        await callback.message.edit_text("Эти объявления уже рассмотрены")
+        return
+
+    if not result.notified:
+        await callback.message.edit_text(
+            f"Опубликовано объявлений: {len(result.product_ids)}, но уведомления о новых "
+            f"объявлениях пользователям отключены",
+        )
+        return
+
+    await callback.message.edit_text(
+        f"Принято объявлений: {len(result.product_ids)} ✅\n"
+        f"Уведомления подписчикам отправляются."
+    )
+
+
+async def process_bulk_decline(callback: CallbackQuery, after_id: int, last_id: int):
+    result = await bulk_moderate(False, after_id=after_id, last_id=last_id)
+
+    if not result.product_ids:
+        await callback.message.edit_text("Эти объявления уже рассмотрены")
+        return
+
+    await callback.message.edit_text(
+        f"Отклонено объявлений: {len(result.product_ids)} ❌"
+    )
+
+
+def build_admin_gallery(product: Product) -> dict:
+    """Список медиа объявления для кэша галереи модератора: сначала фото, затем видео"""
+    media = [["photo", photo.photo_url] for photo in (product.photos or [])]
+    media += [["video", vid.video_file_id] for vid in (product.videos or [])]
+    return {
+        "caption": None,
+        "media": media,
+        "published": product.publication is True,
+    }
+
+
+async def get_admin_gallery(product_id: int) -> dict | None:
+    gallery, version = await get_cached_gallery(product_id, "admin")
+    if gallery is not None:
+        return gallery
+
+    async with db_helper.session_factory() as session:
+        product = await get_product_with_photos_and_user(session, product_id)
+    if not product:
+        return None
+
+    gallery = build_admin_gallery(product)
+    await set_cached_gallery(product_id, "admin", gallery, version)
+    return gallery
+
+
+def build_media_group(gallery: dict) -> list[InputMediaPhoto | InputMediaVideo]:
+    return [
+        InputMediaPhoto(media=fid) if kind == "photo" else InputMediaVideo(media=fid)
+        for kind, fid in gallery["media"]
+    ]
+
+
 @router.callback_query(F.data.startswith("button_show_photos_admin:"))
 async def show_photos_admin(callback: CallbackQuery):
     product_id = int(callback.data.split(":")[1])
-    async with db_helper.session_factory() as session:
-        product = await get_product_with_photos_and_user(session, product_id)
+    gallery = await get_admin_gallery(product_id)
 
-    if not product or (not product.photos and not getattr(product, "videos", None)):
+    if not gallery or not gallery["media"]:
         await callback.answer("Медиа не найдено", show_alert=True)
         return
 
-    media = []
-    # Добавляем фото сначала
-    for photo in (product.photos or []):
-        media.append(InputMediaPhoto(media=photo.photo_url))
-    # Добавляем видео
-    if getattr(product, "videos", None):
-        for vid in product.videos:
-            media.append(InputMediaVideo(media=vid.video_file_id))
+    media = build_media_group(gallery)
     try:
         await callback.message.answer_media_group(media)
     except Exception as e:
@@ -588,7 +827,9 @@ async def process_approve_logic(callback: CallbackQuery, product_id: int):
             return
 
         product.publication = True
+        await bump_daily_stats(session, approvals=1)
         await session.commit()
+        await bump_product_version(product_id)
 
         settings_stmt = select(BotSettings).limit(1)
         settings_result = await session.execute(settings_stmt)
@@ -600,107 +841,17 @@ async def process_approve_logic(callback: CallbackQuery, product_id: int):
             )
             return
 
-        users_stmt = select(User).where(
-            or_(
-                User.notifications_all_ads == True, User.notifications_all_ads.is_(None)
-            )
-        )
-        result = await session.execute(users_stmt)
-        subscribed_users = result.scalars().all()
-
     await invalidate_cache_on_new_ad()
     await index_product_in_redis(product)
 
-    contact = product.contact.strip() if product.contact else ""
-    if (
-        re.fullmatch(r"\d{6,}", contact)
-        or re.fullmatch(r"[78]\d{6,}", contact)
-        or re.fullmatch(r"380\d{6,}", contact)
-    ):
-        if not contact.startswith("+"):
-            contact = "+" + contact
-    elif re.match(r"^(8\d{6,}|7\d{6,}|380\d{6,})$", contact):
-        contact = "+" + contact
-
-    price = product.price
-    if price:
-        price = format_price(price)
-    else:
-        price = "договорная"
-
-    geo_text = "-"
-    if product.geo and isinstance(product.geo, dict):
-        lat = product.geo.get("latitude")
-        lon = product.geo.get("longitude")
-        if lat is not None and lon is not None:
-            geo_text = f"<a href='https://maps.google.com/?q={lat},{lon}'>Нажми, чтобы открыть карту</a>"
-
-    created_str = product.created_at.strftime("%d.%m.%Y") if product.created_at else "-"
-
-    contact_text = (
-        "Связь через бота" if product.contact == "via_bot" else product.contact
-    )
-
-    full_text = (
-        f"📌 {product.name}\n"
-        f"💬 {product.description or 'Без описания'}\n"
-        f"💰 Цена: {price}\n"
-        f"\n📞 Контакт: {contact_text}\n"
-        f"📍 Геолокация: {geo_text}\n"
-        f"🕒 Дата создания: {created_str}"
+    # Рассылка подписчикам — фоновой задачей; итог придёт в этот чат
+    await enqueue_job(
+        "notify_product", product_id=product_id, report_chat_id=callback.message.chat.id
     )
-
-    photos = [p.photo_url for p in product.photos][:10]
-
-    success_count = 0
-    blocked_count = 0
-    blocked_users = []
-
-    for user in subscribed_users:
-        try:
-            if not photos:
-                await callback.bot.send_message(
-                    user.telegram_id, full_text, parse_mode="HTML"
-                )
-            elif len(photos) == 1:
-                await callback.bot.send_photo(
-                    user.telegram_id,
-                    photos[0],
-                    caption=full_text,
-                    parse_mode="HTML",
-                )
-            else:
-                media_group = [
-                    InputMediaPhoto(
-                        media=photos[0], caption=full_text, parse_mode="HTML"
-                    )
-                ]
-                media_group += [InputMediaPhoto(media=photo) for photo in photos[1:]]
-                await callback.bot.send_media_group(user.telegram_id, media_group)
-
-            success_count += 1
-
-        except Exception:
-            blocked_count += 1
-            if user.username:
-                blocked_users.append(f"@{user.username} ({user.telegram_id})")
-            else:
-                blocked_users.append(str(user.telegram_id))
-
     await callback.message.edit_text(
-        f"Объявление принято ✅\n"
-        f"Отправлено успешно: {success_count}\n"
-        f"Не удалось отправить: {blocked_count}",
+        "Объявление принято ✅\nУведомления подписчикам отправляются."
     )
 
-    if blocked_users:
-        text = "🚫 Заблокировали бота:\n" + "\n".join(
-            html.escape(u) for u in blocked_users
-        )
-        chunk_size = 4000
-        for i in range(0, len(text), chunk_size):
-            await callback.message.answer(text[i : i + chunk_size], parse_mode="HTML")
-
 
 # Шаг 1 — при нажатии "Отклонить" отправляем подтверждение
 @router.callback_query(F.data.startswith("decline:"))
@@ -752,6 +903,7 @@ async def process_decline_logic(callback: CallbackQuery, product_id: int):
 
         product.publication = False
         await session.commit()
+        await bump_product_version(product_id)
 
         try:
             await callback.bot.send_message(
@@ -852,7 +1004,7 @@ async def all_ads_paginated(callback: CallbackQuery, state: FSMContext):
         except ValueError:
             page = 1
 
-    async with db_helper.session_factory() as session:
+    async with db_helper.session_factory(readonly=True) as session:
         total_ads = await get_published_products_count(session)
         products = await get_published_products_page(session, page, ADS_PER_PAGE)
 
@@ -927,18 +1079,7 @@ async def all_ads_paginated(callback: CallbackQuery, state: FSMContext):
             elif getattr(product, "videos", None):
                 first_media = ("video", product.videos[0].video_file_id)
             views = views_counts.get(product.id, 0)
-            contact_text = (
-                "Связь через бота" if product.contact == "via_bot" else product.contact
-            )
-
-            caption = (
-                f"<b>#{product.id} — {product.name}</b>\n\n"
-                f"{product.description}\n\n"
-                f"<b>Цена:</b> {product.price if product.price is not None else 'Не указана'}\n"
-                f"<b>Контакт:</b> {contact_text}\n"
-                f"<b>Дата:</b> {product.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-                f"<b>Просмотры:</b> {views}\n"
-            )
+            caption = render_admin_card(to_card_record(product), views)
 
             buttons = InlineKeyboardMarkup(
                 inline_keyboard=[
@@ -989,19 +1130,13 @@ async def all_ads_paginated(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data.startswith("show_photos_pub:"))
 async def show_photos_published(callback: CallbackQuery):
     product_id = int(callback.data.split(":")[1])
-    async with db_helper.session_factory() as session:
-        product = await get_published_product_by_id(session, product_id)
+    gallery = await get_admin_gallery(product_id)
 
-    if not product or (not product.photos and not getattr(product, "videos", None)):
+    if not gallery or not gallery["published"] or not gallery["media"]:
         await callback.answer("Медиа не найдено", show_alert=True)
         return
 
-    media = []
-    for photo in (product.photos or []):
-        media.append(InputMediaPhoto(media=photo.photo_url))
-    if getattr(product, "videos", None):
-        for vid in product.videos:
-            media.append(InputMediaVideo(media=vid.video_file_id))
+    media = build_media_group(gallery)
     # Если только один элемент — отправим отдельно с подписью нет
     if len(media) == 1:
         if isinstance(media[0], InputMediaPhoto):
@@ -1026,6 +1161,7 @@ async def unpublish_ad(callback: CallbackQuery):
         # Снять с публикации
         product.publication = False
         await session.commit()
+        await bump_product_version(product_id)
 
     await callback.answer("Снято с публикации ✅", show_alert=True)
 
@@ -1050,48 +1186,38 @@ async def ads_search_handler(message: Message, state: FSMContext):
     if not query:
         return
 
-    async with db_helper.session_factory() as session:
-        products: list[Product] = []
+    async with db_helper.session_factory(readonly=True) as session:
+        products: list[dict] = []
 
         # Поиск по ID, если число
         if query.isdigit():
-            product = await get_published_product_by_id(session, int(query))
+            product = await get_published_product_row(session, int(query))
             if product:
                 products = [product]
-        # По названию
+        # По названию, описанию и контакту
         if not products:
-            products = await search_published_products_by_name(session, query, limit=10)
+            products = await search_published_products(session, query, limit=10)
 
     if not products:
         await message.answer("Ничего не найдено по вашему запросу.")
         return
 
     for product in products:
-        first_photo = product.photos[0].photo_url if product.photos else None
-        contact_text = (
-            "Связь через бота" if product.contact == "via_bot" else product.contact
-        )
-
-        caption = (
-            f"<b>#{product.id} — {product.name}</b>\n\n"
-            f"{product.description}\n\n"
-            f"<b>Цена:</b> {product.price if product.price is not None else 'Не указана'}\n"
-            f"<b>Контакт:</b> {contact_text}\n"
-            f"<b>Дата:</b> {product.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-        )
+        first_photo = product["photo"]
+        caption = render_admin_card(to_card_record(product))
 
         buttons = InlineKeyboardMarkup(
             inline_keyboard=[
                 [
                     InlineKeyboardButton(
                         text="📷 Показать фото",
-                        callback_data=f"show_photos_pub:{product.id}",
+                        callback_data=f"show_photos_pub:{product['id']}",
                     )
                 ],
                 [
                     InlineKeyboardButton(
                         text="🛑 Снять с публикации",
-                        callback_data=f"unpublish:{product.id}",
+                        callback_data=f"unpublish:{product['id']}",
                     )
                 ],
                 [InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back")],
@@ -62,6 +62,11 @@ menu_stats = InlineKeyboardMarkup(
             InlineKeyboardButton(text="🗓️ Месяц", callback_data="stats?period=month"),
             InlineKeyboardButton(text="📈 Год", callback_data="stats?period=year"),
         ],
+        [
+            InlineKeyboardButton(
+                text="⏱ Производительность", callback_data="perf_stats"
+            ),
+        ],
         [
             InlineKeyboardButton(text="🔙 Назад", callback_data="admin_back"),
         ],
@@ -0,0 +1,70 @@
+"""Массовая модерация объявлений.
+
+Одобрение или отклонение пачки — выбранных объявлений или всех, подходящих
+под фильтр, — это один UPDATE в одной транзакции, одна запись в поисковый
+индекс через pipeline, одна дельта кэша и одна фоновая задача уведомлений
+на всю пачку (подписчики получают подборку, авторы — одно сообщение).
+Так разбор очереди модерации не вызывает волну инвалидаций и рассылок.
+"""
+
+from typing import NamedTuple
+
+from rovmarket_bot.core.cache import invalidate_cache_on_moderation
+from rovmarket_bot.core.jobs import enqueue_job
+from rovmarket_bot.core.logger import get_component_logger
+from rovmarket_bot.core.models import db_helper
+from rovmarket_bot.app.search.redis_search import index_products_in_redis
+from rovmarket_bot.app.settings.crud import get_or_create_bot_settings
+from .crud import moderate_pending_products
+
+logger = get_component_logger("admin")
+
+
+class BulkModerationResult(NamedTuple):
+    product_ids: list[int]
+    # Подписчикам поставлена задача уведомлений (не отключены в настройках бота)
+    notified: bool = False
+
+
+async def bulk_moderate(
+    approve: bool,
+    *,
+    product_ids: list[int] | None = None,
+    category_id: int | None = None,
+    after_id: int | None = None,
+    last_id: int | None = None,
+    report_chat_id: int | None = None,
+) -> BulkModerationResult:
+    """Одобрить или отклонить ожидающие объявления по выбору или фильтру.
+
+    report_chat_id — куда прислать итог рассылки подписчикам (модератору).
+    """
+    async with db_helper.session_factory() as session:
+        moderated = await moderate_pending_products(
+            session,
+            approve,
+            product_ids=product_ids,
+            category_id=category_id,
+            after_id=after_id,
+            last_id=last_id,
+        )
+        notifications_enabled = approve and bool(
+            (await get_or_create_bot_settings(session)).notifications_all
+        )
+
+    ids = [product.id for product in moderated]
+    if not ids:
+        return BulkModerationResult(ids)
+    logger.info("Bulk %s: %s products", "approve" if approve else "decline", len(ids))
+
+    await invalidate_cache_on_moderation(ids, published=approve)
+    if not approve:
+        await enqueue_job("notify_declined", product_ids=ids)
+        return BulkModerationResult(ids)
+
+    await index_products_in_redis(moderated)
+    if notifications_enabled:
+        await enqueue_job(
+            "notify_products", product_ids=ids, report_chat_id=report_chat_id
+        )
+    return BulkModerationResult(ids, notified=notifications_enabled)
@@ -1,8 +1,15 @@
-from sqlalchemy import inspect
+from sqlalchemy import inspect, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
-from rovmarket_bot.core.models import Product, User
+from rovmarket_bot.core.models import (
+    Product,
+    User,
+    Categories,
+    ProductPhoto,
+    ProductVideo,
+    ProductView,
+)
 from rovmarket_bot.app.settings.crud import get_or_create_bot_settings
 
 
@@ -25,42 +32,71 @@ async def get_user_products(telegram_id: int, session: AsyncSession):
     return result.unique().scalars().all()
 
 
-async def get_user_products_paginated(
+async def get_user_products_page(
     telegram_id: int, session: AsyncSession, page: int = 1, limit: int = 5
-):
-    """Получить объявления пользователя с пагинацией"""
+) -> tuple[list[dict], int]:
+    """Страница «Моих объявлений» одним запросом.
+
+    Возвращает (items, total): поля объявления, название категории, первое
+    фото/видео и количество просмотров (COUNT по product_view). Общее число
+    объявлений пользователя считается оконной функцией в том же запросе.
+    """
     offset = (page - 1) * limit
 
+    first_photo = (
+        select(ProductPhoto.photo_url)
+        .where(ProductPhoto.product_id == Product.id)
+        .order_by(ProductPhoto.id)
+        .limit(1)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+    first_video = (
+        select(ProductVideo.video_file_id)
+        .where(ProductVideo.product_id == Product.id)
+        .order_by(ProductVideo.id)
+        .limit(1)
+        .correlate(Product)
+        .scalar_subquery()
+    )
+    views_count = func.count(ProductView.id)
+
     stmt = (
-        select(Product)
-        .options(
-            selectinload(Product.photos),
-            selectinload(Product.videos),
-            selectinload(Product.category),
-            selectinload(Product.user),
-            selectinload(Product.views),
+        select(
+            Product.id,
+            Product.name,
+            Product.description,
+            Product.price,
+            Product.contact,
+            Product.publication,
+            Product.created_at,
+            Categories.name.label("category_name"),
+            first_photo.label("first_photo"),
+            first_video.label("first_video"),
+            views_count.label("views_count"),
+            func.count().over().label("total_count"),
         )
-        .join(User)
+        .join(User, User.id == Product.user_id)
+        .outerjoin(Categories, Categories.id == Product.category_id)
+        .outerjoin(ProductView, ProductView.product_id == Product.id)
         .where(User.telegram_id == telegram_id)
-        .order_by(Product.created_at.desc())
+        .group_by(Product.id, Categories.name)
+        .order_by(Product.created_at.desc(), Product.id.desc())
         .offset(offset)
         .limit(limit)
     )
 
     result = await session.execute(stmt)
-    return result.unique().scalars().all()
+    rows = result.mappings().all()
+    if not rows:
+        return [], 0
 
-
-async def get_user_products_count(telegram_id: int, session: AsyncSession):
-    """Получить количество объявлений пользователя"""
-    from sqlalchemy import func
-
-    stmt = (
-        select(func.count(Product.id)).join(User).where(User.telegram_id == telegram_id)
-    )
-
-    result = await session.execute(stmt)
-    return result.scalar()
+    total = rows[0]["total_count"]
+    items = [
+        {key: value for key, value in row.items() if key != "total_count"}
+        for row in rows
+    ]
+    return items, total
 
 
 async def unpublish_user_product(
@@ -73,14 +109,13 @@ async def unpublish_user_product(
     # Находим продукт по id, принадлежащий пользователю с данным telegram_id
     stmt = (
         select(Product)
-        .options(selectinload(Product.photos))
         .join(User)
         .where(Product.id == product_id, User.telegram_id == telegram_id)
         .limit(1)
     )
 
     result = await session.execute(stmt)
-    product: Product | None = result.unique().scalar_one_or_none()
+    product: Product | None = result.scalar_one_or_none()
 
     if product is None:
         return False
@@ -104,14 +139,13 @@ async def publish_user_product(
     """
     stmt = (
         select(Product)
-        .options(selectinload(Product.photos))
         .join(User)
         .where(Product.id == product_id, User.telegram_id == telegram_id)
         .limit(1)
     )
 
     result = await session.execute(stmt)
-    product: Product | None = result.unique().scalar_one_or_none()
+    product: Product | None = result.scalar_one_or_none()
 
     if product is None:
         return None
@@ -148,7 +182,6 @@ async def get_user_product_with_photos(
             selectinload(Product.videos),
             selectinload(Product.category),
             selectinload(Product.user),
-            selectinload(Product.views),
         )
         .join(User)
         .where(Product.id == product_id, User.telegram_id == telegram_id)
@@ -159,6 +192,15 @@ async def get_user_product_with_photos(
     return result.unique().scalar_one_or_none()
 
 
+async def get_product_views_count(product_id: int, session: AsyncSession) -> int:
+    """Количество просмотров объявления (без загрузки строк product_view)."""
+    stmt = select(func.count(ProductView.id)).where(
+        ProductView.product_id == product_id
+    )
+    result = await session.execute(stmt)
+    return result.scalar() or 0
+
+
 async def get_user_product_by_id(
     product_id: int, telegram_id: int, session: AsyncSession
 ) -> Product | None:
@@ -190,7 +232,7 @@ async def update_user_product(
         .limit(1)
     )
     result = await session.execute(stmt)
-    product: Product | None = result.unique().scalar_one_or_none()
+    product: Product | None = result.scalar_one_or_none()
     if not product:
         return None
 
@@ -8,7 +8,6 @@ from aiogram.types import (
     InputMediaPhoto,
     InputMediaVideo,
 )
-from html import escape
 
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy import select
@@ -23,21 +22,30 @@ from rovmarket_bot.app.ads.keyboard import (
 )
 from rovmarket_bot.app.post.crud import get_categories_page
 from rovmarket_bot.app.start.keyboard import menu_start, menu_start_inline
-from rovmarket_bot.core.cache import check_rate_limit, invalidate_all_ads_cache
+from rovmarket_bot.core.cache import (
+    check_rate_limit,
+    invalidate_all_ads_cache,
+    get_cached_gallery,
+    set_cached_gallery,
+    bump_product_version,
+)
 from rovmarket_bot.core.models import db_helper, Categories
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from rovmarket_bot.app.ads.crud import (
-    get_user_products_paginated,
-    get_user_products_count,
+    get_user_products_page,
     unpublish_user_product,
     publish_user_product,
     get_user_product_with_photos,
     get_user_product_by_id,
     update_user_product,
+    get_product_views_count,
 )
 from rovmarket_bot.app.settings.crud import get_or_create_bot_settings
 from rovmarket_bot.app.admin.crud import get_admin_users
 from rovmarket_bot.core.logger import get_component_logger
+from rovmarket_bot.core.cards import to_card_record, render_owner_card
+from rovmarket_bot.core.delivery import Slide, carousel_enabled, show_slide, slide_ref
+from rovmarket_bot.core.jobs import enqueue_job
 from aiogram.exceptions import TelegramBadRequest
 import re
 
@@ -58,6 +66,8 @@ class EditProductState(StatesGroup):
     waiting_category = State()
 
 
+MY_ADS_PAGE_SIZE = 5
+
 CONTACT_REGEX = r"^(?:\+7\d{10}|\+380\d{9}|\+8\d{10}|@[\w\d_]{5,32}|[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)$"
 
 
@@ -88,7 +98,9 @@ async def menu_start_inline_my_ads(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(F.text == "📋 Мои объявления")
-async def button_my_ads(message: Message, state: FSMContext, user_id_override: int | None = None):
+async def button_my_ads(
+    message: Message, state: FSMContext, user_id_override: int | None = None
+):
     user_id = user_id_override or message.from_user.id
     allowed, retry_after = await check_rate_limit(user_id, "search_cmd")
     if not allowed:
@@ -99,13 +111,9 @@ async def button_my_ads(message: Message, state: FSMContext, user_id_override: i
     await state.clear()
 
     async with db_helper.session_factory() as session:
-        # Получаем объявления пользователя
-        products = await get_user_products_paginated(
-            telegram_id=user_id, session=session, page=1, limit=5
-        )
-
-        total_count = await get_user_products_count(
-            telegram_id=user_id, session=session
+        # Получаем объявления пользователя вместе с общим количеством
+        products, total_count = await get_user_products_page(
+            telegram_id=user_id, session=session, page=1, limit=my_ads_page_size()
         )
         logger.info(
             "Loaded %s ads for user_id=%s (first page)",
@@ -128,76 +136,111 @@ async def button_my_ads(message: Message, state: FSMContext, user_id_override: i
     await send_user_products(message, products, 1, total_count, state)
 
 
+def my_ads_page_size() -> int:
+    # В карусели на «странице» одно объявление
+    return 1 if carousel_enabled() else MY_ADS_PAGE_SIZE
+
+
+def owner_action_rows(product_id: int) -> list:
+    """Кнопки управления объявлением для владельца."""
+    return [
+        [
+            InlineKeyboardButton(
+                text="Снять с публикации",
+                callback_data=f"unpublish_{product_id}",
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="Опубликовать объявление",
+                callback_data=f"publish_{product_id}",
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="Показать фотографии",
+                callback_data=f"show_photos_{product_id}",
+            )
+        ],
+        [
+            InlineKeyboardButton(
+                text="✏ Редактировать",
+                callback_data=f"edit_product_{product_id}",
+            )
+        ],
+    ]
+
+
+async def send_user_product_slide(
+    message: Message,
+    product: dict,
+    current_page: int,
+    total_count: int,
+    state: FSMContext,
+    current: list | None = None,
+):
+    """Показать объявление пользователя кадром карусели (навигация в том же сообщении)."""
+    caption = render_owner_card(
+        to_card_record(product),
+        product["category_name"],
+        product["views_count"] or 0,
+    )
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=owner_action_rows(product["id"])
+        + create_pagination_keyboard(current_page, total_count, 1).inline_keyboard
+    )
+    if product["first_photo"]:
+        media, media_type = product["first_photo"], "photo"
+    else:
+        media, media_type = product["first_video"], "video"
+
+    ref = await show_slide(
+        message.bot,
+        message.chat.id,
+        Slide(
+            text=caption,
+            media=media,
+            media_type=media_type,
+            reply_markup=keyboard,
+            parse_mode="HTML",
+        ),
+        current,
+    )
+    # close_ads удалит сообщение карусели
+    await state.update_data(ads_message_ids=[ref[0]])
+
+
 async def send_user_products(
     message: Message, products, current_page: int, total_count: int, state: FSMContext
 ):
     """Отправить объявления пользователя с пагинацией"""
-
-    sent_messages = []
+    if carousel_enabled():
+        await send_user_product_slide(
+            message, products[0], current_page, total_count, state
+        )
+        return
 
     data = await state.get_data()
     ads_message_ids = data.get("ads_message_ids", [])
 
     for product in products:
-        name = escape(product.name or "")
-        description = escape(product.description or "")
-        category_name = escape(getattr(product.category, "name", "—") or "—")
-        price_str = (
-            f"{product.price:,}".replace(",", " ") + " ₽"
-            if product.price
-            else "Договорная"
-        )
-        contact = escape(product.contact or "")
-        date_str = product.created_at.strftime("%d.%m.%Y %H:%M")
-        views_count = len(product.views) if getattr(product, "views", None) else 0
-
-        contact_text = "Связь через бота" if contact == "via_bot" else contact
-
-        caption = (
-            f"<b>📋 {name}</b>\n\n"
-            f"📝 {description}\n\n"
-            f"💰 <b>Цена:</b> {price_str}\n"
-            f"📂 <b>Категория:</b> {category_name}\n"
-            f"📞 <b>Контакты:</b> {contact_text}\n"
-            f"📅 <b>Дата:</b> {date_str}\n"
-            f"👥 <b>Просмотры:</b> {views_count}"
+        product_id = product["id"]
+        caption = render_owner_card(
+            to_card_record(product),
+            product["category_name"],
+            product["views_count"] or 0,
         )
 
         actions_keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="Снять с публикации",
-                        callback_data=f"unpublish_{product.id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="Опубликовать объявление",
-                        callback_data=f"publish_{product.id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="Показать фотографии",
-                        callback_data=f"show_photos_{product.id}",
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        text="✏ Редактировать",
-                        callback_data=f"edit_product_{product.id}",
-                    )
-                ],
-            ]
+            inline_keyboard=owner_action_rows(product_id)
         )
 
         # Превью: первое фото, иначе первое видео
         first_media = None
-        if product.photos:
-            first_media = ("photo", product.photos[0].photo_url)
-        elif getattr(product, "videos", None):
-            first_media = ("video", product.videos[0].video_file_id)
+        if product["first_photo"]:
+            first_media = ("photo", product["first_photo"])
+        elif product["first_video"]:
+            first_media = ("video", product["first_video"])
 
         if first_media:
             try:
@@ -238,7 +281,7 @@ async def send_user_products(
 
 
 def create_pagination_keyboard(
-    current_page: int, total_count: int
+    current_page: int, total_count: int, page_size: int = MY_ADS_PAGE_SIZE
 ) -> InlineKeyboardMarkup:
     """Создать клавиатуру для пагинации"""
     keyboard = []
@@ -255,12 +298,12 @@ def create_pagination_keyboard(
 
     nav_buttons.append(
         InlineKeyboardButton(
-            text=f"{current_page}/{max(1, (total_count + 4) // 5)}",
+            text=f"{current_page}/{max(1, (total_count + page_size - 1) // page_size)}",
             callback_data="current_page",
         )
     )
 
-    if current_page * 5 < total_count:
+    if current_page * page_size < total_count:
         nav_buttons.append(
             InlineKeyboardButton(
                 text="Вперед ▶️", callback_data=f"ads_page_{current_page + 1}"
@@ -287,12 +330,11 @@ async def handle_ads_pagination(callback: CallbackQuery, state: FSMContext):
     )
 
     async with db_helper.session_factory() as session:
-        products = await get_user_products_paginated(
-            telegram_id=callback.from_user.id, session=session, page=page, limit=5
-        )
-
-        total_count = await get_user_products_count(
-            telegram_id=callback.from_user.id, session=session
+        products, total_count = await get_user_products_page(
+            telegram_id=callback.from_user.id,
+            session=session,
+            page=page,
+            limit=my_ads_page_size(),
         )
 
     if not products:
@@ -302,6 +344,19 @@ async def handle_ads_pagination(callback: CallbackQuery, state: FSMContext):
     # Обновляем состояние
     await state.update_data(current_page=page, total_count=total_count)
 
+    if carousel_enabled():
+        # Карусель: листаем, редактируя то же сообщение
+        await send_user_product_slide(
+            callback.message,
+            products[0],
+            page,
+            total_count,
+            state,
+            current=slide_ref(callback.message),
+        )
+        await callback.answer()
+        return
+
     # Удаляем предыдущее сообщение с клавиатурой
     await callback.message.delete()
 
@@ -394,6 +449,7 @@ async def unpublish_product(callback: CallbackQuery):
     if updated:
         await callback.message.edit_text("Объявление снято с публикации ✅")
         await invalidate_all_ads_cache()
+        await bump_product_version(product_id)
     else:
         await callback.message.edit_text("Не удалось снять с публикации")
 
@@ -468,6 +524,7 @@ async def publish_product(callback: CallbackQuery):
                 "Не удалось опубликовать", show_alert=False
             )
             return
+        await bump_product_version(product_id)
 
         settings_row = await get_or_create_bot_settings(session)
         if bool(settings_row.moderation) and product.publication is None:
@@ -490,6 +547,7 @@ async def publish_product(callback: CallbackQuery):
                     )
 
     if product.publication is True:
+        await enqueue_job("notify_product", product_id=product.id)
         await callback.message.edit_text("Объявление опубликовано сразу ✅")
     elif product.publication is None:
         await callback.message.edit_text("Объявление отправлено на модерацию ⏳")
@@ -506,6 +564,25 @@ async def cancel_publish(callback: CallbackQuery):
     await callback.message.edit_text("Публикация отменена ❌")
 
 
+def build_owner_gallery(product, views_count: int) -> dict:
+    """Собрать подпись и список медиа объявления владельца для кэша галереи"""
+    full_caption = render_owner_card(
+        to_card_record(product),
+        getattr(product.category, "name", None),
+        views_count,
+    )
+
+    photos = [p.photo_url for p in (product.photos or [])]
+    videos = [v.video_file_id for v in (product.videos or [])]
+    media = [["photo", x] for x in photos] + [["video", x] for x in videos]
+
+    return {
+        "caption": full_caption,
+        "media": media,
+        "owner_id": product.user.telegram_id if product.user else None,
+    }
+
+
 @router.callback_query(F.data.startswith("show_photos_"))
 async def show_product_photos(callback: CallbackQuery):
     """Показать все медиа объявления (фото и видео) медиа-группой."""
@@ -518,21 +595,29 @@ async def show_product_photos(callback: CallbackQuery):
         await callback.answer("Некорректный запрос", show_alert=False)
         return
 
-    async with db_helper.session_factory() as session:
-        product = await get_user_product_with_photos(
-            product_id=product_id, telegram_id=callback.from_user.id, session=session
-        )
+    gallery, version = await get_cached_gallery(product_id, "owner")
+    if gallery is None or gallery.get("owner_id") != callback.from_user.id:
+        async with db_helper.session_factory() as session:
+            product = await get_user_product_with_photos(
+                product_id=product_id,
+                telegram_id=callback.from_user.id,
+                session=session,
+            )
+            if product is None:
+                logger.warning(
+                    "Show photos: product not found or not owned product_id=%s user_id=%s",
+                    product_id,
+                    callback.from_user.id,
+                )
+                await callback.answer("Объявление не найдено", show_alert=False)
+                return
 
-    if product is None:
-        logger.warning(
-            "Show photos: product not found or not owned product_id=%s user_id=%s",
-            product_id,
-            callback.from_user.id,
-        )
-        await callback.answer("Объявление не найдено", show_alert=False)
-        return
+            views_count = await get_product_views_count(product_id, session)
 
-    if not product.photos and not getattr(product, "videos", None):
+        gallery = build_owner_gallery(product, views_count)
+        await set_cached_gallery(product_id, "owner", gallery, version)
+
+    if not gallery["media"]:
         logger.info(
             "Show media: none for product_id=%s (user_id=%s)",
             product_id,
@@ -541,41 +626,22 @@ async def show_product_photos(callback: CallbackQuery):
         await callback.answer("Медиа отсутствует", show_alert=False)
         return
 
-    # Подготовим красивую подпись (HTML)
-    name = escape(product.name or "")
-    description = escape(product.description or "")
-    category_name = escape(getattr(product.category, "name", "—") or "—")
-    price_str = (
-        f"{product.price:,}".replace(",", " ") + " ₽" if product.price else "Договорная"
-    )
-    contact = escape(product.contact or "")
-    date_str = product.created_at.strftime("%d.%m.%Y %H:%M")
-    views_count = len(product.views) if getattr(product, "views", None) else 0
-
-    contact_text = "Связь через бота" if contact == "via_bot" else contact
-
-    full_caption = (
-        f"<b>📋 {name}</b>\n\n"
-        f"📝 {description}\n\n"
-        f"💰 <b>Цена:</b> {price_str}\n"
-        f"📂 <b>Категория:</b> {category_name}\n"
-        f"📞 <b>Контакты:</b> {contact_text}\n"
-        f"📅 <b>Дата:</b> {date_str}\n"
-        f"👥 <b>Просмотры:</b> {views_count}"
-    )
+    full_caption = gallery["caption"]
 
     # Собираем и отправляем медиа-группу (батчами по 10), фото + видео
-    photos = [p.photo_url for p in (product.photos or [])]
-    videos = [v.video_file_id for v in (product.videos or [])]
-    combined = [("photo", x) for x in photos] + [("video", x) for x in videos]
+    combined = [(kind, fid) for kind, fid in gallery["media"]]
 
     if len(combined) == 1:
         kind, fid = combined[0]
         try:
             if kind == "photo":
-                await callback.message.answer_photo(photo=fid, caption=full_caption, parse_mode="HTML")
+                await callback.message.answer_photo(
+                    photo=fid, caption=full_caption, parse_mode="HTML"
+                )
             else:
-                await callback.message.answer_video(video=fid, caption=full_caption, parse_mode="HTML")
+                await callback.message.answer_video(
+                    video=fid, caption=full_caption, parse_mode="HTML"
+                )
         except TelegramBadRequest:
             await callback.message.answer(full_caption, parse_mode="HTML")
         await callback.answer()
@@ -586,13 +652,19 @@ async def show_product_photos(callback: CallbackQuery):
         chunk = combined[start : start + 10]
         media = []
         for idx, (kind, fid) in enumerate(chunk):
-            item = InputMediaPhoto(media=fid) if kind == "photo" else InputMediaVideo(media=fid)
+            item = (
+                InputMediaPhoto(media=fid)
+                if kind == "photo"
+                else InputMediaVideo(media=fid)
+            )
             if first_batch and idx == 0:
                 item.caption = full_caption
                 item.parse_mode = "HTML"
             media.append(item)
         try:
-            await callback.bot.send_media_group(chat_id=callback.message.chat.id, media=media)
+            await callback.bot.send_media_group(
+                chat_id=callback.message.chat.id, media=media
+            )
         except TelegramBadRequest:
             await callback.message.answer(full_caption, parse_mode="HTML")
         first_batch = False
@@ -932,6 +1004,7 @@ async def edit_contact(message: Message, state: FSMContext):
 
     if updated_product:
         await invalidate_all_ads_cache()
+        await bump_product_version(product_id)
         if contact_value == "via_bot":
             await message.answer(
                 "✅ Объявление успешно обновлено!\n\nТеперь пользователи смогут связаться с вами через анонимный чат 🤖",
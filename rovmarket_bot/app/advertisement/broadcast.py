@@ -0,0 +1,113 @@
+"""Рассылка рекламы всем пользователям.
+
+И разовая рассылка при создании рекламы, и ежечасная ротация рекламных
+постов выполняются фоновыми задачами (`core/jobs.py`), а не в хендлере.
+"""
+
+import asyncio
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import InputMediaPhoto, InputMediaVideo
+
+from rovmarket_bot.core.jobs import register_job
+from rovmarket_bot.core.logger import get_component_logger
+from rovmarket_bot.core.models import db_helper
+from rovmarket_bot.app.admin.crud import get_all_users
+from .crud import get_next_broadcast_ad
+
+logger = get_component_logger("advertisement")
+
+# Одновременных отправок (общий лимит бота ~30 сообщений/сек)
+SEND_CONCURRENCY = 10
+
+
+def _media_group(media: list, text: str) -> list:
+    media_group = []
+    for file_id, media_type in media[:10]:  # Ограничиваем до 10 файлов
+        if media_type == "photo":
+            media_group.append(InputMediaPhoto(media=file_id))
+        elif media_type == "video":
+            media_group.append(InputMediaVideo(media=file_id))
+    if media_group:
+        media_group[0].caption = text
+    return media_group
+
+
+async def _send_ad(bot: Bot, chat_id: int, text: str, media: list, pinned: bool):
+    media_group = _media_group(media, text)
+    if media_group:
+        msgs = await bot.send_media_group(chat_id=chat_id, media=media_group)
+        message_id = msgs[0].message_id if msgs else None
+    else:
+        msg = await bot.send_message(chat_id=chat_id, text=text)
+        message_id = msg.message_id
+    if pinned and message_id:
+        try:
+            await bot.pin_chat_message(chat_id=chat_id, message_id=message_id)
+        except Exception:
+            pass
+
+
+async def send_ad_to_users(
+    bot: Bot, telegram_ids: list[int], text: str, media: list, pinned: bool
+) -> tuple[int, int]:
+    """Разослать пост; вернуть (успешно, ошибок)."""
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+    async def deliver(chat_id: int) -> bool:
+        async with semaphore:
+            try:
+                try:
+                    await _send_ad(bot, chat_id, text, media, pinned)
+                except TelegramRetryAfter as e:
+                    await asyncio.sleep(e.retry_after)
+                    await _send_ad(bot, chat_id, text, media, pinned)
+                return True
+            except Exception:
+                # ignore per-user failures
+                return False
+
+    results = await asyncio.gather(*(deliver(chat_id) for chat_id in telegram_ids))
+    sent = sum(results)
+    return sent, len(results) - sent
+
+
+@register_job("broadcast_ad")
+async def broadcast_ad(
+    bot: Bot,
+    text: str,
+    media: list,
+    pinned: bool = False,
+    report_chat_id: int | None = None,
+) -> None:
+    async with db_helper.new_session() as session:
+        users = await get_all_users(session)
+    sent, failed = await send_ad_to_users(
+        bot, [user.telegram_id for user in users], text, media, pinned
+    )
+    logger.info("Ad broadcast sent=%s failed=%s", sent, failed)
+    if report_chat_id is not None:
+        await bot.send_message(
+            report_chat_id,
+            f"📬 Рассылка завершена. Успешно: {sent}, ошибок: {failed}.",
+        )
+
+
+@register_job("scheduled_broadcast")
+async def scheduled_broadcast(bot: Bot) -> None:
+    """Очередной рекламный пост из ротации — всем пользователям."""
+    async with db_helper.new_session() as session:
+        ad = await get_next_broadcast_ad(session)
+        if not ad:
+            return
+        users = await get_all_users(session)
+        media = [(m.file_id, m.media_type) for m in (ad.media or [])]
+        text, pinned = ad.text, bool(ad.pinned)
+        # commit pointer advance even if sending fails later
+        await session.commit()
+
+    sent, failed = await send_ad_to_users(
+        bot, [user.telegram_id for user in users], text, media, pinned
+    )
+    logger.info("Scheduled ad broadcast sent=%s failed=%s", sent, failed)
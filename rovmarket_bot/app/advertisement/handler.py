@@ -1,12 +1,17 @@
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto, InputMediaVideo
+from aiogram.types import (
+    Message,
+    CallbackQuery,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+)
 
 from rovmarket_bot.core.models import db_helper
 from .crud import create_advertisement, add_ad_media
 from .keyboard import ad_type_keyboard, duration_keyboard, confirm_media_keyboard
-from rovmarket_bot.app.admin.crud import get_all_users
+from rovmarket_bot.core.jobs import enqueue_job
 
 router = Router()
 
@@ -82,12 +87,14 @@ async def receive_ad_photo(
 
     messages = album_messages if album_messages else [message]
     added_count = 0
-    
+
     for msg in messages:
         if len(media) >= 10:
-            await message.answer("📸 Уже добавлено 10 медиа файлов. Нажмите «Подтвердить».")
+            await message.answer(
+                "📸 Уже добавлено 10 медиа файлов. Нажмите «Подтвердить»."
+            )
             break
-        
+
         # Добавляем фото, если есть
         if msg.photo and len(msg.photo) > 0:
             media.append((msg.photo[-1].file_id, "photo"))
@@ -99,7 +106,7 @@ async def receive_ad_photo(
             added_count += 1
 
     await state.update_data(media=media)
-    
+
     if added_count > 0:
         await message.answer(
             f"✅ Медиа добавлено ({len(media)}/10). Можно отправить ещё или нажмите 'Подтвердить'",
@@ -123,12 +130,14 @@ async def receive_ad_video(
 
     messages = album_messages if album_messages else [message]
     added_count = 0
-    
+
     for msg in messages:
         if len(media) >= 10:
-            await message.answer("📹 Уже добавлено 10 медиа файлов. Нажмите «Подтвердить».")
+            await message.answer(
+                "📹 Уже добавлено 10 медиа файлов. Нажмите «Подтвердить»."
+            )
             break
-        
+
         # Добавляем видео, если есть
         if getattr(msg, "video", None):
             media.append((msg.video.file_id, "video"))
@@ -140,7 +149,7 @@ async def receive_ad_video(
             added_count += 1
 
     await state.update_data(media=media)
-    
+
     if added_count > 0:
         await message.answer(
             f"✅ Медиа добавлено ({len(media)}/10). Можно отправить ещё или нажмите 'Подтвердить'",
@@ -164,7 +173,9 @@ async def media_other_messages(message: Message):
 @router.callback_query(F.data == "ad_photos_done")
 async def ad_media_done(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_reply_markup()
-    await callback.message.answer("⏳ Выберите срок размещения:", reply_markup=duration_keyboard)
+    await callback.message.answer(
+        "⏳ Выберите срок размещения:", reply_markup=duration_keyboard
+    )
     await state.set_state(AdState.duration)
     await callback.answer()
 
@@ -190,48 +201,14 @@ async def choose_duration(callback: CallbackQuery, state: FSMContext):
             await add_ad_media(session, advertisement_id=ad.id, media_items=media)
         await session.commit()
 
-    # If it's a broadcast type, send to all users
+    # If it's a broadcast type, send to all users — фоновой задачей
     if ad_type in ("broadcast", "broadcast_pinned"):
-        async with db_helper.session_factory() as session:
-            users = await get_all_users(session)
-        sent = 0
-        failed = 0
-        for user in users:
-            try:
-                pinned_required = ad_type == "broadcast_pinned"
-                if media:
-                    # Создаем медиа группу с поддержкой фото и видео
-                    media_group = []
-                    for file_id, media_type in media[:10]:  # Ограничиваем до 10 файлов
-                        if media_type == "photo":
-                            media_group.append(InputMediaPhoto(media=file_id))
-                        elif media_type == "video":
-                            media_group.append(InputMediaVideo(media=file_id))
-                    
-                    if media_group:
-                        # Добавляем caption к первому элементу
-                        if media_group:
-                            media_group[0].caption = text
-                        
-                        msgs = await callback.bot.send_media_group(chat_id=user.telegram_id, media=media_group)
-                        if pinned_required and msgs:
-                            try:
-                                await callback.bot.pin_chat_message(chat_id=user.telegram_id, message_id=msgs[0].message_id)
-                            except Exception:
-                                pass
-                else:
-                    msg = await callback.bot.send_message(chat_id=user.telegram_id, text=text)
-                    if pinned_required:
-                        try:
-                            await callback.bot.pin_chat_message(chat_id=user.telegram_id, message_id=msg.message_id)
-                        except Exception:
-                            pass
-                sent += 1
-            except Exception:
-                failed += 1
-
-        await callback.message.answer(
-            f"📬 Рассылка завершена. Успешно: {sent}, ошибок: {failed}."
+        await enqueue_job(
+            "broadcast_ad",
+            text=text,
+            media=media,
+            pinned=ad_type == "broadcast_pinned",
+            report_chat_id=callback.message.chat.id,
         )
 
     await callback.message.edit_reply_markup()
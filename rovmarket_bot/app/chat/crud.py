@@ -1,24 +1,20 @@
-from sqlalchemy import and_
+from sqlalchemy import and_, func, insert
 from sqlalchemy.orm import selectinload
 
 from rovmarket_bot.core.models import (
     db_helper,
     Chat,
     ChatMessage,
+    ChatAttachment,
     User,
     Product,
-    ChatPhoto,
-    ChatVideo,
-    ChatSticker,
 )
+from rovmarket_bot.core.models.chat_attachment import ATTACHMENT_KINDS
+from rovmarket_bot.core.cache import get_chat_route, set_chat_route, drop_chat_route
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
-from rovmarket_bot.core.models.chat_audio import ChatAudio
-from rovmarket_bot.core.models.chat_document import ChatDocument
-from rovmarket_bot.core.models.chat_voice import ChatVoice
-
 
 async def create_or_get_chat(session, product_id, buyer_id, seller_id):
     # Проверяем, что записи существуют
@@ -54,9 +50,48 @@ async def create_or_get_chat(session, product_id, buyer_id, seller_id):
             await session.rollback()
             print("Ошибка при коммите:", e)
             raise
+
+    if chat.is_active:
+        await set_chat_route(
+            chat.id,
+            {
+                "buyer_id": buyer.id,
+                "seller_id": seller.id,
+                "buyer_tg": buyer.telegram_id,
+                "seller_tg": seller.telegram_id,
+                "product_id": product.id,
+                "product_name": product.name,
+            },
+        )
     return chat
 
 
+async def get_chat_route_cached(session: AsyncSession, chat_id: int) -> dict | None:
+    """
+    Маршрут чата для пересылки сообщений: сначала Redis, при промахе —
+    Chat с участниками и товаром из БД (и прогрев кэша для активного чата).
+    """
+    route = await get_chat_route(chat_id)
+    if route:
+        return route
+
+    chat = await get_chat_by_id(session, chat_id)
+    if not chat:
+        return None
+    route = {
+        "buyer_id": chat.buyer_id,
+        "seller_id": chat.seller_id,
+        "buyer_tg": chat.buyer.telegram_id,
+        "seller_tg": chat.seller.telegram_id,
+        "product_id": chat.product_id,
+        "product_name": await get_product_name(session, chat.product_id),
+        "active": bool(chat.is_active),
+    }
+    if route["active"]:
+        await set_chat_route(chat_id, route)
+    return route
+
+
 async def get_chat_by_id(session: AsyncSession, chat_id: int) -> Optional[Chat]:
     stmt = (
         select(Chat)
@@ -95,6 +130,53 @@ async def add_message(
     return message
 
 
+async def add_messages_batch(
+    session: AsyncSession, chat_id: int, sender_id: int, records: list[dict]
+) -> List[int]:
+    """
+    Сохраняет пачку сообщений чата (например, альбом) вместе с вложениями.
+
+    Один многострочный INSERT в chat_message (id возвращаются в порядке
+    записей), один executemany в chat_attachment и один commit.
+    sender_id берётся из самого чата, поэтому отдельная проверка User не нужна.
+
+    :param records: список dict с ключами text, photos, videos, stickers,
+        audios, voices, documents (списки Telegram file_id)
+    :return: id созданных ChatMessage
+    """
+    if not records:
+        return []
+
+    result = await session.scalars(
+        insert(ChatMessage).returning(ChatMessage.id, sort_by_parameter_order=True),
+        [
+            {"chat_id": chat_id, "sender_id": sender_id, "text": r.get("text") or ""}
+            for r in records
+        ],
+    )
+    message_ids = result.all()
+
+    rows = []
+    for message_id, record in zip(message_ids, records):
+        position = 0
+        for kind in ATTACHMENT_KINDS:
+            for file_id in record.get(kind + "s", []):
+                rows.append(
+                    {
+                        "message_id": message_id,
+                        "kind": kind,
+                        "file_id": file_id,
+                        "position": position,
+                    }
+                )
+                position += 1
+    if rows:
+        await session.execute(insert(ChatAttachment), rows)
+
+    await session.commit()
+    return message_ids
+
+
 async def get_messages(
     session: AsyncSession, chat_id: int, limit: int = 50
 ) -> List[ChatMessage]:
@@ -146,44 +228,49 @@ async def get_product_name(session: AsyncSession, product_id: int) -> str:
     """
     Получает название товара по его ID
     """
-    product = await session.get(Product, product_id)
-    return product.name if product else f"Товар #{product_id}"
+    name = await session.scalar(select(Product.name).where(Product.id == product_id))
+    return name if name is not None else f"Товар #{product_id}"
 
 
-async def add_photo_to_message(
-    session: AsyncSession, message_id: int, file_id: str
-) -> ChatPhoto:
+async def get_product_names(session: AsyncSession, product_ids) -> dict[int, str]:
     """
-    Сохраняет фото для сообщения чата.
-
-    :param session: AsyncSession SQLAlchemy
-    :param message_id: ID сообщения (ChatMessage.id)
-    :param file_id: Telegram file_id фотографии
-    :return: созданный объект ChatPhoto
+    Названия товаров по ID одним запросом: {product_id: name}
     """
-    photo = ChatPhoto(chat_id=message_id, photo_url=file_id)
-    session.add(photo)
-    await session.commit()
-    await session.refresh(photo)
-    return photo
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    result = await session.execute(
+        select(Product.id, Product.name).where(Product.id.in_(ids))
+    )
+    return dict(result.all())
 
 
-async def add_video_to_message(
-    session: AsyncSession, message_id: int, file_id: str
-) -> "ChatVideo":
+async def add_attachment_to_message(
+    session: AsyncSession, message_id: int, kind: str, file_id: str
+) -> ChatAttachment:
     """
-    Сохраняет видео для сообщения чата.
+    Сохраняет вложение сообщения чата.
 
     :param session: AsyncSession SQLAlchemy
     :param message_id: ID сообщения (ChatMessage.id)
-    :param file_id: Telegram file_id видео
-    :return: созданный объект ChatVideo
+    :param kind: вид вложения: photo, video, sticker, audio, voice, document
+    :param file_id: Telegram file_id вложения
+    :return: созданный объект ChatAttachment
     """
-    video = ChatVideo(chat_id=message_id, video_url=file_id)
-    session.add(video)
+    if kind not in ATTACHMENT_KINDS:
+        raise ValueError(f"Unknown attachment kind: {kind}")
+    position = await session.scalar(
+        select(func.count(ChatAttachment.id)).where(
+            ChatAttachment.message_id == message_id
+        )
+    )
+    attachment = ChatAttachment(
+        message_id=message_id, kind=kind, file_id=file_id, position=position
+    )
+    session.add(attachment)
     await session.commit()
-    await session.refresh(video)
-    return video
+    await session.refresh(attachment)
+    return attachment
 
 
 async def get_telegram_id_by_user_id(
@@ -201,78 +288,6 @@ async def get_telegram_id_by_user_id(
     return telegram_id
 
 
-async def add_sticker_to_message(
-    session: AsyncSession, message_id: int, file_id: str
-) -> "ChatSticker":
-    """
-    Сохраняет стикеров для сообщения чата.
-
-    :param session: AsyncSession SQLAlchemy
-    :param message_id: ID сообщения (ChatMessage.id)
-    :param file_id: Telegram file_id стикера
-    :return: созданный объект ChatSticker
-    """
-    sticker = ChatSticker(chat_id=message_id, sticker_url=file_id)
-    session.add(sticker)
-    await session.commit()
-    await session.refresh(sticker)
-    return sticker
-
-
-async def add_audio_to_message(
-    session: AsyncSession, message_id: int, file_id: str
-) -> "ChatAudio":
-    """
-    Сохраняет аудио для сообщения чата.
-
-    :param session: AsyncSession SQLAlchemy
-    :param message_id: ID сообщения (ChatMessage.id)
-    :param file_id: Telegram file_id аудио
-    :return: созданный объект ChatAudio
-    """
-    audio = ChatAudio(chat_id=message_id, audio_url=file_id)
-    session.add(audio)
-    await session.commit()
-    await session.refresh(audio)
-    return audio
-
-
-async def add_voice_to_message(
-    session: AsyncSession, message_id: int, file_id: str
-) -> "ChatVoice":
-    """
-    Сохраняет голосовых для сообщения чата.
-
-    :param session: AsyncSession SQLAlchemy
-    :param message_id: ID сообщения (ChatMessage.id)
-    :param file_id: Telegram file_id голосовых
-    :return: созданный объект ChatVoice
-    """
-    voice = ChatVoice(chat_id=message_id, voice_url=file_id)
-    session.add(voice)
-    await session.commit()
-    await session.refresh(voice)
-    return voice
-
-
-async def add_document_to_message(
-    session: AsyncSession, message_id: int, file_id: str
-) -> "ChatDocument":
-    """
-    Сохраняет документа для сообщения чата.
-
-    :param session: AsyncSession SQLAlchemy
-    :param message_id: ID сообщения (ChatMessage.id)
-    :param file_id: Telegram file_id документа
-    :return: созданный объект ChatDocument
-    """
-    document = ChatDocument(chat_id=message_id, document_url=file_id)
-    session.add(document)
-    await session.commit()
-    await session.refresh(document)
-    return document
-
-
 async def get_last_messages(session: AsyncSession, chat_id: int, limit: int = 15):
     """
     Возвращает последние сообщения чата с фото, видео, стикерами, аудио, голосовыми и документами.
@@ -280,61 +295,22 @@ async def get_last_messages(session: AsyncSession, chat_id: int, limit: int = 15
     result = await session.execute(
         select(ChatMessage)
         .where(ChatMessage.chat_id == chat_id)
-        .order_by(ChatMessage.created_at.desc())
+        # id — на случай одинакового created_at у сообщений одного альбома
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
         .limit(limit)
+        # Вложения — одним запросом по индексу message_id
+        .options(selectinload(ChatMessage.attachments))
     )
-    messages = result.unique().scalars().all()
+    messages = result.scalars().all()
 
     messages_list = []
     for msg in reversed(messages):  # от старых к новым
-        # Фото
-        photos_result = await session.execute(
-            select(ChatPhoto.photo_url).where(ChatPhoto.chat_id == msg.id)
-        )
-        photos = [p[0] for p in photos_result.all()]
-
-        # Видео
-        videos_result = await session.execute(
-            select(ChatVideo.video_url).where(ChatVideo.chat_id == msg.id)
-        )
-        videos = [v[0] for v in videos_result.all()]
-
-        # Стикеры
-        stickers_result = await session.execute(
-            select(ChatSticker.sticker_url).where(ChatSticker.chat_id == msg.id)
-        )
-        stickers = [s[0] for s in stickers_result.all()]
-
-        # Аудио
-        audios_result = await session.execute(
-            select(ChatAudio.audio_url).where(ChatAudio.chat_id == msg.id)
-        )
-        audios = [a[0] for a in audios_result.all()]
-
-        # Голосовые
-        voices_result = await session.execute(
-            select(ChatVoice.voice_url).where(ChatVoice.chat_id == msg.id)
-        )
-        voices = [v[0] for v in voices_result.all()]
-
-        # Документы
-        documents_result = await session.execute(
-            select(ChatDocument.document_url).where(ChatDocument.chat_id == msg.id)
-        )
-        documents = [d[0] for d in documents_result.all()]
-
-        messages_list.append(
-            {
-                "text": msg.text,
-                "sender_id": msg.sender_id,
-                "photos": photos,
-                "videos": videos,
-                "stickers": stickers,
-                "audios": audios,
-                "voices": voices,
-                "documents": documents,
-            }
-        )
+        item = {"text": msg.text, "sender_id": msg.sender_id}
+        for kind in ATTACHMENT_KINDS:
+            item[kind + "s"] = []
+        for attachment in msg.attachments:
+            item[attachment.kind + "s"].append(attachment.file_id)
+        messages_list.append(item)
 
     return messages_list
 
@@ -355,4 +331,5 @@ async def mark_chat_as_inactive(
     session.add(chat)
     await session.commit()
     await session.refresh(chat)
+    await drop_chat_route(chat_id)
     return chat
@@ -1,12 +1,14 @@
-import time
+import asyncio
 
 from aiogram import Router, F
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.filters import Command
+from aiogram.enums import ContentType
 from aiogram.types import (
     Message,
+    MessageEntity,
     CallbackQuery,
     InlineKeyboardMarkup,
     InlineKeyboardButton,
@@ -18,23 +20,21 @@ from sqlalchemy.orm import selectinload
 
 from rovmarket_bot.app.chat.keyboard import menu_chat
 from rovmarket_bot.app.start.keyboard import menu_start, menu_start_inline
+from rovmarket_bot.core.config import settings
 from rovmarket_bot.core.logger import get_component_logger
 from rovmarket_bot.app.chat.crud import (
     create_or_get_chat,
-    add_message,
+    add_messages_batch,
     get_chat_by_id,
     get_user_chats,
-    add_video_to_message,
-    add_audio_to_message,
-    add_voice_to_message,
-    add_document_to_message,
-    add_photo_to_message,
     get_last_messages,
-    add_sticker_to_message,
     mark_chat_as_inactive,
     get_product_name,
+    get_product_names,
     get_telegram_id_by_user_id,
+    get_chat_route_cached,
 )
+from rovmarket_bot.core.cache import check_chat_throttle
 from rovmarket_bot.core.models import db_helper, Product, User
 
 router = Router()
@@ -45,6 +45,219 @@ class ChatState(StatesGroup):
     chatting = State()  # пользователь находится в чате
 
 
+# Ссылки на фоновые задачи сохранения, чтобы их не собрал GC до завершения
+_persist_tasks: set[asyncio.Task] = set()
+
+
+def message_record(msg: Message) -> dict:
+    """Снимок сообщения для сохранения: текст и file_id вложений."""
+    return {
+        "text": msg.text or "",
+        "photos": [msg.photo[-1].file_id] if msg.photo else [],
+        "videos": [msg.video.file_id] if msg.video else [],
+        "stickers": [msg.sticker.file_id] if msg.sticker else [],
+        "audios": [msg.audio.file_id] if msg.audio else [],
+        "voices": [msg.voice.file_id] if msg.voice else [],
+        "documents": [msg.document.file_id] if msg.document else [],
+    }
+
+
+async def persist_chat_messages(chat_id: int, sender_id: int, records: list[dict]):
+    # Задача живёт дольше апдейта — сессия апдейта ей не подходит
+    async with db_helper.new_session() as session:
+        await add_messages_batch(session, chat_id, sender_id, records)
+
+
+def persist_in_background(chat_id: int, sender_id: int, records: list[dict]):
+    """Сохранить сообщения после пересылки, не задерживая ответ пользователю."""
+    task = asyncio.create_task(persist_chat_messages(chat_id, sender_id, records))
+    _persist_tasks.add(task)
+
+    def _done(t: asyncio.Task):
+        _persist_tasks.discard(t)
+        if not t.cancelled() and t.exception():
+            logger.error(
+                "Не удалось сохранить сообщения чата %s: %s", chat_id, t.exception()
+            )
+
+    task.add_done_callback(_done)
+
+
+# Типы сообщений, которым copy_message может заменить подпись
+_CAPTIONED = {
+    ContentType.PHOTO,
+    ContentType.VIDEO,
+    ContentType.ANIMATION,
+    ContentType.AUDIO,
+    ContentType.VOICE,
+    ContentType.DOCUMENT,
+}
+TEXT_LIMIT = 4096
+CAPTION_LIMIT = 1024
+
+
+def _utf16_len(text: str) -> int:
+    # Смещения сущностей Telegram считает в UTF-16
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _prepend_header(
+    header: str, text: str | None, entities: list[MessageEntity] | None
+) -> tuple[str, list[MessageEntity] | None]:
+    """Заголовок перед текстом/подписью; форматирование автора сдвигается."""
+    if not text:
+        return header, None
+    prefix = f"{header}:\n\n"
+    shift = _utf16_len(prefix)
+    shifted = [
+        entity.model_copy(update={"offset": entity.offset + shift})
+        for entity in entities or []
+    ]
+    return prefix + text, shifted or None
+
+
+async def relay_by_copy(bot, recipient_id: int, header: str, messages: list[Message]):
+    """Переслать сообщение/альбом копией, по возможности одним запросом.
+
+    Копия не показывает автора, поэтому анонимность сохраняется, а медиа
+    не нужно собирать заново из file_id. Заголовок идёт в текст (текстовое
+    сообщение — один send_message) или в подпись копии (фото, видео, файл,
+    голосовое — один copy_message). Отдельным сообщением он уходит только
+    перед copy_messages альбома, для стикеров и прочего без подписи, и если
+    вместе с ним не помещается в лимит. Если скопировать не удалось,
+    сообщения досылаются по file_id без повтора заголовка.
+    """
+    messages = sorted(messages, key=lambda msg: msg.message_id)
+    from_chat_id = messages[0].chat.id
+
+    if len(messages) == 1:
+        msg = messages[0]
+        if msg.content_type == ContentType.TEXT:
+            text, entities = _prepend_header(header, msg.text, msg.entities)
+            if len(text) <= TEXT_LIMIT:
+                await bot.send_message(
+                    recipient_id, text, entities=entities, parse_mode=None
+                )
+                return
+        elif msg.content_type in _CAPTIONED:
+            caption, entities = _prepend_header(
+                header, msg.caption, msg.caption_entities
+            )
+            if len(caption) <= CAPTION_LIMIT:
+                try:
+                    await bot.copy_message(
+                        recipient_id,
+                        from_chat_id,
+                        msg.message_id,
+                        caption=caption,
+                        caption_entities=entities,
+                        parse_mode=None,
+                    )
+                except TelegramBadRequest as e:
+                    logger.warning(
+                        "copy_message %s не удалось, пересылка по file_id: %s",
+                        msg.message_id,
+                        e,
+                    )
+                    await relay_by_file_id(
+                        bot, recipient_id, header, [message_record(msg)], [msg]
+                    )
+                return
+
+    await bot.send_message(recipient_id, header)
+    if len(messages) > 1:
+        try:
+            await bot.copy_messages(
+                recipient_id, from_chat_id, [msg.message_id for msg in messages]
+            )
+            return
+        except TelegramBadRequest as e:
+            logger.warning("copy_messages не удалось, пересылка по одному: %s", e)
+
+    for msg in messages:
+        try:
+            await bot.copy_message(recipient_id, from_chat_id, msg.message_id)
+        except TelegramBadRequest as e:
+            logger.warning(
+                "copy_message %s не удалось, пересылка по file_id: %s",
+                msg.message_id,
+                e,
+            )
+            await relay_by_file_id(
+                bot, recipient_id, None, [message_record(msg)], [msg]
+            )
+
+
+def _caption(header: str | None, label: str) -> str | None:
+    return f"{header} ({label})" if header else None
+
+
+async def relay_by_file_id(
+    bot,
+    recipient_id: int,
+    header: str | None,
+    records: list[dict],
+    messages: list[Message],
+):
+    """Переслать сообщение заново по file_id с подписями-заголовками.
+
+    header=None — заголовок уже отправлен (досылка после relay_by_copy).
+    """
+    photos = [f for r in records for f in r["photos"]]
+    videos = [f for r in records for f in r["videos"]]
+    stickers = [f for r in records for f in r["stickers"]]
+    audios = [f for r in records for f in r["audios"]]
+    voices = [f for r in records for f in r["voices"]]
+    documents = [f for r in records for f in r["documents"]]
+    full_text = None
+    for msg in messages:
+        if msg.text:
+            full_text = msg.text
+
+    media_group = []
+
+    if full_text and header:
+        full_text = f"{header}:\n\n{full_text}"
+
+    if photos:
+        media_group.append(
+            InputMediaPhoto(media=photos[0], caption=_caption(header, "фото"))
+        )
+        media_group += [InputMediaPhoto(media=p) for p in photos[1:]]
+    if videos:
+        media_group.append(
+            InputMediaVideo(media=videos[0], caption=_caption(header, "видео"))
+        )
+        media_group += [InputMediaVideo(media=v) for v in videos[1:]]
+
+    if stickers:
+        if header:
+            await bot.send_message(recipient_id, f"{header} (стикеры)")
+        for st in stickers:
+            await bot.send_sticker(recipient_id, st)
+
+    for au in audios:
+        await bot.send_audio(recipient_id, au, caption=_caption(header, "аудио"))
+
+    for vc in voices:
+        await bot.send_voice(recipient_id, vc, caption=_caption(header, "голосовое"))
+
+    for doc in documents:
+        await bot.send_document(recipient_id, doc, caption=_caption(header, "файлы"))
+
+    if len(media_group) == 1:
+        # media group из одного элемента Telegram не принимает
+        item = media_group[0]
+        if isinstance(item, InputMediaPhoto):
+            await bot.send_photo(recipient_id, item.media, caption=item.caption)
+        else:
+            await bot.send_video(recipient_id, item.media, caption=item.caption)
+    elif media_group:
+        await bot.send_media_group(recipient_id, media_group)
+    elif full_text:
+        await bot.send_message(recipient_id, full_text)
+
+
 # Ожидается, что chat_id будет в state, когда пользователь пишет в анонимный чат
 
 
@@ -78,128 +291,44 @@ async def chat(
         )
         return
 
-    last_sent = data.get("last_message_time")
-    now = time.time()
-    if last_sent and now - last_sent < 3:
+    if not await check_chat_throttle(chat_id, message.from_user.id):
         await message.answer(
             "❌ Подождите немного перед отправкой следующего сообщения."
         )
         return
-    await state.update_data(last_message_time=now)
 
     messages = album_messages if album_messages else [message]
 
+    # Сессия соединится с БД только при промахе кэша маршрута или закрытии чата
     async with db_helper.session_factory() as session:
-        chat = await get_chat_by_id(session, chat_id)
-        if not chat or not chat.is_active:
+        route = await get_chat_route_cached(session, chat_id)
+        if not route or not route["active"]:
             await message.answer("❌ Чат неактивен или не найден.")
             return
 
         # Определяем, кто отправитель
-        if message.from_user.id == chat.buyer.telegram_id:
+        if message.from_user.id == route["buyer_tg"]:
             sender_type = "покупателя"
-            recipient_user = chat.seller
-            sender_id = chat.buyer_id
+            recipient_id = route["seller_tg"]
+            sender_id = route["buyer_id"]
         else:
             sender_type = "продавца"
-            recipient_user = chat.buyer
-            sender_id = chat.seller_id
+            recipient_id = route["buyer_tg"]
+            sender_id = route["seller_id"]
 
-        recipient_id = recipient_user.telegram_id
-
-        photos, videos, stickers, audios, voices, documents = [], [], [], [], [], []
-        full_text = None
-
-        for msg in messages:
-            chat_message = await add_message(
-                session, chat_id, sender_id, msg.text or ""
-            )
-            if msg.sticker:
-                stickers.append(msg.sticker.file_id)
-                await add_sticker_to_message(
-                    session, chat_message.id, msg.sticker.file_id
-                )
-            if msg.audio:
-                audios.append(msg.audio.file_id)
-                await add_audio_to_message(session, chat_message.id, msg.audio.file_id)
-            if msg.voice:
-                voices.append(msg.voice.file_id)
-                await add_voice_to_message(session, chat_message.id, msg.voice.file_id)
-            if msg.document:
-                documents.append(msg.document.file_id)
-                await add_document_to_message(
-                    session, chat_message.id, msg.document.file_id
-                )
-            if msg.photo:
-                largest_photo = msg.photo[-1]
-                photos.append(largest_photo.file_id)
-                await add_photo_to_message(
-                    session, chat_message.id, largest_photo.file_id
-                )
-            if msg.video:
-                videos.append(msg.video.file_id)
-                await add_video_to_message(session, chat_message.id, msg.video.file_id)
-            if msg.text:
-                full_text = msg.text
+        # Собираем всё в памяти: в БД пишем одним батчем уже после пересылки
+        records = [message_record(msg) for msg in messages]
 
         try:
-            product_name = await get_product_name(session, int(chat.product_id))
-            media_group = []
-
-            if full_text:
-                full_text = f"💬 Новое сообщение от {sender_type} по объявлению {product_name}({chat.buyer_id}):\n\n{full_text}"
+            header = f"💬 Новое сообщение от {sender_type} по объявлению {route['product_name']}({route['buyer_id']})"
 
-            if photos:
-                media_group.append(
-                    InputMediaPhoto(
-                        media=photos[0],
-                        caption=f"💬 Новое сообщение от {sender_type} по объявлению {product_name}({chat.buyer_id}) (фото)",
-                    )
-                )
-                media_group += [InputMediaPhoto(media=p) for p in photos[1:]]
-            if videos:
-                media_group.append(
-                    InputMediaVideo(
-                        media=videos[0],
-                        caption=f"💬 Новое сообщение от {sender_type} по объявлению {product_name}({chat.buyer_id}) (видео)",
-                    )
-                )
-                media_group += [InputMediaVideo(media=v) for v in videos[1:]]
-
-            if stickers:
-                await message.bot.send_message(
-                    int(recipient_id),
-                    f"💬 Новое сообщение от {sender_type} по объявлению {product_name}({chat.buyer_id}) (стикеры)",
-                )
-                for st in stickers:
-                    await message.bot.send_sticker(int(recipient_id), st)
-
-            for au in audios:
-                await message.bot.send_audio(
-                    int(recipient_id),
-                    au,
-                    caption=f"💬 Новое сообщение от {sender_type} по объявлению {product_name}({chat.buyer_id}) (аудио)",
+            if settings.CHAT_RELAY_MODE == "copy":
+                await relay_by_copy(message.bot, int(recipient_id), header, messages)
+            else:
+                await relay_by_file_id(
+                    message.bot, int(recipient_id), header, records, messages
                 )
 
-            for vc in voices:
-                await message.bot.send_voice(
-                    int(recipient_id),
-                    vc,
-                    caption=f"💬 Новое сообщение от {sender_type} по объявлению {product_name}({chat.buyer_id}) (голосовое)",
-                )
-
-            for doc in documents:
-                await message.bot.send_document(
-                    int(recipient_id),
-                    doc,
-                    caption=f"💬 Новое сообщение от {sender_type} по объявлению {product_name}({chat.buyer_id}) (файлы)",
-                )
-
-            if media_group:
-                await message.bot.send_media_group(int(recipient_id), media_group)
-            elif full_text:
-                await message.bot.send_message(int(recipient_id), full_text)
-
         except TelegramForbiddenError:
             logger.warning(
                 f"Пользователь {sender_id} заблокировал бота или удалил аккаунт."
@@ -215,6 +344,8 @@ async def chat(
                 f"Не удалось отправить сообщение пользователю {sender_id}: {e}"
             )
 
+        persist_in_background(chat_id, sender_id, records)
+
         await message.answer(
             "✅ Сообщение отправлено анонимно.", reply_markup=menu_chat
         )
@@ -310,10 +441,14 @@ async def my_chats(message: Message):
             return
 
         # формируем список кнопок с порядковым номером
+        product_names = await get_product_names(
+            session, [chat.product_id for chat in chats]
+        )
         buttons = []
         for index, chat in enumerate(chats, start=1):
-            product = await session.get(Product, chat.product_id)
-            product_name = product.name if product else f"Товар #{chat.product_id}"
+            product_name = product_names.get(
+                chat.product_id, f"Товар #{chat.product_id}"
+            )
 
             # Добавляем buyer_id в скобках
             button_text = f"{index}. {product_name} ({chat.buyer_id})"
@@ -1,8 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from redis.asyncio import Redis
-from rovmarket_bot.core.models import Product, ProductPhoto, ProductVideo, User, Categories
+from rovmarket_bot.core.models import (
+    Product,
+    ProductPhoto,
+    ProductVideo,
+    User,
+    Categories,
+)
 from rovmarket_bot.core.cache import invalidate_all_ads_cache
+from rovmarket_bot.core.stats import bump_daily_stats, bump_poster_stats
 from rovmarket_bot.app.settings.crud import get_or_create_bot_settings
 from rovmarket_bot.core.logger import get_component_logger
 
@@ -34,6 +41,7 @@ async def create_product(
     if not user:
         user = User(telegram_id=telegram_id, username=username)
         session.add(user)
+        await bump_daily_stats(session, new_users=1)
         await session.commit()
         await session.refresh(user)
 
@@ -82,6 +90,7 @@ async def create_product(
         publication=publication_value,
     )
     session.add(product)
+    await bump_poster_stats(session, user.id)
     await session.commit()
     await session.refresh(product)
     await index_product_to_redis(product)
@@ -25,6 +25,7 @@ from rovmarket_bot.core.censorship.bad_words.ru import text as bad_words_ru
 from rovmarket_bot.app.admin.crud import get_admin_users
 from rovmarket_bot.app.settings.crud import get_or_create_bot_settings
 from rovmarket_bot.core.logger import get_component_logger
+from rovmarket_bot.core.jobs import enqueue_job
 
 router = Router()
 logger = get_component_logger("post")
@@ -242,9 +243,9 @@ async def process_description(message: Message, state: FSMContext):
         "⭐ Первое присланное медиа будет главным и показываться первым в объявлении.\n\n"
         "⚠️ *Важно:* запрещён любой контент 18+, насилие, агрессия, оскорбления и другие неприемлемые материалы — такие фото будут удаляться, а аккаунт может быть заблокирован.\n\n"
         "📍 Пожалуйста, отправляйте только качественные и релевантные вашему объявлению материалы.\n\n"
-        "✅ Когда закончите, нажмите кнопку «Подтвердить»",      reply_markup=InlineKeyboardMarkup(
+        "✅ Когда закончите, нажмите кнопку «Подтвердить»",
+        reply_markup=InlineKeyboardMarkup(
             inline_keyboard=[
-    
                 [
                     InlineKeyboardButton(
                         text="Без фото/видео", callback_data="photos_skip"
@@ -298,7 +299,10 @@ async def process_photo(
 
     await state.update_data(photos=photos, videos=videos)
     logger.info(
-        "Media added for user_id=%s photos=%s videos=%s", message.from_user.id, len(photos), len(videos)
+        "Media added for user_id=%s photos=%s videos=%s",
+        message.from_user.id,
+        len(photos),
+        len(videos),
     )
 
     await message.answer(
@@ -314,7 +318,7 @@ async def process_photo(
                     InlineKeyboardButton(
                         text="Без фото/видео", callback_data="photos_skip"
                     )
-                ]
+                ],
             ]
         ),
     )
@@ -344,6 +348,7 @@ async def process_video(
     # Делегируем в общий обработчик, который учитывает и фото, и видео
     await process_photo(message, state, album_messages)
 
+
 @router.message(
     Post.photo,
     ~F.text.startswith("/"),
@@ -373,7 +378,7 @@ async def photo_other_messages(message: Message):
                     InlineKeyboardButton(
                         text="Без фото/видео", callback_data="photos_skip"
                     )
-                ]
+                ],
             ]
         ),
     )
@@ -385,7 +390,10 @@ async def photos_done_callback(callback: CallbackQuery, state: FSMContext):
     photos = data.get("photos", [])
     videos = data.get("videos", [])
     if not photos and not videos:
-        await callback.answer("Вы не добавили медиа. Либо добавьте, либо нажмите «Без фото/видео».", show_alert=True)
+        await callback.answer(
+            "Вы не добавили медиа. Либо добавьте, либо нажмите «Без фото/видео».",
+            show_alert=True,
+        )
         return
     await callback.message.edit_reply_markup()
     await callback.message.answer(
@@ -666,6 +674,9 @@ async def finalize_post(message: Message, state: FSMContext):
             )
             # Проверяем режим модерации — уведомляем админов только если модерация включена
             settings_row = await get_or_create_bot_settings(session)
+            if product.publication is True:
+                # Без модерации объявление сразу видно — сообщаем подписчикам
+                await enqueue_job("notify_product", product_id=product.id)
             if bool(settings_row.moderation):
                 admins = await get_admin_users(session)
                 notify_text = (
@@ -12,7 +12,12 @@ from rovmarket_bot.core.models import (
 )
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from rovmarket_bot.core.cache import get_categories_page_cached, get_all_ads_cached
+from rovmarket_bot.core.cache import (
+    get_categories_page_cached,
+    get_all_ads_cached,
+    drop_cached_gallery,
+)
+from rovmarket_bot.core.stats import bump_daily_stats
 
 
 async def get_photos_for_products(
@@ -81,7 +86,9 @@ async def get_product_by_id(product_id: int, session: AsyncSession) -> dict | No
     photos = [row[0] for row in result.all()]
 
     # Видео
-    stmt = select(ProductVideo.video_file_id).where(ProductVideo.product_id == product_id)
+    stmt = select(ProductVideo.video_file_id).where(
+        ProductVideo.product_id == product_id
+    )
     result = await session.execute(stmt)
     videos = [row[0] for row in result.all()]
 
@@ -225,14 +232,14 @@ async def get_user_id_by_telegram_id(
 
 
 async def add_product_view(product_id: int, user_id: int, session: AsyncSession):
-    stmt = select(Product).where(Product.id == product_id)
-    result = await session.execute(stmt)
-    product = result.scalars().unique().one_or_none()
+    owner_id = await session.scalar(
+        select(Product.user_id).where(Product.id == product_id)
+    )
 
-    if not product:
+    if owner_id is None:
         return  # товара нет
 
-    if product.user_id == user_id:
+    if owner_id == user_id:
         return  # владелец товара — не добавляем просмотр
 
     # Проверка: уже есть просмотр?
@@ -249,12 +256,13 @@ async def add_product_view(product_id: int, user_id: int, session: AsyncSession)
     # Создаем просмотр
     view = ProductView(product_id=product_id, user_id=user_id)
     session.add(view)
+    await bump_daily_stats(session, views=1)
     await session.commit()
+    # Счётчик просмотров есть только в галерее владельца
+    await drop_cached_gallery(product_id, "owner")
 
 
-async def create_complaint(
-    *, user_id: int, text: str, session: AsyncSession
-) -> int:
+async def create_complaint(*, user_id: int, text: str, session: AsyncSession) -> int:
     """Создать жалобу от пользователя. Возвращает ID жалобы."""
     complaint = Complaint(title=text, user_id=user_id)
     session.add(complaint)
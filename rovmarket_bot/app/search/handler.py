@@ -20,10 +20,33 @@ from .keyboard import (
 )
 from .redis_search import search_in_redis
 from rovmarket_bot.core.models import db_helper
-import datetime
-from aiogram.types import InputMediaPhoto, InlineKeyboardMarkup, InlineKeyboardButton
-from rovmarket_bot.core.cache import check_rate_limit
+from aiogram.types import (
+    InputMediaPhoto,
+    InputMediaVideo,
+    InlineKeyboardMarkup,
+    InlineKeyboardButton,
+)
+from rovmarket_bot.core.cache import (
+    check_rate_limit,
+    get_cached_gallery,
+    set_cached_gallery,
+)
 from rovmarket_bot.core.logger import get_component_logger
+from rovmarket_bot.core.cards import (
+    HTML,
+    to_card_record,
+    render_short_card,
+    render_full_card,
+)
+from rovmarket_bot.core.delivery import (
+    PageItem,
+    Slide,
+    carousel_enabled,
+    deliver_page,
+    replace_with_text,
+    show_slide,
+    slide_ref,
+)
 from ..start.handler import cmd_start
 from ..start.keyboard import menu_start, menu_ad_inline_write
 from rovmarket_bot.app.advertisement.crud import get_next_listings_ad
@@ -41,17 +64,6 @@ class Search(StatesGroup):
     complaint = State()
 
 
-def format_price(price):
-    try:
-        # Попытка преобразовать в число
-        price_int = int(price)
-        # Форматируем с пробелами для тысяч и добавляем ₽
-        return f"{price_int:,}".replace(",", " ") + " ₽"
-    except (ValueError, TypeError):
-        # Если цена не число, возвращаем её как есть
-        return price
-
-
 @router.message(Command("search"))
 async def cmd_search(message: Message, state: FSMContext):
     logger.info("/search requested by user_id=%s", message.from_user.id)
@@ -254,112 +266,176 @@ async def paginate_ads(message: Message, state: FSMContext):
     logger.info("Ads pagination user_id=%s page=%s", message.from_user.id, page)
 
 
-async def show_ads_page(message: Message, state: FSMContext, page: int):
+def build_card_item(pid, text: str, photos: list) -> PageItem:
+    """Карточка ленты с кнопками «Подробнее» и «Пожаловаться»."""
+    details_markup = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="Подробнее", callback_data=f"details:{pid}"),
+                InlineKeyboardButton(
+                    text="Пожаловаться", callback_data=f"complaint:{pid}"
+                ),
+            ]
+        ]
+    )
+    return PageItem(
+        text=text,
+        photo=photos[0] if photos else None,
+        reply_markup=details_markup,
+        product_id=int(pid),
+    )
+
+
+def build_listings_ad_item(ad) -> PageItem:
+    """Рекламная вставка в ленту: media group с подписью или просто текст."""
+    media_group = None
+    if getattr(ad, "media", None):
+        media_group = []
+        for i, m in enumerate(ad.media[:10]):
+            if m.media_type == "photo":
+                item = InputMediaPhoto(media=m.file_id)
+            else:
+                item = InputMediaVideo(media=m.file_id)
+            if i == 0:
+                item.caption = ad.text
+            media_group.append(item)
+    return PageItem(text=ad.text, media=media_group)
+
+
+def build_card_slide(pid, text: str, photos: list, nav_rows: list) -> Slide:
+    """Кадр карусели: карточка, кнопки объявления и навигация под ними."""
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(text="Подробнее", callback_data=f"details:{pid}"),
+                InlineKeyboardButton(
+                    text="Пожаловаться", callback_data=f"complaint:{pid}"
+                ),
+            ],
+            *nav_rows,
+        ]
+    )
+    return Slide(text=text, media=photos[0] if photos else None, reply_markup=keyboard)
+
+
+async def show_ads_slide(message: Message, state: FSMContext, index: int):
+    """«Показать все» в режиме карусели: одно объявление в одном сообщении."""
+    async with db_helper.session_factory(readonly=True) as ro_session:
+        cached_data = await get_all_ads_data(ro_session)
+
     async with db_helper.session_factory() as session:
-        cached_data = await get_all_ads_data(session)
+        product_ids = cached_data["product_ids"] if cached_data else []
+        if not product_ids:
+            await message.answer("Нет доступных объявлений")
+            return
 
-        if cached_data:
-            product_ids = cached_data["product_ids"]
-            products = cached_data["products"]
-            photos_map = cached_data["photos"]
+        total = len(product_ids)
+        index = max(0, min(index, total - 1))
+        pid = product_ids[index]
+        product_data = cached_data["products"].get(str(pid), {})
+        text = render_short_card(to_card_record(product_data, int(pid)))
+
+        # Реклама в карусели — в подписи каждого третьего объявления
+        if (index + 1) % 3 == 0:
+            ad = await get_next_listings_ad(session)
+            if ad and ad.text:
+                text += f"\n\n📢 {ad.text}"
+        await session.commit()
+
+    nav_rows = [
+        [
+            InlineKeyboardButton(
+                text="⬅️", callback_data=f"page_inline_button:{index-1}"
+            ),
+            InlineKeyboardButton(
+                text=f"{index+1}/{total}", callback_data="current_page"
+            ),
+            InlineKeyboardButton(
+                text="➡️", callback_data=f"page_inline_button:{index+1}"
+            ),
+        ]
+    ]
+    slide = build_card_slide(pid, text, cached_data["photos"].get(pid, []), nav_rows)
+
+    data = await state.get_data()
+    current = data.get("ads_carousel")
+    ref = await show_slide(message.bot, message.chat.id, slide, current)
+    await state.update_data(page=index, ads_carousel=ref)
+    if current is None:
+        await message.answer(
+            "Используйте кнопки для перелистывания страниц ⬅️➡️",
+            reply_markup=pagination_keyboard,
+        )
+
+
+async def show_ads_page(message: Message, state: FSMContext, page: int):
+    if carousel_enabled():
+        await show_ads_slide(message, state, page)
+        return
 
-            total = len(product_ids)
+    async with db_helper.session_factory(readonly=True) as ro_session:
+        cached_data = await get_all_ads_data(ro_session)
+
+    if not cached_data:
+        await show_ads_page(message, state, 0)
+        logger.info(
+            "Cache miss, fallback to page=0 for user_id=%s", message.from_user.id
+        )
+        return
+
+    product_ids = cached_data["product_ids"]
+    products = cached_data["products"]
+    photos_map = cached_data["photos"]
+
+    total = len(product_ids)
+    start = page * PAGE_SIZE
+    end = start + PAGE_SIZE
+    page_ids = product_ids[start:end]
+
+    if not page_ids:
+        page = max(0, page)
+        while True:
             start = page * PAGE_SIZE
             end = start + PAGE_SIZE
             page_ids = product_ids[start:end]
 
-            if not page_ids:
-                page = max(0, page)
-                while True:
-                    start = page * PAGE_SIZE
-                    end = start + PAGE_SIZE
-                    page_ids = product_ids[start:end]
-
-                    if page_ids:
-                        break  # есть данные — выходим из цикла
-
-                    # корректируем страницу
-                    if page > 0:
-                        page -= 1
-                    else:
-                        await message.answer("Нет доступных объявлений")
-                        return
-
-            for idx, pid in enumerate(page_ids, start=1):
-                product_data = products.get(str(pid), {})
-                name = product_data.get("name", "Без названия")
-                desc = product_data.get("description", "Без описания")
-                if len(desc) > 100:
-                    desc = desc[:100] + "..."
-                price = product_data.get("price")
-                if price:
-                    price = format_price(price)
-                else:
-                    price = "договорная"
-                text = f"📌 {name}\n" f"💬 {desc}\n" f"💰 Цена: {price}"
-                photos = photos_map.get(pid, [])
-
-                details_markup = InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [
-                            InlineKeyboardButton(
-                                text="Подробнее", callback_data=f"details:{pid}"
-                            ),
-                            InlineKeyboardButton(
-                                text="Пожаловаться", callback_data=f"complaint:{pid}"
-                            ),
-                        ]
-                    ]
-                )
-                if photos:
-                    await message.answer_photo(
-                        photos[0], caption=text, reply_markup=details_markup
-                    )
-                else:
-                    await message.answer(text, reply_markup=details_markup)
-
-                # Insert listings advertisement after every 3rd product
-                if idx % 3 == 0:
-                    ad = await get_next_listings_ad(session)
-                    if ad:
-                        ad_text = ad.text
-                        try:
-                            if getattr(ad, "media", None):
-                                from aiogram.types import (
-                                    InputMediaPhoto,
-                                    InputMediaVideo,
-                                )
-
-                                media_group = []
-                                for i, m in enumerate(ad.media[:10]):
-                                    if m.media_type == "photo":
-                                        item = InputMediaPhoto(media=m.file_id)
-                                    else:
-                                        item = InputMediaVideo(media=m.file_id)
-                                    if i == 0:
-                                        item.caption = ad_text
-                                    media_group.append(item)
-                                await message.answer_media_group(media_group)
-                            else:
-                                await message.answer(ad_text)
-                        except Exception:
-                            # Fallback to text if media fails
-                            await message.answer(ad_text)
-
-            await message.answer(
-                f"Страница {page+1} из {((total-1)//PAGE_SIZE)+1}",
-                reply_markup=pagination_keyboard,
-            )
-            await message.answer(
-                "Используйте кнопки для перелистывания страниц ⬅️➡️",
-                reply_markup=get_menu_page(page),
-            )
-            await session.commit()
-        else:
-            await show_ads_page(message, state, 0)
-            logger.info(
-                "Cache miss, fallback to page=0 for user_id=%s", message.from_user.id
-            )
+            if page_ids:
+                break  # есть данные — выходим из цикла
+
+            # корректируем страницу
+            if page > 0:
+                page -= 1
+            else:
+                await message.answer("Нет доступных объявлений")
+                return
+
+    # Указатель ротации рекламы сдвигается UPDATE'ом строки настроек: фиксируем
+    # его до отправки, чтобы не держать блокировку и соединение с primary
+    # на время запросов к Telegram
+    items = []
+    async with db_helper.session_factory() as session:
+        for idx, pid in enumerate(page_ids, start=1):
+            product_data = products.get(str(pid), {})
+            text = render_short_card(to_card_record(product_data, int(pid)))
+            items.append(build_card_item(pid, text, photos_map.get(pid, [])))
+
+            # Insert listings advertisement after every 3rd product
+            if idx % 3 == 0:
+                ad = await get_next_listings_ad(session)
+                if ad:
+                    items.append(build_listings_ad_item(ad))
+        await session.commit()
+
+    await deliver_page(message, items)
+
+    await message.answer(
+        f"Страница {page+1} из {((total-1)//PAGE_SIZE)+1}",
+        reply_markup=pagination_keyboard,
+    )
+    await message.answer(
+        "Используйте кнопки для перелистывания страниц ⬅️➡️",
+        reply_markup=get_menu_page(page),
+    )
 
 
 @router.message(
@@ -380,45 +456,47 @@ async def show_ads_page(message: Message, state: FSMContext, page: int):
 async def search_ads(message: Message, state: FSMContext):
     query = message.text
     logger.info("Search query by user_id=%s: %s", message.from_user.id, query)
-    async with db_helper.session_factory() as session:
+    async with db_helper.session_factory(readonly=True) as session:
         results = await search_in_redis(query, session)
     if not results:
         logger.info("No search results for user_id=%s", message.from_user.id)
         await message.answer("Ничего не найдено 😔")
         return
+    items = []
     for item in results:
-        name = item.get("name", "Без названия")
-        desc = item.get("description", "Без описания")
-        # Обрезаем описание до 100 символов
-        if len(desc) > 100:
-            desc = desc[:100] + "..."
-        product_id = item.get("id")
-        price = item.get("price")
-        if price:
-            price = format_price(price)
-        else:
-            price = "договорная"
-        text = f"📌 {name}\n" f"💬 {desc}\n" f"💰 {price}"
-        photos = item.get("photos", [])
+        # id документа RediSearch имеет вид "product:<id>"
+        product_id = int(str(item.get("id")).split(":")[-1])
+        text = render_short_card(to_card_record(item, product_id))
+        items.append(build_card_item(product_id, text, item.get("photos", [])))
+    await deliver_page(message, items)
+
+
+def build_public_gallery(product: dict) -> dict:
+    """Собрать подпись и список медиа объявления для кэша галереи"""
+    photos = product.get("photos", [])
+    videos = product.get("videos", [])
+    media = [["photo", fid] for fid in photos] + [["video", fid] for fid in videos]
+
+    return {
+        "caption": render_full_card(to_card_record(product), HTML),
+        "media": media,
+        "via_bot": product.get("contact") == "via_bot",
+    }
 
-        details_markup = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text="Подробнее", callback_data=f"details:{product_id}"
-                    ),
-                    InlineKeyboardButton(
-                        text="Пожаловаться", callback_data=f"complaint:{product_id}"
-                    ),
-                ]
-            ]
-        )
-        if photos:
-            await message.answer_photo(
-                photos[0], caption=text, reply_markup=details_markup
-            )
-        else:
-            await message.answer(text, reply_markup=details_markup)
+
+async def get_public_gallery(product_id: int, session) -> dict | None:
+    """Галерея опубликованного объявления: из кэша или из БД с прогревом кэша"""
+    gallery, version = await get_cached_gallery(product_id, "public")
+    if gallery is not None:
+        return gallery
+
+    product = await get_product_by_id(product_id, session)
+    if not product:
+        return None
+
+    gallery = build_public_gallery(product)
+    await set_cached_gallery(product_id, "public", gallery, version)
+    return gallery
 
 
 @router.callback_query(F.data.startswith("details:"))
@@ -432,9 +510,9 @@ async def show_details(callback: CallbackQuery):
         return
 
     async with db_helper.session_factory() as session:
-        product = await get_product_by_id(product_id, session)
+        gallery = await get_public_gallery(product_id, session)
 
-        if not product:
+        if not gallery:
             logger.info("Details: product not found product_id=%s", product_id)
             await callback.answer("Данные не найдены", show_alert=True)
             return
@@ -448,56 +526,7 @@ async def show_details(callback: CallbackQuery):
                 user_id,
             )
 
-    name = product.get("name", "Без названия")
-    desc = product.get("description", "Без описания")
-
-    price = product.get("price")
-    if price:
-        price = format_price(price)
-    else:
-        price = "договорная"
-    contact = product.get("contact", "-")
-
-    geo = product.get("geo")
-    geo_str = "-"
-    geo_link = None
-    if geo and isinstance(geo, dict):
-        lat = geo.get("latitude")
-        lon = geo.get("longitude")
-        if lat is not None and lon is not None:
-            geo_str = f"{lat}, {lon}"
-            geo_link = f"https://maps.google.com/?q={lat},{lon}"
-
-    created_at = product.get("created_at")
-    created_str = "-"
-    if created_at:
-        if isinstance(created_at, str):
-            try:
-                created_at = datetime.datetime.fromisoformat(created_at)
-            except Exception:
-                created_at = None
-        if isinstance(created_at, datetime.datetime):
-            created_str = created_at.strftime("%d.%m.%Y")
-
-    # Формируем текст с HTML-разметкой для кликабельной ссылки на геолокацию
-    if geo_link:
-        geo_text = f"<a href='{geo_link}'>Нажми, чтобы открыть карту</a>"
-    else:
-        geo_text = "-"
-
-    contact_text = "Связь через бота" if contact == "via_bot" else contact
-
-    full_text = (
-        f"📌 {name}\n"
-        f"💬 {desc}\n"
-        f"💰 Цена: {price}\n"
-        f"\n📞 Контакт: {contact_text}\n"
-        f"📍 Геолокация: {geo_text}\n"
-        f"🕒 Дата создания: {created_str}"
-    )
-
-    photos = product.get("photos", [])
-    videos = product.get("videos", [])
+    full_text = gallery["caption"]
 
     await callback.answer()
 
@@ -516,7 +545,7 @@ async def show_details(callback: CallbackQuery):
     ]
     # Если контакт анонимный — добавить кнопку чата
 
-    if contact == "via_bot":
+    if gallery.get("via_bot"):
         details_buttons.append(
             [
                 InlineKeyboardButton(
@@ -553,64 +582,17 @@ async def show_details(callback: CallbackQuery):
 @router.callback_query(F.data.startswith("show_photos:"))
 async def show_photos(callback: CallbackQuery):
     product_id = int(callback.data.split(":", 1)[1])
+    # Сессия не берёт соединение из пула, пока галерея отдаётся из кэша
     async with db_helper.session_factory() as session:
-        product = await get_product_by_id(product_id, session)
+        gallery = await get_public_gallery(product_id, session)
 
-    if not product:
+    if not gallery:
         logger.info("Show photos: product not found product_id=%s", product_id)
         await callback.answer("Данные не найдены", show_alert=True)
         return
 
-    name = product.get("name", "Без названия")
-    desc = product.get("description", "Без описания")
-    price = product.get("price")
-    if price:
-        price = format_price(price)
-    else:
-        price = "договорная"
-    contact = product.get("contact", "-")
-
-    geo = product.get("geo")
-    geo_link = None
-    geo_str = "-"
-    if geo and isinstance(geo, dict):
-        lat = geo.get("latitude")
-        lon = geo.get("longitude")
-        if lat is not None and lon is not None:
-            geo_str = f"{lat}, {lon}"
-            geo_link = f"https://maps.google.com/?q={lat},{lon}"
-
-    created_at = product.get("created_at")
-    created_str = "-"
-    if created_at:
-        if isinstance(created_at, str):
-            try:
-                created_at = datetime.datetime.fromisoformat(created_at)
-            except Exception:
-                created_at = None
-        if isinstance(created_at, datetime.datetime):
-            created_str = created_at.strftime("%d.%m.%Y")
-
-    if geo_link:
-        geo_text = f"<a href='{geo_link}'>Нажми, чтобы открыть карту</a>"
-    else:
-        geo_text = "-"
-
-    contact_text = "Связь через бота" if contact == "via_bot" else contact
-
-    full_text = (
-        f"📌 {name}\n"
-        f"💬 {desc}\n"
-        f"💰 Цена: {price}\n"
-        f"\n📞 Контакт: {contact_text}\n"
-        f"📍 Геолокация: {geo_text}\n"
-        f"🕒 Дата создания: {created_str}"
-    )
-
-    photos = product.get("photos", [])
-    videos = product.get("videos", [])
-    combo = [("photo", fid) for fid in photos] + [("video", fid) for fid in videos]
-    combo = combo[:10]
+    full_text = gallery["caption"]
+    combo = [(kind, fid) for kind, fid in gallery["media"]][:10]
 
     if not combo:
         logger.info("Show media: none product_id=%s", product_id)
@@ -685,7 +667,9 @@ async def send_category_page(message_or_callback, state: FSMContext, page: int):
         if isinstance(message_or_callback, Message):
             await message_or_callback.answer(text, reply_markup=keyboard)
         else:
-            await message_or_callback.message.edit_text(text, reply_markup=keyboard)
+            await replace_with_text(
+                message_or_callback.message, text, reply_markup=keyboard
+            )
 
 
 async def send_filter_category_page(message_or_callback, state: FSMContext, page: int):
@@ -725,16 +709,31 @@ async def send_filter_category_page(message_or_callback, state: FSMContext, page
         if isinstance(message_or_callback, Message):
             await message_or_callback.answer(text, reply_markup=keyboard)
         else:
-            await message_or_callback.message.edit_text(text, reply_markup=keyboard)
+            await replace_with_text(
+                message_or_callback.message, text, reply_markup=keyboard
+            )
+
+
+async def show_category_slide(message_or_callback, slide: Slide):
+    """Показать кадр карусели категории: из callback — правим то же сообщение."""
+    if isinstance(message_or_callback, Message):
+        message, current = message_or_callback, None
+    else:
+        message = message_or_callback.message
+        current = slide_ref(message)
+    await show_slide(message.bot, message.chat.id, slide, current)
 
 
 async def show_products_by_category(
     message_or_callback, state: FSMContext, category_name: str, page: int
 ):
     """Показать товары по категории с пагинацией"""
-    async with db_helper.session_factory() as session:
+    # В карусели «страница» — одно объявление
+    carousel = carousel_enabled()
+    limit = 1 if carousel else PAGE_SIZE
+    async with db_helper.session_factory(readonly=True) as session:
         product_ids = await get_products_by_category(
-            session, category_name, page=page, limit=PAGE_SIZE
+            session, category_name, page=page, limit=limit
         )
         total = await get_total_products_by_category(session, category_name)
 
@@ -754,60 +753,17 @@ async def show_products_by_category(
             if isinstance(message_or_callback, Message):
                 await message_or_callback.answer(text, reply_markup=keyboard)
             else:
-                await message_or_callback.message.edit_text(text, reply_markup=keyboard)
+                await replace_with_text(
+                    message_or_callback.message, text, reply_markup=keyboard
+                )
             return
 
         # Получаем данные для объявлений
         fields_map = await get_fields_for_products(product_ids, session)
         photos_map = await get_photos_for_products(product_ids, session)
 
-        for pid in product_ids:
-            fields = fields_map.get(pid, {})
-            name = fields.get("name", "Без названия")
-            desc = fields.get("description", "Без описания")
-            if len(desc) > 100:
-                desc = desc[:100] + "..."
-            price = fields.get("price")
-            if price:
-                price = format_price(price)
-            else:
-                price = "договорная"
-            text = f"📌 {name}\n" f"💬 {desc}\n" f"💰 Цена: {price}"
-            photos = photos_map.get(pid, [])
-
-            details_markup = InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            text="Подробнее", callback_data=f"details:{pid}"
-                        ),
-                        InlineKeyboardButton(
-                            text="Пожаловаться", callback_data=f"complaint:{pid}"
-                        ),
-                    ]
-                ]
-            )
-
-            if isinstance(message_or_callback, Message):
-                if photos:
-                    await message_or_callback.answer_photo(
-                        photos[0], caption=text, reply_markup=details_markup
-                    )
-                else:
-                    await message_or_callback.answer(text, reply_markup=details_markup)
-            else:
-                # Для callback_query отправляем новое сообщение
-                if photos:
-                    await message_or_callback.message.answer_photo(
-                        photos[0], caption=text, reply_markup=details_markup
-                    )
-                else:
-                    await message_or_callback.message.answer(
-                        text, reply_markup=details_markup
-                    )
-
         # Создаем клавиатуру для пагинации
-        total_pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        total_pages = (total + limit - 1) // limit
         nav_buttons = []
 
         if page > 1:
@@ -833,6 +789,30 @@ async def show_products_by_category(
             )
         )
 
+        if carousel:
+            pid = product_ids[0]
+            text = render_short_card(to_card_record(fields_map.get(pid, {}), pid))
+            slide = build_card_slide(
+                pid,
+                text,
+                photos_map.get(pid, []),
+                [row for row in (nav_buttons[:-1], nav_buttons[-1:]) if row],
+            )
+            await show_category_slide(message_or_callback, slide)
+            return
+
+        items = []
+        for pid in product_ids:
+            fields = fields_map.get(pid, {})
+            text = render_short_card(to_card_record(fields, pid))
+            items.append(build_card_item(pid, text, photos_map.get(pid, [])))
+
+        if isinstance(message_or_callback, Message):
+            await deliver_page(message_or_callback, items)
+        else:
+            # Для callback_query отправляем новые сообщения
+            await deliver_page(message_or_callback.message, items)
+
         pagination_keyboard = InlineKeyboardMarkup(inline_keyboard=[nav_buttons])
 
         info_text = (
@@ -869,12 +849,15 @@ async def show_products_by_category_filtered(
     price_max: int | None = None,
 ):
     """Показать товары по категории с учетом сортировки и цены"""
-    async with db_helper.session_factory() as session:
+    # В карусели «страница» — одно объявление
+    carousel = carousel_enabled()
+    limit = 1 if carousel else PAGE_SIZE
+    async with db_helper.session_factory(readonly=True) as session:
         product_ids = await get_products_by_category_filtered(
             session,
             category_name,
             page=page,
-            limit=PAGE_SIZE,
+            limit=limit,
             sort=sort,
             price_min=price_min,
             price_max=price_max,
@@ -889,56 +872,15 @@ async def show_products_by_category_filtered(
             if isinstance(message_or_callback, Message):
                 await message_or_callback.answer(text, reply_markup=keyboard)
             else:
-                await message_or_callback.message.edit_text(text, reply_markup=keyboard)
+                await replace_with_text(
+                    message_or_callback.message, text, reply_markup=keyboard
+                )
             return
 
         fields_map = await get_fields_for_products(product_ids, session)
         photos_map = await get_photos_for_products(product_ids, session)
 
-        for pid in product_ids:
-            fields = fields_map.get(pid, {})
-            name = fields.get("name", "Без названия")
-            desc = fields.get("description", "Без описания")
-            if len(desc) > 100:
-                desc = desc[:100] + "..."
-            price = fields.get("price")
-            if price:
-                price = format_price(price)
-            else:
-                price = "договорная"
-            text = f"📌 {name}\n" f"💬 {desc}\n" f"💰 Цена: {price}"
-            photos = photos_map.get(pid, [])
-
-            details_markup = InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [
-                        InlineKeyboardButton(
-                            text="Подробнее", callback_data=f"details:{pid}"
-                        ),
-                        InlineKeyboardButton(
-                            text="Пожаловаться", callback_data=f"complaint:{pid}"
-                        ),
-                    ]
-                ]
-            )
-            if isinstance(message_or_callback, Message):
-                if photos:
-                    await message_or_callback.answer_photo(
-                        photos[0], caption=text, reply_markup=details_markup
-                    )
-                else:
-                    await message_or_callback.answer(text, reply_markup=details_markup)
-            else:
-                if photos:
-                    await message_or_callback.message.answer_photo(
-                        photos[0], caption=text, reply_markup=details_markup
-                    )
-                else:
-                    await message_or_callback.message.answer(
-                        text, reply_markup=details_markup
-                    )
-
-        total_pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+        total_pages = (total + limit - 1) // limit
         pagination_kb = build_filter_pagination_keyboard(
             category_name,
             page,
@@ -947,6 +889,26 @@ async def show_products_by_category_filtered(
             price_min=price_min,
             price_max=price_max,
         )
+
+        if carousel:
+            pid = product_ids[0]
+            text = render_short_card(to_card_record(fields_map.get(pid, {}), pid))
+            slide = build_card_slide(
+                pid, text, photos_map.get(pid, []), pagination_kb.inline_keyboard
+            )
+            await show_category_slide(message_or_callback, slide)
+            return
+
+        items = []
+        for pid in product_ids:
+            fields = fields_map.get(pid, {})
+            text = render_short_card(to_card_record(fields, pid))
+            items.append(build_card_item(pid, text, photos_map.get(pid, [])))
+
+        if isinstance(message_or_callback, Message):
+            await deliver_page(message_or_callback, items)
+        else:
+            await deliver_page(message_or_callback.message, items)
         info_text = (
             f"📂 Категория: {category_name}\n"
             f"Страница {page} из {total_pages} (в этой категории {total} товаров)"
@@ -12,15 +12,17 @@ from .crud import (
 from sqlalchemy.ext.asyncio import AsyncSession
 from rovmarket_bot.core.config import settings
 from rovmarket_bot.core.logger import get_component_logger
+from rovmarket_bot.core.metrics import instrument_redis
 from redis.commands.search.index_definition import IndexDefinition, IndexType
 from redis.commands.search.field import TextField, NumericField
 
-from rovmarket_bot.core.models import Product
-from ...core.cache import invalidate_all_ads_cache
+from rovmarket_bot.core.models import Product, db_helper
+from rovmarket_bot.core.jobs import enqueue_job, register_job
+from ...core.cache import acquire_job_lock, invalidate_all_ads_cache
 
 REDIS_INDEX = "products"  # имя индекса
 
-redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+redis = instrument_redis(Redis.from_url(settings.REDIS_URL, decode_responses=True))
 logger = get_component_logger("search")
 
 
@@ -79,10 +81,10 @@ async def search_in_redis_original(text: str, session: AsyncSession, limit: int
                     continue
 
         if not product_ids:
-            logger.info("No product_ids from Redis. Attempting to restore index data.")
-
-            await invalidate_all_ads_cache()
-            await restore_redis_data(session)
+            # Восстановление индекса — фоновая задача, не больше раза в 5 минут
+            if await acquire_job_lock("reindex_products", 5 * 60):
+                logger.info("No product_ids from Redis. Scheduling index restore.")
+                await enqueue_job("reindex_products")
 
             # return await search_in_redis_original(text, session, limit)
 
@@ -126,40 +128,48 @@ async def search_in_redis_original(text: str, session: AsyncSession, limit: int
         return []
 
 
+def _product_document(product) -> dict:
+    return {
+        "name": product.name or "",
+        "description": product.description or "",
+        "price": str(product.price) if product.price else "0",
+    }
+
+
 async def index_product_in_redis(product):
-    # Примерная структура, зависит от того, как у тебя устроен индекс
     # Redisearch document ID: "product:<id>"
-    doc_id = f"product:{product.id}"
-    await redis.hset(
-        doc_id,
-        mapping={
-            "name": product.name or "",
-            "description": product.description or "",
-            "price": str(product.price) if product.price else "0",
-            # Добавь другие поля, если нужно
-        },
-    )
+    await redis.hset(f"product:{product.id}", mapping=_product_document(product))
+
+
+async def index_products_in_redis(products) -> None:
+    """Проиндексировать пачку объявлений: пачками через pipeline вместо HSET на каждое."""
+    for start in range(0, len(products), 500):
+        async with redis.pipeline(transaction=False) as pipe:
+            for product in products[start : start + 500]:
+                pipe.hset(f"product:{product.id}", mapping=_product_document(product))
+            await pipe.execute()
 
 
 async def restore_redis_data(session: AsyncSession):
-    stmt = select(Product).where(Product.publication == True)
+    stmt = select(Product.id, Product.name, Product.description, Product.price).where(
+        Product.publication == True
+    )
     result = await session.execute(stmt)
-    products = result.unique().scalars().all()
+    products = result.all()
 
     if not products:
         logger.info("No published products found in DB for restore.")
         return
 
-    for product in products:
-        key = f"product:{product.id}"
-        await redis.hset(
-            key,
-            mapping={
-                "name": product.name or "",
-                "description": product.description or "",
-                "price": str(product.price) if product.price else "0",
-            },
-        )
+    await index_products_in_redis(products)
+    logger.info("Restored %s products into Redis index", len(products))
+
+
+@register_job("reindex_products")
+async def reindex_products(bot):
+    await invalidate_all_ads_cache()
+    async with db_helper.new_session() as session:
+        await restore_redis_data(session)
 
 
 async def ensure_redis_index():
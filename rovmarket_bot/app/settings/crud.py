@@ -8,6 +8,8 @@ from rovmarket_bot.core.models import (
     BotSettings,
 )
 from rovmarket_bot.core.logger import apply_logging_configuration
+from rovmarket_bot.core.stats import bump_daily_stats
+from rovmarket_bot.core.notifications import NOTIFICATION_MODES
 
 
 async def get_user_with_subscriptions(
@@ -52,6 +54,7 @@ async def toggle_category_subscription(
         user = User(telegram_id=telegram_id, username=None)
         session.add(user)
         await session.flush()
+        await bump_daily_stats(session, new_users=1)
 
     # check current
     stmt = select(UserCategoryNotification).where(
@@ -71,6 +74,21 @@ async def toggle_category_subscription(
         return True
 
 
+async def set_notification_mode(
+    telegram_id: int, mode: str, session: AsyncSession
+) -> bool:
+    """Сохранить режим доставки уведомлений (instant/hourly/daily)."""
+    if mode not in NOTIFICATION_MODES:
+        return False
+    result = await session.execute(
+        update(User)
+        .where(User.telegram_id == telegram_id)
+        .values(notification_mode=mode)
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
 # ----- Bot settings (singleton) -----
 
 
@@ -17,8 +17,13 @@ from .crud import (
     is_user_subscribed_to_category,
     toggle_category_subscription,
     get_user_with_subscriptions,
+    set_notification_mode,
+)
+from .keyboard import (
+    menu_settings,
+    menu_notifications,
+    build_notification_mode_keyboard,
 )
-from .keyboard import menu_settings, menu_notifications
 from rovmarket_bot.core.cache import check_rate_limit
 from rovmarket_bot.core.logger import get_component_logger
 
@@ -70,7 +75,8 @@ async def button_notifications(message: Message, state: FSMContext):
         "🔔 *Уведомления*\n\n"
         "Вы можете настроить, какие уведомления хотите получать:\n\n"
         "📂 *Категории* — включить уведомления по выбранным категориям.\n"
-        "📢 *Все объявления* — получать уведомления обо всех новых объявлениях.",
+        "📢 *Все объявления* — получать уведомления обо всех новых объявлениях.\n"
+        "⏱ *Частота* — сразу или подборкой раз в час / раз в день.",
         reply_markup=menu_notifications,  # сюда вставьте клавиатуру с кнопками
     )
     logger.info("Notifications settings opened by user_id=%s", message.from_user.id)
@@ -136,6 +142,46 @@ async def toggle_all_notifications(callback: CallbackQuery):
     await callback.answer(f"Уведомления {'включены' if enable else 'выключены'}")
 
 
+@router.message(F.text == "⏱ Частота уведомлений")
+async def button_notification_mode(message: Message, state: FSMContext):
+    allowed, retry_after = await check_rate_limit(message.from_user.id, "search_cmd")
+    if not allowed:
+        await message.answer(
+            f"Слишком часто. Подождите {retry_after} сек и попробуйте снова."
+        )
+        return
+    await state.clear()
+    async with db_helper.session_factory() as session:
+        user = await get_user_with_subscriptions(message.from_user.id, session)
+        current = user.notification_mode if user else "instant"
+
+    await message.answer(
+        "⏱ *Как присылать новые объявления по подпискам?*\n\n"
+        "Сразу — каждое объявление отдельным сообщением "
+        "(при большом потоке лишние соберутся в подборку раз в час).\n"
+        "Раз в час / раз в день — одним сообщением со списком.",
+        reply_markup=build_notification_mode_keyboard(current),
+    )
+
+
+@router.callback_query(F.data.startswith("notif_mode:"))
+async def toggle_notification_mode(callback: CallbackQuery):
+    mode = callback.data.split(":", 1)[1]
+    async with db_helper.session_factory() as session:
+        updated = await set_notification_mode(callback.from_user.id, mode, session)
+    if not updated:
+        await callback.answer("Не удалось изменить", show_alert=False)
+        return
+
+    await callback.message.edit_reply_markup(
+        reply_markup=build_notification_mode_keyboard(mode)
+    )
+    await callback.answer("Сохранено")
+    logger.info(
+        "Notification mode for user_id=%s set to %s", callback.from_user.id, mode
+    )
+
+
 @router.message(F.text == "📋 Меню")
 async def button_menu(message: Message, state: FSMContext):
     allowed, retry_after = await check_rate_limit(message.from_user.id, "search_cmd")
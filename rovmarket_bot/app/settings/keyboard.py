@@ -25,9 +25,33 @@ menu_notifications = ReplyKeyboardMarkup(
         [
             KeyboardButton(text="📢 Все объявления (уведомления)"),
         ],
+        [
+            KeyboardButton(text="⏱ Частота уведомлений"),
+        ],
         [
             KeyboardButton(text="📋 Меню"),
         ],
     ],
     resize_keyboard=True,
 )
+
+
+NOTIFICATION_MODE_TITLES = {
+    "instant": "⚡ Сразу",
+    "hourly": "🕐 Раз в час",
+    "daily": "📅 Раз в день",
+}
+
+
+def build_notification_mode_keyboard(current: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=("✅ " if mode == current else "") + title,
+                    callback_data=f"notif_mode:{mode}",
+                )
+            ]
+            for mode, title in NOTIFICATION_MODE_TITLES.items()
+        ]
+    )
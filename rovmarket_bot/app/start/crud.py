@@ -1,9 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from rovmarket_bot.core.models.user import User
 from sqlalchemy.future import select
+from rovmarket_bot.core.stats import bump_daily_stats
 
 
-async def add_user(telegram_id: int, username: str | None, session: AsyncSession) -> User:
+async def add_user(
+    telegram_id: int, username: str | None, session: AsyncSession
+) -> User:
     result = await session.execute(select(User).where(User.telegram_id == telegram_id))
     user = result.scalars().first()
 
@@ -12,6 +15,7 @@ async def add_user(telegram_id: int, username: str | None, session: AsyncSession
 
     user = User(telegram_id=telegram_id, username=username)
     session.add(user)
+    await bump_daily_stats(session, new_users=1)
     await session.commit()
     await session.refresh(user)
     return user
@@ -2,11 +2,18 @@ import json
 from redis.asyncio import Redis
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from .cache_codec import ALL_ADS, CATEGORIES_PAGE, decode, encode, get_codec
 from .config import settings
+from .metrics import instrument_redis
 from rovmarket_bot.core.models import Categories
 from rovmarket_bot.core.models import Product, ProductPhoto
 
-redis_cache = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+redis_cache = instrument_redis(
+    Redis.from_url(settings.REDIS_URL, decode_responses=True)
+)
+# Для значений в бинарном формате cache_codec (без декодирования в str)
+redis_binary = instrument_redis(Redis.from_url(settings.REDIS_URL))
+cache_codec = get_codec(settings.CACHE_CODEC)
 
 CACHE_TIMEOUT = 600
 
@@ -58,10 +65,10 @@ async def get_categories_page_cached(
     session: AsyncSession, page: int = 1, limit: int = 10
 ):
     cache_key = f"categories_page:{page}:{limit}"
-    cached_data = await redis_cache.get(cache_key)
+    cached_data = decode(CATEGORIES_PAGE, await redis_binary.get(cache_key))
 
     if cached_data:
-        return [Categories(**item) for item in json.loads(cached_data)]
+        return [Categories(**item) for item in cached_data]
 
     offset = (page - 1) * limit
 
@@ -85,17 +92,19 @@ async def get_categories_page_cached(
 
     if categories:
         to_cache = [dict(id=c.id, name=c.name) for c in categories]
-        await redis_cache.set(cache_key, json.dumps(to_cache), ex=CACHE_TIMEOUT)
+        await redis_binary.set(
+            cache_key, encode(CATEGORIES_PAGE, to_cache, cache_codec), ex=CACHE_TIMEOUT
+        )
 
     return categories
 
 
 async def get_all_ads_cached(session: AsyncSession) -> dict:
     cache_key = "all_ads_display_data"
-    cached_data = await redis_cache.get(cache_key)
+    cached_data = decode(ALL_ADS, await redis_binary.get(cache_key))
 
     if cached_data:
-        return json.loads(cached_data)
+        return cached_data
 
     # Если кэш отсутствует, получаем данные из базы
     stmt = (
@@ -156,9 +165,8 @@ async def get_all_ads_cached(session: AsyncSession) -> dict:
 
     # Сохраняем заново в кэш (восстанавливаем)
     try:
-        json_data = json.dumps(display_data)
-        await redis_cache.set(
-            cache_key, json_data, ex=CACHE_TIMEOUT
+        await redis_binary.set(
+            cache_key, encode(ALL_ADS, display_data, cache_codec), ex=CACHE_TIMEOUT
         )  # или без ex, если не хочешь TTL
     except Exception as e:
         print(f"❌ Ошибка при сохранении в кэш: {e}")
@@ -166,6 +174,183 @@ async def get_all_ads_cached(session: AsyncSession) -> dict:
     return display_data
 
 
+GALLERY_CACHE_TIMEOUT = 3600
+
+
+def _product_version_key(product_id: int) -> str:
+    return f"product_ver:{product_id}"
+
+
+def _gallery_key(product_id: int, variant: str) -> str:
+    return f"gallery:{product_id}:{variant}"
+
+
+async def get_cached_gallery(
+    product_id: int, variant: str
+) -> tuple[dict | None, int | None]:
+    """Готовая галерея объявления (подпись и упорядоченный список медиа)
+    и версия объявления, прочитанная вместе с ней.
+
+    Версия и галерея читаются одним MGET; запись с устаревшей версией
+    считается промахом. При промахе версию нужно передать в
+    `set_cached_gallery` — она прочитана до загрузки из БД, поэтому
+    правка, случившаяся между чтением БД и записью в кэш, не даст
+    закэшировать старую галерею под новой версией. None вместо версии —
+    Redis недоступен, кэшировать не нужно.
+    """
+    try:
+        version, cached = await redis_cache.mget(
+            _product_version_key(product_id), _gallery_key(product_id, variant)
+        )
+        version = int(version or 0)
+        if not cached:
+            return None, version
+        payload = json.loads(cached)
+        if payload.get("v") != version:
+            return None, version
+        return payload, version
+    except Exception:
+        return None, None
+
+
+async def set_cached_gallery(
+    product_id: int, variant: str, payload: dict, version: int | None
+) -> None:
+    """Сохранить галерею объявления под версией, прочитанной до загрузки из БД.
+
+    payload: {"caption": str | None, "media": [["photo"|"video", file_id], ...], ...}
+    """
+    if version is None:
+        return
+    try:
+        data = dict(payload, v=version)
+        await redis_cache.set(
+            _gallery_key(product_id, variant),
+            json.dumps(data),
+            ex=GALLERY_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        print(f"❌ Ошибка при сохранении галереи в кэш: {e}")
+
+
+async def drop_cached_gallery(product_id: int, variant: str) -> None:
+    """Удалить один вариант галереи (например, при изменении счётчика просмотров)"""
+    try:
+        await redis_cache.delete(_gallery_key(product_id, variant))
+    except Exception:
+        pass
+
+
+async def bump_product_version(product_id: int) -> None:
+    """Инвалидация всех закэшированных галерей объявления (после редактирования,
+    публикации или снятия с публикации)"""
+    try:
+        await redis_cache.incr(_product_version_key(product_id))
+    except Exception:
+        pass
+
+
+async def invalidate_cache_on_moderation(
+    product_ids: list[int], published: bool
+) -> None:
+    """Одна дельта кэша на пачку модерации вместо инвалидации на каждое объявление.
+
+    Версии галерей всех объявлений пачки поднимаются одним pipeline; списки
+    объявлений и страницы категорий сбрасываются один раз и только если
+    что-то опубликовано (отклонённые в них и не попадали).
+    """
+    try:
+        category_keys = await redis_cache.keys("categories_page:*") if published else []
+        async with redis_cache.pipeline(transaction=False) as pipe:
+            for product_id in product_ids:
+                pipe.incr(_product_version_key(product_id))
+            if published:
+                pipe.delete("all_ads_display_data", *category_keys)
+            await pipe.execute()
+    except Exception as e:
+        print(f"❌ Ошибка при инвалидации кэша после модерации: {e}")
+
+
+CHAT_ROUTE_TIMEOUT = 7 * 24 * 3600
+CHAT_THROTTLE_SECONDS = 3
+
+
+def _chat_route_key(chat_id: int) -> str:
+    return f"chat_route:{chat_id}"
+
+
+def _chat_throttle_key(chat_id: int, telegram_id: int) -> str:
+    return f"chat_route:{chat_id}:throttle:{telegram_id}"
+
+
+async def get_chat_route(chat_id: int) -> dict | None:
+    """Маршрут активного чата: кто покупатель/продавец (telegram_id и user.id),
+    товар и его название. None — нет в кэше или Redis недоступен."""
+    try:
+        route = await redis_cache.hgetall(_chat_route_key(chat_id))
+        if not route:
+            return None
+        return {
+            "buyer_id": int(route["buyer_id"]),
+            "seller_id": int(route["seller_id"]),
+            "buyer_tg": int(route["buyer_tg"]),
+            "seller_tg": int(route["seller_tg"]),
+            "product_id": int(route["product_id"]),
+            "product_name": route.get("product_name", ""),
+            "active": route.get("active") == "1",
+        }
+    except Exception:
+        return None
+
+
+async def set_chat_route(chat_id: int, route: dict) -> None:
+    try:
+        mapping = dict(route, active="1" if route.get("active", True) else "0")
+        key = _chat_route_key(chat_id)
+        async with redis_cache.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, CHAT_ROUTE_TIMEOUT)
+            await pipe.execute()
+    except Exception as e:
+        print(f"❌ Ошибка при сохранении маршрута чата в кэш: {e}")
+
+
+async def drop_chat_route(chat_id: int) -> None:
+    try:
+        await redis_cache.delete(_chat_route_key(chat_id))
+    except Exception:
+        pass
+
+
+async def check_chat_throttle(
+    chat_id: int, telegram_id: int, seconds: int = CHAT_THROTTLE_SECONDS
+) -> bool:
+    """Не чаще одного сообщения в `seconds` от участника чата (SET NX EX).
+
+    При недоступности Redis пропускаем (fail-open), как check_rate_limit.
+    """
+    try:
+        return bool(
+            await redis_cache.set(
+                _chat_throttle_key(chat_id, telegram_id), "1", nx=True, ex=seconds
+            )
+        )
+    except Exception:
+        return True
+
+
+async def acquire_job_lock(name: str, ttl: int) -> bool:
+    """Периодическая задача выполняется одной репликой/воркером (SET NX EX).
+
+    True — этот процесс взял задачу на `ttl` секунд. При недоступности
+    Redis выполняем (fail-open), как в одиночном режиме.
+    """
+    try:
+        return bool(await redis_cache.set(f"job_lock:{name}", "1", nx=True, ex=ttl))
+    except Exception:
+        return True
+
+
 async def invalidate_all_ads_cache():
     """Инвалидация кэша всех объявлений"""
     await redis_cache.delete("all_ads_display_data")
@@ -0,0 +1,152 @@
+"""Компактная сериализация значений кэша Redis.
+
+Значение в Redis — байты: заголовок из двух байт (тег кодека и версия схемы)
+и тело. Тело — не словари с повторяющимися в каждой записи ключами, а
+кортежи полей в порядке, заданном схемой (`Schema.pack`/`Schema.unpack`).
+
+Кодеки подключаемые: json есть всегда, orjson — зависимость проекта,
+msgpack — если установлен. Пишется выбранным кодеком (CACHE_CODEC,
+"auto" — самый быстрый из доступных, в обычной установке orjson), читается любым известным по тегу, поэтому реплики с разными
+кодеками во время выкладки не мешают друг другу.
+
+`decode` возвращает None, если запись нельзя безопасно прочитать: старый
+формат (текстовый JSON без заголовка), неизвестный или неустановленный
+кодек, другая версия схемы, битые данные. Для вызывающего это промах кэша —
+значение пересобирается из БД и перезаписывается в текущем формате. Меняя
+поля схемы, увеличивайте её версию.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    tag: bytes
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    version: int
+    pack: Callable[[Any], Any]
+    unpack: Callable[[Any], Any]
+
+
+CODECS: dict[str, Codec] = {}
+_BY_TAG: dict[bytes, Codec] = {}
+
+# Порядок выбора для CACHE_CODEC=auto
+_PREFERRED = ("msgpack", "orjson", "json")
+
+
+def register_codec(name: str, tag: bytes, dumps, loads) -> Codec:
+    codec = Codec(name, tag, dumps, loads)
+    CODECS[name] = codec
+    _BY_TAG[tag] = codec
+    return codec
+
+
+register_codec(
+    "json",
+    b"j",
+    lambda value: json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(),
+    json.loads,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+else:
+    register_codec("orjson", b"o", orjson.dumps, orjson.loads)
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+else:
+    register_codec(
+        "msgpack",
+        b"m",
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False),
+    )
+
+
+def get_codec(name: str = "auto") -> Codec:
+    """Кодек по имени; "auto" или неустановленный — лучший из доступных."""
+    if name in CODECS:
+        return CODECS[name]
+    return next(CODECS[n] for n in _PREFERRED if n in CODECS)
+
+
+def encode(schema: Schema, value: Any, codec: Codec) -> bytes:
+    return codec.tag + bytes((schema.version,)) + codec.dumps(schema.pack(value))
+
+
+def decode(schema: Schema, data: bytes | None) -> Any | None:
+    """Значение или None, если запись отсутствует или её формат не подходит."""
+    if not data or len(data) < 2:
+        return None
+    codec = _BY_TAG.get(data[:1])
+    if codec is None or data[1] != schema.version:
+        return None
+    try:
+        return schema.unpack(codec.loads(data[2:]))
+    except Exception:
+        return None
+
+
+# ----- Схемы значений -----
+
+
+def _pack_categories(categories: list[dict]) -> list:
+    return [[c["id"], c["name"]] for c in categories]
+
+
+def _unpack_categories(rows: list) -> list[dict]:
+    return [{"id": category_id, "name": name} for category_id, name in rows]
+
+
+# Страница категорий: [[id, name], ...]
+CATEGORIES_PAGE = Schema("categories_page", 1, _pack_categories, _unpack_categories)
+
+_AD_FIELDS = ("name", "description", "price", "contact", "geo", "created_at")
+
+
+def _pack_all_ads(data: dict) -> list:
+    products, photos = data["products"], data["photos"]
+    rows = []
+    for pid in data["product_ids"]:
+        product = products[pid]
+        rows.append(
+            [int(pid), *(product[field] for field in _AD_FIELDS), photos.get(pid, [])]
+        )
+    return rows
+
+
+def _unpack_all_ads(rows: list) -> dict:
+    product_ids, products, photos = [], {}, {}
+    for pid, name, description, price, contact, geo, created_at, urls in rows:
+        pid = str(pid)
+        product_ids.append(pid)
+        products[pid] = {
+            "name": name,
+            "description": description,
+            "price": price,
+            "contact": contact,
+            "geo": geo,
+            "created_at": created_at,
+        }
+        photos[pid] = urls
+    return {"product_ids": product_ids, "products": products, "photos": photos}
+
+
+# Лента всех объявлений: [[id, name, description, price, contact, geo,
+# created_at, [photo_url, ...]], ...] в порядке ленты (новые первыми)
+ALL_ADS = Schema("all_ads", 1, _pack_all_ads, _unpack_all_ads)
@@ -0,0 +1,249 @@
+"""Рендеринг карточек объявлений.
+
+Все ленты (все объявления, поиск, категории, «Мои объявления», админка,
+рассылка о новом объявлении) собирают текст карточки здесь, а не в хендлерах.
+
+Карточка строится из компактной записи `CardRecord`; шаблоны — заранее
+подготовленные строки `str.format`, а результат рендера мемоизируется по
+записи, поэтому одна и та же карточка на странице для разных пользователей
+форматируется один раз (пока не изменятся поля объявления).
+"""
+
+import datetime
+import html
+import re
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+HTML = "html"
+MARKDOWN = "markdown"
+
+CARD_CACHE_SIZE = 4096
+SHORT_DESCRIPTION_LENGTH = 100
+NEGOTIABLE_PRICE = "договорная"
+VIA_BOT_CONTACT = "via_bot"
+
+
+class CardRecord(NamedTuple):
+    id: int | None
+    name: str
+    description: str
+    price: int | None
+    contact: str
+    latitude: float | None
+    longitude: float | None
+    created_at: datetime.datetime | None
+
+
+def _get(product: Any, key: str, default=None):
+    if isinstance(product, dict):
+        return product.get(key, default)
+    return getattr(product, key, default)
+
+
+def to_card_record(product: Any, product_id: int | None = None) -> CardRecord:
+    """Собрать CardRecord из dict (кэш/CRUD) или ORM-объекта Product."""
+    price = _get(product, "price")
+    try:
+        price = int(price) if price not in (None, "") else None
+    except (TypeError, ValueError):
+        price = None
+
+    latitude = longitude = None
+    geo = _get(product, "geo")
+    if geo and isinstance(geo, dict):
+        latitude = geo.get("latitude")
+        longitude = geo.get("longitude")
+
+    created_at = _get(product, "created_at")
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.datetime.fromisoformat(created_at)
+        except ValueError:
+            created_at = None
+    if not isinstance(created_at, datetime.datetime):
+        created_at = None
+
+    pid = product_id if product_id is not None else _get(product, "id")
+    return CardRecord(
+        id=int(pid) if pid is not None else None,
+        name=_get(product, "name") or "Без названия",
+        description=_get(product, "description") or "Без описания",
+        price=price or None,
+        contact=(_get(product, "contact") or "-").strip(),
+        latitude=latitude,
+        longitude=longitude,
+        created_at=created_at,
+    )
+
+
+def format_price(price, negotiable: str = NEGOTIABLE_PRICE) -> str:
+    """1500000 -> '1 500 000 ₽'; пустая или нулевая цена -> negotiable."""
+    try:
+        price_int = int(price)
+    except (ValueError, TypeError):
+        return str(price) if price else negotiable
+    if not price_int:
+        return negotiable
+    return f"{price_int:,}".replace(",", " ") + " ₽"
+
+
+_PHONE_WITHOUT_PLUS = re.compile(r"(?:[78]\d{6,}|380\d{6,}|\d{6,})")
+
+
+def normalize_contact(contact: str | None) -> str:
+    """Привести контакт к виду для показа: '+' у телефонов, текст для via_bot."""
+    contact = (contact or "").strip()
+    if not contact:
+        return "-"
+    if contact == VIA_BOT_CONTACT:
+        return "Связь через бота"
+    if _PHONE_WITHOUT_PLUS.fullmatch(contact):
+        return "+" + contact
+    return contact
+
+
+def geo_link(latitude, longitude) -> str | None:
+    if latitude is None or longitude is None:
+        return None
+    return f"https://maps.google.com/?q={latitude},{longitude}"
+
+
+def _escape_markdown(text: str) -> str:
+    # Legacy Markdown (ParseMode.MARKDOWN, дефолт бота): экранируем только сущности
+    return re.sub(r"([_*`\[])", r"\\\1", text)
+
+
+def _escape_html(text: str) -> str:
+    return html.escape(text, quote=False)
+
+
+_ESCAPE = {HTML: _escape_html, MARKDOWN: _escape_markdown}
+
+_SHORT_TEMPLATE = "📌 {name}\n💬 {description}\n💰 Цена: {price}"
+
+_FULL_TEMPLATE = (
+    "📌 {name}\n"
+    "💬 {description}\n"
+    "💰 Цена: {price}\n"
+    "\n📞 Контакт: {contact}\n"
+    "📍 Геолокация: {geo}\n"
+    "🕒 Дата создания: {created}"
+)
+
+_GEO_TEMPLATE = {
+    HTML: "<a href='{url}'>Нажми, чтобы открыть карту</a>",
+    MARKDOWN: "[Нажми, чтобы открыть карту]({url})",
+}
+
+_OWNER_TEMPLATE = {
+    HTML: (
+        "<b>📋 {name}</b>\n\n"
+        "📝 {description}\n\n"
+        "💰 <b>Цена:</b> {price}\n"
+        "📂 <b>Категория:</b> {category}\n"
+        "📞 <b>Контакты:</b> {contact}\n"
+        "📅 <b>Дата:</b> {created}\n"
+        "👥 <b>Просмотры:</b> {views}"
+    ),
+    MARKDOWN: (
+        "*📋 {name}*\n\n"
+        "📝 {description}\n\n"
+        "💰 *Цена:* {price}\n"
+        "📂 *Категория:* {category}\n"
+        "📞 *Контакты:* {contact}\n"
+        "📅 *Дата:* {created}\n"
+        "👥 *Просмотры:* {views}"
+    ),
+}
+
+_ADMIN_TEMPLATE = {
+    HTML: (
+        "<b>#{id} — {name}</b>\n\n"
+        "{description}\n\n"
+        "<b>Цена:</b> {price}\n"
+        "<b>Контакт:</b> {contact}\n"
+        "<b>Дата:</b> {created}\n"
+    ),
+    MARKDOWN: (
+        "*#{id} — {name}*\n\n"
+        "{description}\n\n"
+        "*Цена:* {price}\n"
+        "*Контакт:* {contact}\n"
+        "*Дата:* {created}\n"
+    ),
+}
+
+_ADMIN_VIEWS_TEMPLATE = {
+    HTML: "<b>Просмотры:</b> {views}\n",
+    MARKDOWN: "*Просмотры:* {views}\n",
+}
+
+
+def _created(record: CardRecord, fmt: str = "%d.%m.%Y") -> str:
+    return record.created_at.strftime(fmt) if record.created_at else "-"
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def render_short_card(record: CardRecord, fmt: str = MARKDOWN) -> str:
+    """Короткая карточка для лент: название, обрезанное описание, цена."""
+    escape = _ESCAPE[fmt]
+    description = record.description
+    if len(description) > SHORT_DESCRIPTION_LENGTH:
+        description = description[:SHORT_DESCRIPTION_LENGTH] + "..."
+    return _SHORT_TEMPLATE.format(
+        name=escape(record.name),
+        description=escape(description),
+        price=escape(format_price(record.price)),
+    )
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def render_full_card(record: CardRecord, fmt: str = HTML) -> str:
+    """Полная карточка: контакт, ссылка на карту, дата создания."""
+    escape = _ESCAPE[fmt]
+    url = geo_link(record.latitude, record.longitude)
+    return _FULL_TEMPLATE.format(
+        name=escape(record.name),
+        description=escape(record.description),
+        price=escape(format_price(record.price)),
+        contact=escape(normalize_contact(record.contact)),
+        geo=_GEO_TEMPLATE[fmt].format(url=url) if url else "-",
+        created=_created(record),
+    )
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def render_owner_card(
+    record: CardRecord, category_name: str | None, views_count: int, fmt: str = HTML
+) -> str:
+    """Карточка в «Моих объявлениях»: с категорией и числом просмотров."""
+    escape = _ESCAPE[fmt]
+    return _OWNER_TEMPLATE[fmt].format(
+        name=escape(record.name),
+        description=escape(record.description),
+        price=escape(format_price(record.price, negotiable="Договорная")),
+        category=escape(category_name or "—"),
+        contact=escape(normalize_contact(record.contact)),
+        created=_created(record, "%d.%m.%Y %H:%M"),
+        views=views_count,
+    )
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def render_admin_card(
+    record: CardRecord, views_count: int | None = None, fmt: str = HTML
+) -> str:
+    """Карточка опубликованного объявления в админ-панели."""
+    escape = _ESCAPE[fmt]
+    text = _ADMIN_TEMPLATE[fmt].format(
+        id=record.id,
+        name=escape(record.name),
+        description=escape(record.description),
+        price=escape(format_price(record.price, negotiable="Не указана")),
+        contact=escape(normalize_contact(record.contact)),
+        created=_created(record, "%d.%m.%Y %H:%M"),
+    )
+    if views_count is not None:
+        text += _ADMIN_VIEWS_TEMPLATE[fmt].format(views=views_count)
+    return text
@@ -15,7 +15,55 @@ class Settings(BaseSettings):
     db_url: str = os.environ.get("DATABASE_URL", "sqlite+aiosqlite:///./db.sqlite3")
     db_echo: bool = False
 
+    # Реплики только для чтения, через запятую; пусто — всё читается с primary
+    DB_REPLICA_URLS: list[str] = [
+        url.strip()
+        for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+
+    # Пул соединений и драйвер (для SQLite не применяются)
+    DB_POOL_SIZE: int = int(os.environ.get("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT: int = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = str(
+        os.environ.get("DB_POOL_PRE_PING", "true")
+    ).lower() in (
+        "1",
+        "true",
+        "yes",
+        "on",
+    )
+    DB_STATEMENT_CACHE_SIZE: int = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 500))
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 15000))
+
+    # Профилировщик запросов (core/query_profiler.py): порог медленного запроса
+    # в мс (0 — выкл.), сколько повторов одной формы запроса за апдейт считать
+    # N+1 (0 — выкл.) и доля апдейтов, в которых повторы отслеживаются
+    DB_SLOW_QUERY_MS: int = int(os.environ.get("DB_SLOW_QUERY_MS", 200))
+    DB_REPEAT_THRESHOLD: int = int(os.environ.get("DB_REPEAT_THRESHOLD", 5))
+    DB_PROFILE_SAMPLE_RATE: float = float(os.environ.get("DB_PROFILE_SAMPLE_RATE", 0.1))
+
     REDIS_URL: str = os.environ.get("REDIS_URL", "redis://redis:6379")
+    # Кодек значений кэша (core/cache_codec.py): json, orjson, msgpack или auto —
+    # самый быстрый из установленных
+    CACHE_CODEC: str = os.environ.get("CACHE_CODEC", "auto")
+
+    # Получение апдейтов: polling (один процесс) или webhook (aiohttp-сервер;
+    # можно запускать несколько реплик за балансировщиком — FSM общий в Redis)
+    BOT_MODE: str = os.environ.get("BOT_MODE", "polling")
+    WEBHOOK_BASE_URL: str = os.environ.get("WEBHOOK_BASE_URL", "")
+    WEBHOOK_PATH: str = os.environ.get("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET: str | None = os.environ.get("WEBHOOK_SECRET") or None
+    WEBHOOK_HOST: str = os.environ.get("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.environ.get("WEBHOOK_PORT", 8080))
+    # Метрики хендлеров в формате Prometheus на вебхук-сервере; пусто — выключено
+    METRICS_PATH: str = os.environ.get("METRICS_PATH", "/metrics")
+    # Процессов-воркеров на реплику (делят порт через SO_REUSEPORT)
+    WEBHOOK_WORKERS: int = int(os.environ.get("WEBHOOK_WORKERS", 1))
+    # Сколько апдейтов Telegram держит в полёте к вебхуку одновременно
+    WEBHOOK_MAX_CONNECTIONS: int = int(os.environ.get("WEBHOOK_MAX_CONNECTIONS", 40))
 
     # Enable/disable file logging. Accept common truthy strings from env; default True
     LOGGER: bool = str(os.environ.get("LOGGER", "true")).lower() in (
@@ -25,9 +73,38 @@ class Settings(BaseSettings):
         "on",
     )
 
+    # Доля сохраняемых INFO-записей (WARNING и выше — всегда) и переопределения
+    # по компонентам через запятую: "search=0.1,chat=0.5"
+    LOG_INFO_SAMPLE_RATE: float = float(os.environ.get("LOG_INFO_SAMPLE_RATE", 1.0))
+    LOG_SAMPLE_RATES: str = os.environ.get("LOG_SAMPLE_RATES", "")
+
     TOKEN: str = os.environ["TELEGRAM_TOKEN"]
     BOT_USERNAME: str = os.environ["BOT_USERNAME"]
 
+    # Как отправлять страницу ленты: album (фото альбомом + сообщение с кнопками),
+    # list (одно сообщение), cards (карточка = сообщение, медленнее всего)
+    # или carousel (одно сообщение, листание редактированием)
+    PAGE_DELIVERY_MODE: str = os.environ.get("PAGE_DELIVERY_MODE", "album")
+
+    # Анонимный чат: copy (copy_message/copy_messages) или resend (по file_id)
+    CHAT_RELAY_MODE: str = os.environ.get("CHAT_RELAY_MODE", "copy")
+
+    # Сборка альбомов: memory (один процесс) или redis (несколько воркеров)
+    ALBUM_COLLECTOR: str = os.environ.get("ALBUM_COLLECTOR", "memory")
+
+    # Фоновые задачи (рассылки, уведомления): inline — в процессе бота,
+    # worker — через Redis-очередь в отдельном процессе rovmarket_bot.worker
+    JOBS_MODE: str = os.environ.get("JOBS_MODE", "inline")
+    JOBS_CONCURRENCY: int = int(os.environ.get("JOBS_CONCURRENCY", 4))
+
+    # Уведомления подписчиков о новых объявлениях: сколько мгновенных
+    # уведомлений пользователь получает за окно (остальное — в часовой дайджест),
+    # сколько объявлений в одном дайджесте и в котором часу (UTC) уходит суточный
+    NOTIFY_INSTANT_CAP: int = int(os.environ.get("NOTIFY_INSTANT_CAP", 5))
+    NOTIFY_CAP_WINDOW: int = int(os.environ.get("NOTIFY_CAP_WINDOW", 3600))
+    NOTIFY_DIGEST_LIMIT: int = int(os.environ.get("NOTIFY_DIGEST_LIMIT", 20))
+    NOTIFY_DAILY_HOUR: int = int(os.environ.get("NOTIFY_DAILY_HOUR", 9))
+
 
 settings = Settings()
 
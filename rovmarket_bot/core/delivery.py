@@ -0,0 +1,352 @@
+"""Отправка страницы объявлений в чат.
+
+Ленты (все объявления, поиск, категории) собирают страницу целиком
+и передают её в `deliver_page`, который отправляет её в одном из режимов:
+
+- ``album`` (по умолчанию) — фото карточек одним media group (подписи —
+  сами карточки) и одно сообщение с кнопками «Подробнее»/«Пожаловаться»
+  по номерам: страница стоит 2 запроса;
+- ``list`` — одно текстовое сообщение со всеми карточками и теми же кнопками;
+- ``cards`` — по одному сообщению на карточку, у каждой свои кнопки:
+  страница из 5–10 карточек стоит столько же последовательных запросов.
+
+Запросы в один чат идут строго по очереди: следующий уходит только после
+ответа на предыдущий — иначе повтор после 429 или задержка сети меняют
+порядок карточек. Поэтому ускоряется страница не параллельной отправкой,
+а меньшим числом запросов: свёрнутые режимы платят за это общей
+клавиатурой с номерами вместо кнопок под каждой карточкой. Все запросы
+страницы собираются заранее, до первой отправки.
+
+Режим ``carousel`` — одно сообщение на всю ленту: одна карточка за раз,
+«вперёд/назад» правят это же сообщение через `edit_message_media`
+(или `edit_message_text` для карточек без медиа), см. `show_slide`.
+
+Все запросы проходят через `ChatRateLimiter` — бюджет сообщений на чат,
+чтобы не упираться в flood-limit Telegram; `TelegramRetryAfter` отрабатываем
+ожиданием и одним повтором.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, NamedTuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InputMediaPhoto,
+    InputMediaVideo,
+    Message,
+)
+
+from .config import settings
+from .logger import get_component_logger
+
+logger = get_component_logger("delivery")
+
+CARDS = "cards"
+ALBUM = "album"
+LIST = "list"
+CAROUSEL = "carousel"
+DELIVERY_MODES = (CARDS, ALBUM, LIST)
+
+# Telegram: ~1 сообщение/сек в чат на длинной дистанции, короткие всплески допустимы
+CHAT_BURST = 20
+CHAT_RATE = 1.0
+
+MEDIA_GROUP_LIMIT = 10
+CAPTION_LIMIT = 1024
+MESSAGE_LIMIT = 4096
+
+
+class PageItem(NamedTuple):
+    """Элемент страницы: карточка объявления (product_id задан) или вставка рекламы."""
+
+    text: str
+    photo: str | None = None
+    reply_markup: InlineKeyboardMarkup | None = None
+    product_id: int | None = None
+    media: list | None = None
+
+
+class ChatRateLimiter:
+    """Token bucket на чат: `burst` сообщений сразу, дальше `rate` в секунду."""
+
+    def __init__(self, burst: int = CHAT_BURST, rate: float = CHAT_RATE):
+        self.burst = burst
+        self.rate = rate
+        self._buckets: dict[int, tuple[float, float]] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    async def acquire(self, chat_id: int) -> None:
+        lock = self._locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(chat_id, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                await asyncio.sleep((1 - tokens) / self.rate)
+                now = time.monotonic()
+                tokens = 1.0
+            self._buckets[chat_id] = (tokens - 1, now)
+            if len(self._buckets) > 10_000:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Полностью восстановившиеся корзины ничем не отличаются от новых
+        full_after = self.burst / self.rate
+        for chat_id, (_, updated) in list(self._buckets.items()):
+            if now - updated > full_after and not self._locks[chat_id].locked():
+                del self._buckets[chat_id]
+                del self._locks[chat_id]
+
+
+chat_rate_limiter = ChatRateLimiter()
+
+
+async def _call(chat_id: int, request: Callable[[], Awaitable[Any]]) -> Any:
+    await chat_rate_limiter.acquire(chat_id)
+    try:
+        return await request()
+    except TelegramRetryAfter as e:
+        logger.warning(
+            "Flood control chat_id=%s retry_after=%s", chat_id, e.retry_after
+        )
+        await asyncio.sleep(e.retry_after)
+        return await request()
+
+
+def _item_request(bot: Bot, chat_id: int, item: PageItem):
+    if item.media:
+
+        async def send_media():
+            try:
+                return await bot.send_media_group(chat_id, item.media)
+            except TelegramRetryAfter:
+                raise
+            except Exception:
+                # Если медиа не отправилось — хотя бы текст
+                return await bot.send_message(chat_id, item.text)
+
+        return send_media
+    if item.photo:
+        return lambda: bot.send_photo(
+            chat_id, item.photo, caption=item.text, reply_markup=item.reply_markup
+        )
+    return lambda: bot.send_message(chat_id, item.text, reply_markup=item.reply_markup)
+
+
+async def _send_in_order(chat_id: int, requests: list) -> None:
+    for request in requests:
+        try:
+            await _call(chat_id, request)
+        except Exception as e:
+            logger.warning("Page item send failed chat_id=%s: %s", chat_id, e)
+
+
+def _items_keyboard(cards: list[PageItem]) -> InlineKeyboardMarkup:
+    rows = []
+    for n, item in enumerate(cards, start=1):
+        rows.append(
+            [
+                InlineKeyboardButton(
+                    text=f"{n}. Подробнее", callback_data=f"details:{item.product_id}"
+                ),
+                InlineKeyboardButton(
+                    text=f"{n}. Пожаловаться",
+                    callback_data=f"complaint:{item.product_id}",
+                ),
+            ]
+        )
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def _numbered(n: int, text: str) -> str:
+    return f"{n}. {text}"
+
+
+def _collapsed_requests(
+    bot: Bot, chat_id: int, cards: list[PageItem], mode: str
+) -> list:
+    keyboard = _items_keyboard(cards)
+    requests = []
+    if mode == ALBUM:
+        with_photo = [(n, c) for n, c in enumerate(cards, start=1) if c.photo]
+        with_photo = with_photo[:MEDIA_GROUP_LIMIT]
+        if len(with_photo) >= 2:
+            album = [
+                InputMediaPhoto(
+                    media=c.photo, caption=_numbered(n, c.text)[:CAPTION_LIMIT]
+                )
+                for n, c in with_photo
+            ]
+            in_album = {n for n, _ in with_photo}
+            rest = [
+                _numbered(n, c.text)
+                for n, c in enumerate(cards, start=1)
+                if n not in in_album
+            ]
+            requests.append(lambda: bot.send_media_group(chat_id, album))
+            text = "\n\n".join(rest) or "Выберите объявление:"
+            requests.append(
+                lambda: bot.send_message(
+                    chat_id, text[:MESSAGE_LIMIT], reply_markup=keyboard
+                )
+            )
+            return requests
+
+    text = "\n\n".join(_numbered(n, c.text) for n, c in enumerate(cards, start=1))
+    requests.append(
+        lambda: bot.send_message(chat_id, text[:MESSAGE_LIMIT], reply_markup=keyboard)
+    )
+    return requests
+
+
+async def deliver_page(
+    message: Message, items: list[PageItem], mode: str | None = None
+) -> None:
+    """Отправить страницу в чат `message`, сохранив порядок элементов.
+
+    В режимах ``album``/``list`` карточки сворачиваются в 1–2 сообщения,
+    вставки рекламы уходят отдельными сообщениями после них.
+    """
+    mode = mode or settings.PAGE_DELIVERY_MODE
+    if mode not in DELIVERY_MODES:
+        mode = ALBUM
+    bot = message.bot
+    chat_id = message.chat.id
+
+    if mode == CARDS:
+        requests = [_item_request(bot, chat_id, item) for item in items]
+    else:
+        cards = [item for item in items if item.product_id is not None]
+        extras = [item for item in items if item.product_id is None]
+        requests = _collapsed_requests(bot, chat_id, cards, mode) if cards else []
+        requests += [_item_request(bot, chat_id, item) for item in extras]
+
+    started = time.perf_counter()
+    await _send_in_order(chat_id, requests)
+    logger.info(
+        "Page delivered chat_id=%s mode=%s items=%s requests=%s in %.3fs",
+        chat_id,
+        mode,
+        len(items),
+        len(requests),
+        time.perf_counter() - started,
+    )
+
+
+class Slide(NamedTuple):
+    """Кадр карусели: текст (подпись), необязательное медиа и клавиатура."""
+
+    text: str
+    media: str | None = None
+    media_type: str = "photo"
+    reply_markup: InlineKeyboardMarkup | None = None
+    parse_mode: str | None = None
+
+
+def carousel_enabled() -> bool:
+    return settings.PAGE_DELIVERY_MODE == CAROUSEL
+
+
+def slide_ref(message: Message) -> list:
+    """Ссылка на сообщение карусели для FSM: [message_id, есть ли медиа]."""
+    return [message.message_id, bool(message.photo or message.video)]
+
+
+def _parse_mode(slide: Slide) -> dict:
+    # None — значит parse_mode бота по умолчанию
+    return {"parse_mode": slide.parse_mode} if slide.parse_mode else {}
+
+
+def _input_media(slide: Slide):
+    media_cls = InputMediaVideo if slide.media_type == "video" else InputMediaPhoto
+    return media_cls(
+        media=slide.media, caption=slide.text[:CAPTION_LIMIT], **_parse_mode(slide)
+    )
+
+
+async def show_slide(
+    bot: Bot, chat_id: int, slide: Slide, current: list | None = None
+) -> list:
+    """Показать кадр карусели, по возможности отредактировав `current`.
+
+    Листание стоит один запрос: медиа -> медиа через `edit_message_media`,
+    текст -> текст через `edit_message_text`. Превратить текстовое сообщение
+    в медиа (и обратно) Telegram не позволяет — тогда старое сообщение
+    удаляется и отправляется новое. Возвращает ссылку на актуальное сообщение.
+    """
+    if current:
+        message_id, has_media = current
+        try:
+            if has_media and slide.media:
+                await _call(
+                    chat_id,
+                    lambda: bot.edit_message_media(
+                        media=_input_media(slide),
+                        chat_id=chat_id,
+                        message_id=message_id,
+                        reply_markup=slide.reply_markup,
+                    ),
+                )
+                return [message_id, True]
+            if not has_media and not slide.media:
+                await _call(
+                    chat_id,
+                    lambda: bot.edit_message_text(
+                        text=slide.text[:MESSAGE_LIMIT],
+                        chat_id=chat_id,
+                        message_id=message_id,
+                        reply_markup=slide.reply_markup,
+                        **_parse_mode(slide),
+                    ),
+                )
+                return [message_id, False]
+        except TelegramBadRequest as e:
+            if "message is not modified" in str(e):
+                return [message_id, has_media]
+            logger.warning("Carousel edit failed chat_id=%s: %s", chat_id, e)
+        try:
+            await bot.delete_message(chat_id, message_id)
+        except TelegramBadRequest:
+            pass
+
+    if slide.media and slide.media_type == "video":
+        request = lambda: bot.send_video(
+            chat_id,
+            slide.media,
+            caption=slide.text[:CAPTION_LIMIT],
+            reply_markup=slide.reply_markup,
+            **_parse_mode(slide),
+        )
+    elif slide.media:
+        request = lambda: bot.send_photo(
+            chat_id,
+            slide.media,
+            caption=slide.text[:CAPTION_LIMIT],
+            reply_markup=slide.reply_markup,
+            **_parse_mode(slide),
+        )
+    else:
+        request = lambda: bot.send_message(
+            chat_id,
+            slide.text[:MESSAGE_LIMIT],
+            reply_markup=slide.reply_markup,
+            **_parse_mode(slide),
+        )
+    sent = await _call(chat_id, request)
+    return slide_ref(sent)
+
+
+async def replace_with_text(message: Message, text: str, reply_markup=None) -> None:
+    """Заменить сообщение (например, кадр карусели с фото) текстовым."""
+    if message.photo or message.video:
+        try:
+            await message.delete()
+        except TelegramBadRequest:
+            pass
+        await message.answer(text, reply_markup=reply_markup)
+    else:
+        await message.edit_text(text, reply_markup=reply_markup)
@@ -0,0 +1,111 @@
+"""Фоновые задачи: рассылки, уведомления, переиндексация.
+
+Хендлеры не выполняют долгие отправки сами, а ставят задачу:
+`await enqueue_job("notify_product", product_id=...)`.
+
+- ``JOBS_MODE=inline`` (по умолчанию) — задача запускается фоновой
+  asyncio-задачей в процессе бота, как раньше, но не держит апдейт;
+- ``JOBS_MODE=worker`` — задача кладётся в Redis-список `jobs:queue`,
+  её забирает отдельный процесс `python -m rovmarket_bot.worker`,
+  и пользовательский поллер не делит event loop с длинными рассылками.
+
+Обработчик регистрируется декоратором `@register_job(name)` и вызывается
+как `handler(bot, **payload)`; payload должен сериализоваться в JSON.
+Доставка — не более одного раза: упавшая задача логируется и не повторяется.
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+from .cache import redis_cache
+from .config import bot, settings
+from .logger import get_component_logger
+
+logger = get_component_logger("jobs")
+
+JOBS_QUEUE = "jobs:queue"
+INLINE = "inline"
+WORKER = "worker"
+
+JobHandler = Callable[..., Awaitable]
+
+_handlers: dict[str, JobHandler] = {}
+
+# Ссылки на задачи inline-режима, чтобы их не собрал GC до завершения
+_inline_tasks: set[asyncio.Task] = set()
+
+
+def register_job(name: str):
+    def decorator(handler: JobHandler) -> JobHandler:
+        _handlers[name] = handler
+        return handler
+
+    return decorator
+
+
+async def run_job(name: str, payload: dict) -> None:
+    handler = _handlers.get(name)
+    if handler is None:
+        logger.error("Unknown job %s", name)
+        return
+    try:
+        await handler(bot, **payload)
+    except Exception:
+        logger.exception("Job %s failed payload=%s", name, payload)
+
+
+def _run_inline(name: str, payload: dict) -> None:
+    task = asyncio.create_task(run_job(name, payload))
+    _inline_tasks.add(task)
+    task.add_done_callback(_inline_tasks.discard)
+
+
+async def enqueue_job(name: str, **payload) -> None:
+    """Поставить задачу; если очередь недоступна — выполнить в этом процессе."""
+    if settings.JOBS_MODE == WORKER:
+        try:
+            await redis_cache.lpush(
+                JOBS_QUEUE, json.dumps({"name": name, "payload": payload})
+            )
+            return
+        except Exception as e:
+            logger.warning("Job queue unavailable, running %s inline: %s", name, e)
+    _run_inline(name, payload)
+
+
+async def consume_jobs(concurrency: int | None = None) -> None:
+    """Цикл воркера: забирать задачи из очереди и выполнять до `concurrency` сразу."""
+    semaphore = asyncio.Semaphore(concurrency or settings.JOBS_CONCURRENCY)
+    running: set[asyncio.Task] = set()
+
+    async def run(name: str, payload: dict) -> None:
+        try:
+            await run_job(name, payload)
+        finally:
+            semaphore.release()
+
+    while True:
+        await semaphore.acquire()
+        try:
+            item = await redis_cache.brpop(JOBS_QUEUE, timeout=5)
+        except Exception as e:
+            semaphore.release()
+            logger.warning("Job queue read failed: %s", e)
+            await asyncio.sleep(1)
+            continue
+        if item is None:
+            semaphore.release()
+            continue
+
+        try:
+            job = json.loads(item[1])
+            name, payload = job["name"], job.get("payload") or {}
+        except (ValueError, KeyError, TypeError):
+            semaphore.release()
+            logger.error("Malformed job dropped: %r", item[1])
+            continue
+
+        task = asyncio.create_task(run(name, payload))
+        running.add(task)
+        task.add_done_callback(running.discard)
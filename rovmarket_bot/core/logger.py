@@ -1,12 +1,41 @@
+"""Логи компонентов: `get_component_logger("search")` → logs/search.log.
+
+Записи не пишутся на диск в потоке event loop: логгер компонента кладёт
+их в общую очередь (`QueueHandler`), а файлы пишет отдельный поток
+`QueueListener`. Формат — JSON по строке на запись: время, уровень,
+компонент, сообщение и, если известны, user_id, update_id (их проставляет
+`LogContextMiddleware`) и duration_ms (передаётся через `extra`).
+
+Частые INFO-записи можно сэмплировать: LOG_INFO_SAMPLE_RATE — общая доля
+сохраняемых записей, LOG_SAMPLE_RATES — переопределения по компонентам
+("search=0.1,chat=0.5"). WARNING и выше пишутся всегда.
+"""
+
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import os
+import queue
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 
-from .config import BASE_DIR
+from .config import BASE_DIR, settings
 
 
 LOGS_DIR: Path = BASE_DIR.parent / "logs"
 
+LOGGER_PREFIX = "rovmarket_bot."
+
+# Поля контекста апдейта, которые попадают в каждую запись
+CONTEXT_FIELDS = ("user_id", "update_id")
+EXTRA_FIELDS = CONTEXT_FIELDS + ("duration_ms",)
+
+_log_context: ContextVar[dict | None] = ContextVar("log_context", default=None)
+
 
 def _ensure_logs_dir_exists() -> None:
     try:
@@ -16,6 +45,159 @@ def _ensure_logs_dir_exists() -> None:
         pass
 
 
+def bind_log_context(**fields):
+    """Привязать поля (user_id, update_id) к текущей задаче; вернуть токен для сброса."""
+    return _log_context.set({**(_log_context.get() or {}), **fields})
+
+
+def reset_log_context(token) -> None:
+    _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Копирует контекст апдейта в запись — до того, как она уйдёт в другой поток."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in (_log_context.get() or {}).items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает долю `rate` записей ниже WARNING; остальные — всегда."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "component": record.name.removeprefix(LOGGER_PREFIX),
+            "message": record.getMessage(),
+        }
+        for key in EXTRA_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                payload[key] = value
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class ComponentFileHandler(logging.Handler):
+    """Раскладывает записи по файлам logs/<component>.log (ротация раз в сутки, 7 копий)."""
+
+    def __init__(self):
+        super().__init__()
+        self._files: dict[str, TimedRotatingFileHandler] = {}
+        self._formatter = JsonFormatter()
+
+    def _file_for(self, component: str) -> TimedRotatingFileHandler:
+        handler = self._files.get(component)
+        if handler is None:
+            _ensure_logs_dir_exists()
+            handler = TimedRotatingFileHandler(
+                filename=str(LOGS_DIR / f"{component}.log"),
+                when="midnight",
+                backupCount=7,
+                encoding="utf-8",
+            )
+            handler.setFormatter(self._formatter)
+            self._files[component] = handler
+        return handler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._file_for(record.name.removeprefix(LOGGER_PREFIX)).handle(record)
+
+    def close(self) -> None:
+        # Close file handlers to release file locks
+        for handler in self._files.values():
+            try:
+                handler.close()
+            except Exception:
+                pass
+        self._files.clear()
+        super().close()
+
+
+_EXC_FORMATTER = logging.Formatter()
+
+
+class _RecordQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение и traceback готовятся здесь, поля extra остаются отдельными —
+        # их разложит JsonFormatter в потоке записи
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+_listener: QueueListener | None = None
+
+
+def _start_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = QueueListener(_LOG_QUEUE, ComponentFileHandler())
+        _listener.start()
+
+
+def _stop_listener() -> None:
+    """Дописать очередь и закрыть файлы."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def _restart_listener_in_child() -> None:
+    # Поток записи не переживает fork (воркеры вебхука) — запускаем свой
+    global _listener
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def _parse_sample_rates(raw: str) -> dict[str, float]:
+    rates = {}
+    for item in raw.split(","):
+        component, _, rate = item.partition("=")
+        try:
+            rates[component.strip()] = float(rate)
+        except ValueError:
+            continue
+    return rates
+
+
+def get_sample_rate(component: str) -> float:
+    overrides = _parse_sample_rates(settings.LOG_SAMPLE_RATES)
+    return overrides.get(component, settings.LOG_INFO_SAMPLE_RATE)
+
+
 _LOGGING_ENABLED_CACHE: bool | None = None
 
 
@@ -24,44 +206,43 @@ def set_logging_enabled(enabled: bool) -> None:
     _LOGGING_ENABLED_CACHE = bool(enabled)
 
 
+def _configure_logger(logger: logging.Logger, component: str, enabled: bool) -> None:
+    # Remove existing handlers before attaching the current ones
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    if enabled:
+        _start_listener()
+        handler = _RecordQueueHandler(_LOG_QUEUE)
+        handler.addFilter(SamplingFilter(get_sample_rate(component)))
+        handler.addFilter(ContextFilter())
+        logger.addHandler(handler)
+    else:
+        logger.addHandler(logging.NullHandler())
+
+
 def apply_logging_configuration(enabled: bool) -> None:
     """Apply logging on/off to all existing component loggers at runtime."""
     set_logging_enabled(enabled)
 
     # Iterate over all known loggers and reconfigure ours
-    for logger_name, logger_obj in logging.root.manager.loggerDict.items():
+    for logger_name in list(logging.root.manager.loggerDict):
         # loggerDict may contain PlaceHolder objects; get real logger via getLogger
-        if not isinstance(logger_name, str) or not logger_name.startswith("rovmarket_bot."):
+        if not isinstance(logger_name, str) or not logger_name.startswith(
+            LOGGER_PREFIX
+        ):
             continue
+        _configure_logger(
+            logging.getLogger(logger_name),
+            logger_name.removeprefix(LOGGER_PREFIX),
+            enabled,
+        )
 
-        logger = logging.getLogger(logger_name)
-
-        # Remove existing handlers and close them to release file locks
-        for handler in list(logger.handlers):
-            try:
-                handler.close()
-            except Exception:
-                pass
-            logger.removeHandler(handler)
-
-        logger.setLevel(logging.INFO)
-        logger.propagate = False
-
-        if enabled:
-            _ensure_logs_dir_exists()
-            component = logger_name.split(".", 1)[1] if "." in logger_name else logger_name
-            log_file = LOGS_DIR / f"{component}.log"
-            file_handler = TimedRotatingFileHandler(
-                filename=str(log_file), when="midnight", backupCount=7, encoding="utf-8"
-            )
-            formatter = logging.Formatter(
-                fmt="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
-                datefmt="%Y-%m-%d %H:%M:%S",
-            )
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-        else:
-            logger.addHandler(logging.NullHandler())
+    if not enabled:
+        _stop_listener()
 
 
 def _get_logging_enabled() -> bool:
@@ -76,35 +257,16 @@ def _get_logging_enabled() -> bool:
 def get_component_logger(component_name: str) -> logging.Logger:
     """Return a configured logger for a given component.
 
-    - Writes into logs/<component_name>.log if logging is enabled
+    - Writes JSON lines into logs/<component_name>.log if logging is enabled
+    - Disk writes happen on the queue listener thread, not the event loop
     - Uses daily rotation, keeps 7 backups
     - Non-propagating to avoid duplicate logs
     """
-    logger_name = f"rovmarket_bot.{component_name}"
-    logger = logging.getLogger(logger_name)
+    logger = logging.getLogger(f"{LOGGER_PREFIX}{component_name}")
 
     if getattr(logger, "_is_configured", False):
         return logger
 
-    logger.setLevel(logging.INFO)
-
-    if _get_logging_enabled():
-        _ensure_logs_dir_exists()
-        log_file = LOGS_DIR / f"{component_name}.log"
-        file_handler = TimedRotatingFileHandler(
-            filename=str(log_file), when="midnight", backupCount=7, encoding="utf-8"
-        )
-        formatter = logging.Formatter(
-            fmt="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    else:
-        logger.addHandler(logging.NullHandler())
-
-    logger.propagate = False
+    _configure_logger(logger, component_name, _get_logging_enabled())
     setattr(logger, "_is_configured", True)
     return logger
-
-
@@ -0,0 +1,308 @@
+"""Метрики обработки апдейтов: задержки хендлеров, запросы к БД, Redis, Telegram API.
+
+Счётчики текущего апдейта живут в contextvar (`UpdateStats`):
+
+- запросы к БД и время в них — события `before/after_cursor_execute`
+  движков `db_helper` (`instrument_engine`);
+- обращения к Redis — по одному на отправку команды или pipeline
+  (`instrument_redis`);
+- вызовы Telegram API — request-middleware сессии бота.
+
+`UpdateMetricsMiddleware` открывает счётчики на апдейт, а
+`HandlerMetricsMiddleware` относит задержку и счётчики к хендлеру и роутеру
+(см. middleware/metrics_middleware.py). Агрегаты — гистограммы с
+фиксированными корзинами — хранятся в памяти процесса: сводка в админке
+(«⏱ Производительность») и текст для Prometheus на METRICS_PATH вебхук-сервера.
+У каждого воркера вебхука свои агрегаты.
+"""
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+# Корзины гистограмм: задержки в мс и число запросов к БД на апдейт
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "total")
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+@dataclass
+class UpdateStats:
+    db_queries: int = 0
+    db_time_ms: float = 0.0
+    redis_calls: int = 0
+    api_calls: int = 0
+
+
+@dataclass
+class HandlerStats:
+    router: str
+    latency: Histogram = field(default_factory=Histogram)
+    db_queries: Histogram = field(default_factory=lambda: Histogram(QUERY_BUCKETS))
+    db_time_ms: float = 0.0
+    redis_calls: int = 0
+    api_calls: int = 0
+    errors: int = 0
+
+
+_current: ContextVar[UpdateStats | None] = ContextVar("update_stats", default=None)
+
+# Агрегаты процесса
+handlers: dict[str, HandlerStats] = {}
+routers: dict[str, Histogram] = {}
+updates: dict[str, Histogram] = {}
+update_queries: dict[str, Histogram] = {}
+api_methods: dict[str, int] = {}
+totals = UpdateStats()
+
+
+def start_update() -> tuple[UpdateStats, object]:
+    stats = UpdateStats()
+    return stats, _current.set(stats)
+
+
+def finish_update(
+    token, event_type: str, stats: UpdateStats, duration_ms: float
+) -> None:
+    _current.reset(token)
+    updates.setdefault(event_type, Histogram()).observe(duration_ms)
+    update_queries.setdefault(event_type, Histogram(QUERY_BUCKETS)).observe(
+        stats.db_queries
+    )
+
+
+def current_stats() -> UpdateStats | None:
+    return _current.get()
+
+
+def snapshot() -> UpdateStats:
+    """Копия счётчиков текущего апдейта — чтобы посчитать дельту хендлера."""
+    stats = _current.get()
+    return UpdateStats(**vars(stats)) if stats else UpdateStats()
+
+
+def record_handler(
+    name: str,
+    router: str,
+    duration_ms: float,
+    before: UpdateStats,
+    failed: bool = False,
+) -> None:
+    after = _current.get() or UpdateStats()
+    stats = handlers.get(name)
+    if stats is None:
+        stats = handlers[name] = HandlerStats(router=router)
+    stats.latency.observe(duration_ms)
+    stats.db_queries.observe(after.db_queries - before.db_queries)
+    stats.db_time_ms += after.db_time_ms - before.db_time_ms
+    stats.redis_calls += after.redis_calls - before.redis_calls
+    stats.api_calls += after.api_calls - before.api_calls
+    stats.errors += failed
+    routers.setdefault(router, Histogram()).observe(duration_ms)
+
+
+def record_api_call(method: str) -> None:
+    api_methods[method] = api_methods.get(method, 0) + 1
+    totals.api_calls += 1
+    stats = _current.get()
+    if stats is not None:
+        stats.api_calls += 1
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Старт — на контексте выполнения: он свой у каждого выражения, так что
+    # упавший запрос (after_cursor_execute для него не приходит) не сбивает
+    # замеры следующих
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def query_duration_ms(context) -> float | None:
+    """Время выражения с before_cursor_execute (None, если старт не записан)."""
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def _count_query(elapsed_ms: float) -> None:
+    totals.db_queries += 1
+    totals.db_time_ms += elapsed_ms
+    stats = _current.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_time_ms += elapsed_ms
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = query_duration_ms(context)
+    if elapsed_ms is not None:
+        _count_query(elapsed_ms)
+
+
+def _handle_error(exception_context) -> None:
+    # Упавший запрос тоже занимал БД — считаем его и сбрасываем старт
+    context = exception_context.execution_context
+    elapsed_ms = query_duration_ms(context)
+    if elapsed_ms is not None:
+        context._query_start = None
+        _count_query(elapsed_ms)
+
+
+def track_query_start(engine) -> None:
+    """Записывать старт каждого выражения (один хук на движок для метрик и
+    профилировщика запросов)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def instrument_engine(engine) -> None:
+    """Считать запросы и время в БД (AsyncEngine или Engine)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    track_query_start(sync_engine)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _count_redis_call() -> None:
+    totals.redis_calls += 1
+    stats = _current.get()
+    if stats is not None:
+        stats.redis_calls += 1
+
+
+def instrument_redis(client):
+    """Считать обращения к Redis клиента (redis.asyncio.Redis); вернуть клиент."""
+    pool = client.connection_pool
+    base = pool.connection_class
+
+    class CountingConnection(base):
+        async def send_packed_command(self, command, check_health: bool = True):
+            _count_redis_call()
+            return await super().send_packed_command(command, check_health)
+
+    CountingConnection.__name__ = f"Counting{base.__name__}"
+    pool.connection_class = CountingConnection
+    return client
+
+
+def _fmt_ms(value: float) -> str:
+    return ">10s" if value == float("inf") else f"{value:.0f}"
+
+
+def render_summary(limit: int = 10) -> str:
+    """Сводка для админки: самые затратные хендлеры по суммарному времени."""
+    lines = [
+        f"⏱ Апдейтов: {sum(h.count for h in updates.values())}, "
+        f"запросов к БД: {totals.db_queries} ({totals.db_time_ms / 1000:.1f} с), "
+        f"Redis: {totals.redis_calls}, Telegram API: {totals.api_calls}",
+    ]
+    for event_type, hist in sorted(updates.items()):
+        queries = update_queries.get(event_type)
+        lines.append(
+            f"• {event_type}: {hist.count} шт., p50 {_fmt_ms(hist.quantile(0.5))} мс, "
+            f"p95 {_fmt_ms(hist.quantile(0.95))} мс, "
+            f"запросов в среднем {queries.mean if queries else 0:.1f}"
+        )
+
+    top = sorted(handlers.items(), key=lambda item: item[1].latency.total, reverse=True)
+    if top:
+        lines.append("")
+        lines.append("Хендлеры (по суммарному времени):")
+    for name, stats in top[:limit]:
+        lines.append(
+            f"{name} [{stats.router}]: {stats.latency.count} выз., "
+            f"p50 {_fmt_ms(stats.latency.quantile(0.5))} / p95 {_fmt_ms(stats.latency.quantile(0.95))} мс, "
+            f"БД {stats.db_queries.mean:.1f} запр. (макс ≤{_fmt_ms(stats.db_queries.quantile(1.0))}), "
+            f"API {stats.api_calls / stats.latency.count:.1f}"
+            + (f", ошибок {stats.errors}" if stats.errors else "")
+        )
+    return "\n".join(lines)
+
+
+def _prometheus_histogram(
+    lines: list[str], metric: str, labels: str, hist: Histogram
+) -> None:
+    cumulative = 0
+    for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f"{metric}_sum{{{labels}}} {hist.total}")
+    lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+
+def render_prometheus() -> str:
+    """Агрегаты процесса в текстовом формате Prometheus."""
+    lines = [
+        "# TYPE rovmarket_update_latency_ms histogram",
+    ]
+    for event_type, hist in updates.items():
+        _prometheus_histogram(
+            lines, "rovmarket_update_latency_ms", f'event_type="{event_type}"', hist
+        )
+    lines.append("# TYPE rovmarket_update_db_queries histogram")
+    for event_type, hist in update_queries.items():
+        _prometheus_histogram(
+            lines, "rovmarket_update_db_queries", f'event_type="{event_type}"', hist
+        )
+    lines.append("# TYPE rovmarket_router_latency_ms histogram")
+    for router, hist in routers.items():
+        _prometheus_histogram(
+            lines, "rovmarket_router_latency_ms", f'router="{router}"', hist
+        )
+    lines.append("# TYPE rovmarket_handler_latency_ms histogram")
+    for name, stats in handlers.items():
+        labels = f'handler="{name}",router="{stats.router}"'
+        _prometheus_histogram(
+            lines, "rovmarket_handler_latency_ms", labels, stats.latency
+        )
+    lines.append("# TYPE rovmarket_handler_db_queries histogram")
+    for name, stats in handlers.items():
+        labels = f'handler="{name}",router="{stats.router}"'
+        _prometheus_histogram(
+            lines, "rovmarket_handler_db_queries", labels, stats.db_queries
+        )
+    lines.append("# TYPE rovmarket_telegram_api_calls_total counter")
+    for method, count in api_methods.items():
+        lines.append(f'rovmarket_telegram_api_calls_total{{method="{method}"}} {count}')
+    lines.append("# TYPE rovmarket_db_queries_total counter")
+    lines.append(f"rovmarket_db_queries_total {totals.db_queries}")
+    lines.append("# TYPE rovmarket_db_time_ms_total counter")
+    lines.append(f"rovmarket_db_time_ms_total {totals.db_time_ms}")
+    lines.append("# TYPE rovmarket_redis_calls_total counter")
+    lines.append(f"rovmarket_redis_calls_total {totals.redis_calls}")
+    return "\n".join(lines) + "\n"
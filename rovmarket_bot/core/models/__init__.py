@@ -13,12 +13,9 @@ __all__ = [
     "BotSettings",
     "Chat",
     "ChatMessage",
-    "ChatPhoto",
-    "ChatVideo",
-    "ChatSticker",
-    "ChatAudio",
-    "ChatVoice",
-    "ChatDocument",
+    "ChatAttachment",
+    "DailyStats",
+    "DailyPosterStats",
     "db_helper",
     "DatabaseHelper",
 ]
@@ -37,9 +34,5 @@ from .advertisement import Advertisement
 from .advertisement import AdMedia
 from .settings import BotSettings
 from .chat import Chat, ChatMessage
-from .chat_photo import ChatPhoto
-from .chat_video import ChatVideo
-from .chat_sticker import ChatSticker
-from .chat_audio import ChatAudio
-from .chat_document import ChatDocument
-from .chat_voice import ChatVoice
+from .chat_attachment import ChatAttachment
+from .daily_stats import DailyStats, DailyPosterStats
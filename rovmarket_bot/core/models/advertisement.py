@@ -15,7 +15,9 @@ class Advertisement(Base):
     # Период показа: day | week | month (для удобства фильтра)
     duration: Mapped[str] = mapped_column(String, default="day")
     # Временные границы показа
-    starts_at: Mapped[datetime | None] = mapped_column(DateTime, default=datetime.utcnow)
+    starts_at: Mapped[datetime | None] = mapped_column(
+        DateTime, default=datetime.utcnow
+    )
     ends_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     # Флаг закрепления (актуален для рассылки)
     pinned: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -24,7 +26,10 @@ class Advertisement(Base):
 
     # Связь с медиа (1 ко многим)
     media = relationship(
-        "AdMedia", back_populates="advertisement", cascade="all, delete-orphan"
+        "AdMedia",
+        back_populates="advertisement",
+        cascade="all, delete-orphan",
+        lazy="raise",
     )
 
 
@@ -13,6 +13,7 @@ class Categories(Base):
     products = relationship(
         "Product",
         back_populates="category",
+        lazy="raise",
     )
 
     # Users subscribed to notifications for this category
@@ -20,7 +21,7 @@ class Categories(Base):
         "User",
         secondary="user_category_notification",
         back_populates="subscribed_categories",
-        lazy="selectin",
+        lazy="raise",
     )
 
     created_at: Mapped[datetime] = mapped_column(
@@ -22,7 +22,7 @@ class Chat(Base):
     seller = relationship("User", foreign_keys=[seller_id], backref="chats_as_seller")
 
     messages = relationship(
-        "ChatMessage", back_populates="chat", cascade="all, delete-orphan"
+        "ChatMessage", back_populates="chat", cascade="all, delete-orphan", lazy="raise"
     )
 
 
@@ -37,46 +37,12 @@ class ChatMessage(Base):
 
     sender = relationship("User", backref="messages_sent")
     chat = relationship("Chat", back_populates="messages")
-    photos = relationship(
-        "ChatPhoto",
-        back_populates="chat",
+    attachments = relationship(
+        "ChatAttachment",
+        back_populates="message",
         cascade="all, delete-orphan",
-        lazy="joined",
-    )
-
-    videos = relationship(
-        "ChatVideo",
-        back_populates="chat",
-        cascade="all, delete-orphan",
-        lazy="joined",
-    )
-
-    stickers = relationship(
-        "ChatSticker",
-        back_populates="chat",
-        cascade="all, delete-orphan",
-        lazy="joined",
-    )
-
-    documents = relationship(
-        "ChatDocument",
-        back_populates="chat",
-        cascade="all, delete-orphan",
-        lazy="joined",
-    )
-
-    audios = relationship(
-        "ChatAudio",
-        back_populates="chat",
-        cascade="all, delete-orphan",
-        lazy="joined",
-    )
-
-    voices = relationship(
-        "ChatVoice",
-        back_populates="chat",
-        cascade="all, delete-orphan",
-        lazy="joined",
+        order_by="ChatAttachment.position",
+        lazy="raise",
     )
 
     created_at: Mapped[datetime] = mapped_column(
@@ -0,0 +1,24 @@
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from .base import Base
+
+# Виды вложений сообщения чата; ключ в записях/истории — kind + "s"
+ATTACHMENT_KINDS = ("photo", "video", "sticker", "audio", "voice", "document")
+
+
+class ChatAttachment(Base):
+    __tablename__ = "chat_attachment"
+
+    message_id: Mapped[int] = mapped_column(
+        ForeignKey("chat_message.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    file_id: Mapped[str] = mapped_column(String, nullable=False)
+    position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    message = relationship("ChatMessage", back_populates="attachments")
+
+    # История читается диапазоном по message_id в порядке вложений
+    __table_args__ = (
+        Index("ix_chat_attachment_message_id_position", "message_id", "position"),
+    )
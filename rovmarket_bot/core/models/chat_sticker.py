@@ -1,14 +0,0 @@
-from sqlalchemy import ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from .base import Base
-
-
-class ChatSticker(Base):
-    __tablename__ = "chat_sticker"
-
-    chat_id: Mapped[int] = mapped_column(
-        ForeignKey("chat_message.id", ondelete="CASCADE"), nullable=False
-    )
-    sticker_url: Mapped[str] = mapped_column(String)
-
-    chat = relationship("ChatMessage", back_populates="stickers")
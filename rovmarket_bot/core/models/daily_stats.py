@@ -0,0 +1,33 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+
+class DailyStats(Base):
+    """Счётчики за сутки (UTC) для админской статистики."""
+
+    __tablename__ = "daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, unique=True, nullable=False)
+    new_users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    new_products: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    views: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    approvals: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class DailyPosterStats(Base):
+    """Сколько объявлений пользователь создал за сутки — для топа авторов."""
+
+    __tablename__ = "daily_poster_stats"
+
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), nullable=False
+    )
+    products_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "user_id", name="unique_daily_poster_day_user"),
+    )
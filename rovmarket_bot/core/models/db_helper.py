@@ -1,3 +1,10 @@
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, InterfaceError
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
@@ -6,31 +13,210 @@ from sqlalchemy.ext.asyncio import (
 )
 from asyncio import current_task
 from rovmarket_bot.core.config import settings
+from rovmarket_bot.core import metrics, query_profiler
+
+# Сессия текущего апдейта (её открывает DbSessionMiddleware)
+_update_session: ContextVar[AsyncSession | None] = ContextVar(
+    "update_session", default=None
+)
+
+
+class _SharedSession:
+    """`async with` над общей сессией апдейта.
+
+    На выходе блок ведёт себя как отдельная сессия: при исключении
+    транзакция откатывается (следующий блок апдейта не получит
+    PendingRollbackError), а незакоммиченное отбрасывается. На выходе из
+    внешнего блока сессия закрывается — соединение возвращается в пул и не
+    висит idle-in-transaction во время вызовов Telegram API и ожиданий;
+    следующий блок возьмёт соединение заново. После close() объект сессии
+    остаётся пригодным для повторного использования.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def __aenter__(self) -> AsyncSession:
+        self.session.info["shared_depth"] = self.session.info.get("shared_depth", 0) + 1
+        return self.session
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        depth = self.session.info["shared_depth"] - 1
+        self.session.info["shared_depth"] = depth
+        if exc is not None:
+            await self.session.rollback()
+        if depth == 0:
+            # Вложенные блоки сессию не закрывают — внешний ещё работает с её
+            # объектами. close() откатывает открытую транзакцию и отвязывает
+            # объекты, не помечая их устаревшими — загруженные поля доступны
+            await self.session.close()
+        return False
+
+
+# Сколько секунд не отправлять чтение на реплику после ошибки соединения
+REPLICA_RETRY_AFTER = 30
+
+
+def _is_connection_error(exc: BaseException) -> bool:
+    """Обрыв/недоступность соединения (а не ошибка самого запроса)."""
+    if isinstance(exc, DBAPIError) and (
+        exc.connection_invalidated or isinstance(exc, InterfaceError)
+    ):
+        return True
+    while exc is not None:
+        if isinstance(exc, (OSError, TimeoutError)):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+class _ReplicaSession:
+    """Сессия на реплике: при обрыве соединения реплика временно выводится
+    из ротации, и следующие чтения идут на другую реплику или на primary."""
+
+    def __init__(self, helper: "DatabaseHelper", index: int):
+        self.helper = helper
+        self.index = index
+        self.session = helper.replica_sessionmakers[index]()
+
+    async def __aenter__(self) -> AsyncSession:
+        return await self.session.__aenter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc is not None and _is_connection_error(exc):
+            self.helper.mark_replica_down(self.index)
+        return await self.session.__aexit__(exc_type, exc, tb)
+
+
+def engine_options(url: str) -> dict:
+    """Параметры пула и драйвера из настроек.
+
+    Для SQLite (локальная разработка) пул не настраиваем — у aiosqlite
+    свои пулы; asyncpg получает кэш подготовленных выражений
+    и statement_timeout на уровне соединения.
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {}
+
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+            },
+        }
+    return options
 
 
 class DatabaseHelper:
-    def __init__(self, url: str, echo: bool = False):
+    def __init__(self, url: str, echo: bool = False, replica_urls=()):
         self.engine = create_async_engine(
             url=url,
             echo=echo,
+            **engine_options(url),
         )
-        self.session_factory = async_sessionmaker(
-            bind=self.engine,
+        self.sessionmaker = self._make_sessionmaker(self.engine)
+
+        # Реплики только для чтения: тяжёлые ленты, поиск, статистика
+        self.replica_engines = [
+            create_async_engine(
+                url=replica_url, echo=echo, **engine_options(replica_url)
+            )
+            for replica_url in replica_urls
+        ]
+        self.replica_sessionmakers = [
+            self._make_sessionmaker(engine) for engine in self.replica_engines
+        ]
+        for engine in (self.engine, *self.replica_engines):
+            metrics.instrument_engine(engine)
+            query_profiler.instrument_engine(engine)
+        self._replica_down_until = [0.0] * len(self.replica_engines)
+        self._replica_counter = itertools.count()
+
+    @staticmethod
+    def _make_sessionmaker(engine):
+        return async_sessionmaker(
+            bind=engine,
             expire_on_commit=False,
             autocommit=False,
             autoflush=False,
         )
 
+    def _pick_replica(self) -> int | None:
+        """Следующая живая реплика по кругу или None, если живых нет."""
+        count = len(self.replica_engines)
+        if not count:
+            return None
+        now = time.monotonic()
+        start = next(self._replica_counter)
+        for offset in range(count):
+            index = (start + offset) % count
+            if self._replica_down_until[index] <= now:
+                return index
+        return None
+
+    def mark_replica_down(self, index: int) -> None:
+        self._replica_down_until[index] = time.monotonic() + REPLICA_RETRY_AFTER
+
+    def session_factory(self, readonly: bool = False):
+        """Сессия для `async with`.
+
+        Внутри апдейта возвращает общую сессию апдейта (один объект сессии
+        на апдейт; соединение держится только внутри блока `async with`),
+        вне апдейта — новую.
+        readonly=True отправляет запросы на реплику, если она настроена
+        и доступна, иначе — так же на primary.
+        """
+        if readonly:
+            index = self._pick_replica()
+            if index is not None:
+                return _ReplicaSession(self, index)
+
+        session = _update_session.get()
+        if session is not None:
+            return _SharedSession(session)
+        return self.sessionmaker()
+
+    def new_session(self) -> AsyncSession:
+        """Всегда отдельная сессия — для фоновых задач, которые переживают апдейт."""
+        return self.sessionmaker()
+
+    @asynccontextmanager
+    async def update_session(self):
+        """Открыть сессию на время апдейта и сделать её общей для session_factory().
+
+        Запросы апдейта (в том числе на реплики) проверяются на N+1
+        профилировщиком — см. core/query_profiler.py.
+        """
+        profile_token = query_profiler.start_update()
+        try:
+            async with self.sessionmaker() as session:
+                token = _update_session.set(session)
+                try:
+                    yield session
+                finally:
+                    _update_session.reset(token)
+        finally:
+            query_profiler.finish_update(profile_token)
+
     def get_scoped_session(self):
         session = async_scoped_session(
-            session_factory=self.session_factory,
+            session_factory=self.sessionmaker,
             scopefunc=current_task,
         )
         return session
 
     async def session_dependency(self) -> AsyncSession:
 
-        async with self.session_factory() as session:
+        async with self.sessionmaker() as session:
             yield session
             await session.close()
 
@@ -40,4 +226,8 @@ class DatabaseHelper:
         await session.close()
 
 
-db_helper = DatabaseHelper(url=settings.db_url, echo=settings.db_echo)
+db_helper = DatabaseHelper(
+    url=settings.db_url,
+    echo=settings.db_echo,
+    replica_urls=settings.DB_REPLICA_URLS,
+)
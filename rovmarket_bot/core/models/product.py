@@ -29,18 +29,20 @@ class Product(Base):
         back_populates="products",
     )
 
+    # Коллекции не грузятся неявно: нужные связи запрос указывает сам
+    # (selectinload(Product.photos) и т.п.), обращение к незагруженной — ошибка
     photos = relationship(
         "ProductPhoto",
         back_populates="product",
         cascade="all, delete-orphan",
-        lazy="joined",
+        lazy="raise",
     )
 
     videos = relationship(
         "ProductVideo",
         back_populates="product",
         cascade="all, delete-orphan",
-        lazy="joined",
+        lazy="raise",
     )
 
     description: Mapped[str] = mapped_column(String)
@@ -50,7 +52,10 @@ class Product(Base):
     geo: Mapped[dict] = mapped_column(JSON)
 
     views = relationship(
-        "ProductView", back_populates="product", cascade="all, delete-orphan"
+        "ProductView",
+        back_populates="product",
+        cascade="all, delete-orphan",
+        lazy="raise",
     )
 
     publication: Mapped[bool] = mapped_column(nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from .base import Base
@@ -23,4 +23,6 @@ class ProductView(Base):
     # Гарантирует, что один пользователь может быть только один раз в просмотрах одного товара
     __table_args__ = (
         UniqueConstraint("product_id", "user_id", name="unique_product_user_view"),
+        # Подсчёт просмотров пользователя в админском каталоге
+        Index("ix_product_view_user_id", "user_id"),
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import DateTime, String
+from sqlalchemy import DateTime, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, timezone
 from .base import Base
@@ -11,28 +11,35 @@ class User(Base):
     telegram_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False)
     username: Mapped[str | None] = mapped_column(String, nullable=True)
 
+    # Коллекции не грузятся неявно — только явным selectinload в запросе
     products = relationship(
-        "Product", back_populates="user", cascade="all, delete-orphan"
+        "Product", back_populates="user", cascade="all, delete-orphan", lazy="raise"
     )
 
     viewed_products = relationship(
-        "ProductView", back_populates="user", cascade="all, delete-orphan"
+        "ProductView", back_populates="user", cascade="all, delete-orphan", lazy="raise"
     )
 
     complaints = relationship(
-        "Complaint", back_populates="user", cascade="all, delete-orphan"
+        "Complaint", back_populates="user", cascade="all, delete-orphan", lazy="raise"
     )
 
     admin: Mapped[bool] = mapped_column(nullable=True, default=False)
 
-    notifications_all_ads: Mapped[bool] = mapped_column(default=True, nullable=True)
+    # «Все объявления» — явная подписка; по умолчанию только подписки на категории
+    notifications_all_ads: Mapped[bool] = mapped_column(default=False, nullable=True)
+
+    # Доставка уведомлений о новых объявлениях: instant, hourly или daily
+    notification_mode: Mapped[str] = mapped_column(
+        String(16), default="instant", server_default="instant", nullable=False
+    )
 
     # Many-to-many: categories user subscribed to for notifications
     subscribed_categories = relationship(
         "Categories",
         secondary="user_category_notification",
         back_populates="subscribed_users",
-        lazy="selectin",
+        lazy="raise",
     )
 
     created_at: Mapped[datetime] = mapped_column(
@@ -40,3 +47,6 @@ class User(Base):
         default=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
+
+    # Keyset-пагинация каталога пользователей в админке
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
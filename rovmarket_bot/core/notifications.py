@@ -0,0 +1,497 @@
+"""Уведомления о новых объявлениях.
+
+Раньше одобрение объявления рассылало его всем пользователям с включёнными
+«Всеми объявлениями». Теперь получатели — только подписчики категории
+объявления (и те, кто явно включил «Все объявления»), а доставка зависит
+от выбранного пользователем режима:
+
+- ``instant`` — карточка сразу, но не больше `NOTIFY_INSTANT_CAP` за
+  `NOTIFY_CAP_WINDOW` секунд; сверх лимита объявление уходит в часовой дайджест;
+- ``hourly`` / ``daily`` — объявление копится в дайджесте пользователя
+  (sorted set в Redis, по id объявления — без повторов), а `flush_digests`
+  раз в час / раз в сутки отправляет одно сообщение со списком.
+
+При массовом одобрении (`notify_products`) каждый получатель вместо карточки
+на каждое объявление получает одну подборку со всеми подходящими ему.
+
+Если Redis недоступен, лимит не применяется, а дайджест-получатели
+получают карточку сразу — уведомление не теряется.
+"""
+
+import asyncio
+import html
+from typing import NamedTuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from .cache import redis_cache
+from .cards import render_full_card, render_short_card, to_card_record
+from .config import settings
+from .delivery import MESSAGE_LIMIT
+from .jobs import register_job
+from .logger import get_component_logger
+from .models import BotSettings, Product, User, UserCategoryNotification, db_helper
+
+logger = get_component_logger("notifications")
+
+INSTANT = "instant"
+HOURLY = "hourly"
+DAILY = "daily"
+NOTIFICATION_MODES = (INSTANT, HOURLY, DAILY)
+
+# Одновременных отправок при рассылке (общий лимит бота ~30 сообщений/сек)
+SEND_CONCURRENCY = 10
+
+
+class Recipient(NamedTuple):
+    telegram_id: int
+    mode: str = INSTANT
+    username: str | None = None
+
+
+class FanOutReport(NamedTuple):
+    sent: int
+    queued: int
+    failed: list[str]
+
+
+async def get_new_product_recipients(
+    session: AsyncSession, category_id: int, exclude_user_id: int | None = None
+) -> list[Recipient]:
+    """Подписчики категории и те, кто явно включил «Все объявления»."""
+    subscribed = (
+        select(UserCategoryNotification.user_id)
+        .where(UserCategoryNotification.category_id == category_id)
+        .scalar_subquery()
+    )
+    stmt = select(User.telegram_id, User.notification_mode, User.username).where(
+        or_(User.id.in_(subscribed), User.notifications_all_ads == True)
+    )
+    if exclude_user_id is not None:
+        stmt = stmt.where(User.id != exclude_user_id)
+    result = await session.execute(stmt)
+    return [
+        Recipient(telegram_id, mode, username)
+        for telegram_id, mode, username in result.all()
+    ]
+
+
+def _digest_key(mode: str, telegram_id: int) -> str:
+    return f"notify:digest:{mode}:{telegram_id}"
+
+
+def _digest_users_key(mode: str) -> str:
+    return f"notify:digest_users:{mode}"
+
+
+async def _take_instant_quota(telegram_ids: list[int]) -> list[bool]:
+    """Списать по одному мгновенному уведомлению; False — лимит исчерпан."""
+    if not telegram_ids:
+        return []
+    try:
+        async with redis_cache.pipeline(transaction=False) as pipe:
+            for telegram_id in telegram_ids:
+                key = f"notify:cap:{telegram_id}"
+                pipe.incr(key)
+                pipe.expire(key, settings.NOTIFY_CAP_WINDOW, nx=True)
+            results = await pipe.execute()
+    except Exception as e:
+        logger.warning("Notification cap unavailable, sending without it: %s", e)
+        return [True] * len(telegram_ids)
+    return [count <= settings.NOTIFY_INSTANT_CAP for count in results[::2]]
+
+
+async def _enqueue(queued: dict[str, list[tuple[Recipient, list[int]]]]) -> None:
+    async with redis_cache.pipeline(transaction=False) as pipe:
+        for mode, items in queued.items():
+            for recipient, product_ids in items:
+                pipe.zadd(
+                    _digest_key(mode, recipient.telegram_id),
+                    {product_id: product_id for product_id in product_ids},
+                )
+                pipe.sadd(_digest_users_key(mode), recipient.telegram_id)
+        await pipe.execute()
+
+
+async def _send(request) -> None:
+    try:
+        await request()
+    except TelegramRetryAfter as e:
+        await asyncio.sleep(e.retry_after)
+        await request()
+
+
+def _card_request(bot: Bot, chat_id: int, text: str, photos: list[str]):
+    if not photos:
+        return lambda: bot.send_message(chat_id, text, parse_mode="HTML")
+    if len(photos) == 1:
+        return lambda: bot.send_photo(
+            chat_id, photos[0], caption=text, parse_mode="HTML"
+        )
+    media = [InputMediaPhoto(media=photos[0], caption=text, parse_mode="HTML")]
+    media += [InputMediaPhoto(media=photo) for photo in photos[1:]]
+    return lambda: bot.send_media_group(chat_id, media)
+
+
+async def _plan_delivery(
+    items: list[tuple[Recipient, list[int]]],
+) -> tuple[list[tuple[Recipient, list[int]]], int]:
+    """Разложить получателей по режимам; вернуть (кому отправить сейчас, сколько в дайджесты)."""
+    instant = [item for item in items if item[0].mode not in (HOURLY, DAILY)]
+    queued: dict[str, list[tuple[Recipient, list[int]]]] = {
+        HOURLY: [item for item in items if item[0].mode == HOURLY],
+        DAILY: [item for item in items if item[0].mode == DAILY],
+    }
+
+    to_send = []
+    allowed = await _take_instant_quota([r.telegram_id for r, _ in instant])
+    for item, ok in zip(instant, allowed):
+        if ok:
+            to_send.append(item)
+        else:
+            queued[HOURLY].append(item)
+
+    queued_count = sum(len(q) for q in queued.values())
+    if queued_count:
+        try:
+            await _enqueue(queued)
+        except Exception as e:
+            logger.warning("Digest queue unavailable, sending instantly: %s", e)
+            to_send += [item for q in queued.values() for item in q]
+            queued_count = 0
+    return to_send, queued_count
+
+
+async def _deliver_all(
+    bot: Bot, to_send: list[tuple[Recipient, list[int]]], make_request
+) -> tuple[int, list[str]]:
+    """Отправить каждому получателю его сообщение; вернуть (успешно, не доставлено)."""
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+    failed: list[str] = []
+
+    async def deliver(recipient: Recipient, product_ids: list[int]) -> bool:
+        async with semaphore:
+            try:
+                await _send(make_request(recipient.telegram_id, product_ids))
+                return True
+            except Exception as e:
+                if not isinstance(e, TelegramForbiddenError):
+                    logger.warning(
+                        "Notification failed telegram_id=%s: %s",
+                        recipient.telegram_id,
+                        e,
+                    )
+                failed.append(
+                    f"@{recipient.username} ({recipient.telegram_id})"
+                    if recipient.username
+                    else str(recipient.telegram_id)
+                )
+                return False
+
+    results = await asyncio.gather(*(deliver(r, ids) for r, ids in to_send))
+    return sum(results), failed
+
+
+async def fan_out_new_product(
+    bot: Bot, product: Product, recipients: list[Recipient]
+) -> FanOutReport:
+    """Разослать опубликованное объявление получателям по их режимам."""
+    to_send, queued_count = await _plan_delivery(
+        [(r, [product.id]) for r in recipients]
+    )
+
+    text = render_full_card(to_card_record(product))
+    photos = [p.photo_url for p in product.photos][:10]
+    sent, failed = await _deliver_all(
+        bot,
+        to_send,
+        lambda chat_id, _: _card_request(bot, chat_id, text, photos),
+    )
+    logger.info(
+        "Product id=%s fan-out: recipients=%s sent=%s queued=%s failed=%s",
+        product.id,
+        len(recipients),
+        sent,
+        queued_count,
+        len(failed),
+    )
+    return FanOutReport(sent=sent, queued=queued_count, failed=failed)
+
+
+async def fan_out_new_products(
+    bot: Bot, notifications: list[tuple[Product, list[Recipient]]]
+) -> FanOutReport:
+    """Разослать пачку объявлений: каждому получателю — одно сообщение-подборка.
+
+    При массовом одобрении подписчик получает не карточку на каждое
+    объявление, а один дайджест со всеми подходящими ему; лимит мгновенных
+    уведомлений списывается один раз.
+    """
+    per_recipient: dict[int, tuple[Recipient, list[int]]] = {}
+    for product, recipients in notifications:
+        for recipient in recipients:
+            per_recipient.setdefault(recipient.telegram_id, (recipient, []))[1].append(
+                product.id
+            )
+    to_send, queued_count = await _plan_delivery(list(per_recipient.values()))
+
+    cards = {
+        product.id: render_short_card(to_card_record(product))
+        for product, _ in notifications
+    }
+
+    def digest_request(chat_id: int, product_ids: list[int]):
+        text, shown = _digest_message(product_ids, cards)
+        return lambda: bot.send_message(
+            chat_id, text, reply_markup=_digest_keyboard(shown)
+        )
+
+    sent, failed = await _deliver_all(bot, to_send, digest_request)
+    logger.info(
+        "Products batch fan-out: products=%s recipients=%s sent=%s queued=%s failed=%s",
+        len(notifications),
+        len(per_recipient),
+        sent,
+        queued_count,
+        len(failed),
+    )
+    return FanOutReport(sent=sent, queued=queued_count, failed=failed)
+
+
+async def _send_report(
+    bot: Bot, chat_id: int, report: FanOutReport, products_count: int = 1
+) -> None:
+    title = (
+        "о новом объявлении"
+        if products_count == 1
+        else f"о новых объявлениях ({products_count})"
+    )
+    await bot.send_message(
+        chat_id,
+        f"📨 Уведомления {title}\n"
+        f"Отправлено успешно: {report.sent}\n"
+        f"В дайджесты: {report.queued}\n"
+        f"Не удалось отправить: {len(report.failed)}",
+        parse_mode=None,
+    )
+    if report.failed:
+        text = "🚫 Заблокировали бота:\n" + "\n".join(
+            html.escape(u) for u in sorted(set(report.failed))
+        )
+        for i in range(0, len(text), 4000):
+            await bot.send_message(chat_id, text[i : i + 4000], parse_mode="HTML")
+
+
+async def _load_notifications(
+    session: AsyncSession, product_ids: list[int]
+) -> list[tuple[Product, list[Recipient]]]:
+    """Опубликованные объявления из `product_ids` с получателями каждого."""
+    bot_settings = await session.scalar(select(BotSettings).limit(1))
+    if bot_settings is not None and bot_settings.notifications_all is False:
+        return []
+    result = await session.execute(
+        select(Product)
+        .where(Product.id.in_(product_ids), Product.publication == True)
+        .options(selectinload(Product.photos), selectinload(Product.user))
+        .order_by(Product.id)
+    )
+    # Подписчики одной категории запрашиваются один раз на всю пачку
+    by_category: dict[int, list[Recipient]] = {}
+    notifications = []
+    for product in result.unique().scalars().all():
+        if product.category_id not in by_category:
+            by_category[product.category_id] = await get_new_product_recipients(
+                session, product.category_id
+            )
+        author = product.user.telegram_id if product.user else None
+        notifications.append(
+            (
+                product,
+                [
+                    r
+                    for r in by_category[product.category_id]
+                    if r.telegram_id != author
+                ],
+            )
+        )
+    return notifications
+
+
+@register_job("notify_products")
+async def notify_published_products(
+    bot: Bot, product_ids: list[int], report_chat_id: int | None = None
+) -> None:
+    """Уведомить подписчиков о пачке опубликованных объявлений.
+
+    report_chat_id — куда прислать общий итог рассылки (модератору).
+    """
+    async with db_helper.new_session() as session:
+        notifications = await _load_notifications(session, product_ids)
+    if not notifications:
+        return
+
+    if len(notifications) == 1:
+        report = await fan_out_new_product(bot, *notifications[0])
+    else:
+        report = await fan_out_new_products(bot, notifications)
+    if report_chat_id is not None:
+        await _send_report(
+            bot, report_chat_id, report, products_count=len(notifications)
+        )
+
+
+@register_job("notify_product")
+async def notify_published_product(
+    bot: Bot, product_id: int, report_chat_id: int | None = None
+) -> None:
+    """Уведомить подписчиков об опубликованном объявлении."""
+    await notify_published_products(bot, [product_id], report_chat_id)
+
+
+@register_job("notify_declined")
+async def notify_declined_products(bot: Bot, product_ids: list[int]) -> None:
+    """Сообщить авторам об отклонении — одно сообщение автору на всю пачку."""
+    async with db_helper.new_session() as session:
+        result = await session.execute(
+            select(User.telegram_id, func.count(Product.id))
+            .join(User, User.id == Product.user_id)
+            .where(Product.id.in_(product_ids), Product.publication == False)
+            .group_by(User.telegram_id)
+        )
+        authors = result.all()
+
+    for telegram_id, count in authors:
+        text = (
+            "Ваше объявление было отклонено модератором ❌"
+            if count == 1
+            else f"Ваши объявления ({count}) были отклонены модератором ❌"
+        )
+        try:
+            await _send(lambda: bot.send_message(telegram_id, text))
+        except Exception as e:
+            logger.warning("Decline notice failed telegram_id=%s: %s", telegram_id, e)
+
+
+def _digest_keyboard(product_ids: list[int]) -> InlineKeyboardMarkup:
+    rows = [
+        [
+            InlineKeyboardButton(
+                text=f"{n}. Подробнее", callback_data=f"details:{product_id}"
+            )
+        ]
+        for n, product_id in enumerate(product_ids, start=1)
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def _digest_message(
+    product_ids: list[int], cards: dict[int, str]
+) -> tuple[str, list[int]]:
+    """Текст подборки (свежие первыми, не больше NOTIFY_DIGEST_LIMIT) и показанные id.
+
+    Карточки добавляются целиком, пока текст помещается в лимит сообщения:
+    обрезка готовой строки могла разорвать Markdown-разметку, и Telegram
+    отклонил бы всю подборку.
+    """
+    product_ids = sorted((pid for pid in product_ids if pid in cards), reverse=True)
+    text = "🗞 *Новые объявления по вашим подпискам*"
+    shown = []
+    for pid in product_ids[: settings.NOTIFY_DIGEST_LIMIT]:
+        item = f"\n\n{len(shown) + 1}. {cards[pid]}"
+        # Запас под строку «…и ещё N»
+        if len(text) + len(item) > MESSAGE_LIMIT - 32:
+            break
+        text += item
+        shown.append(pid)
+    if len(product_ids) > len(shown):
+        text += f"\n\n…и ещё {len(product_ids) - len(shown)}"
+    return text, shown
+
+
+async def _pop_digest(mode: str, telegram_id: int) -> list[int]:
+    async with redis_cache.pipeline(transaction=True) as pipe:
+        pipe.zrange(_digest_key(mode, telegram_id), 0, -1)
+        pipe.delete(_digest_key(mode, telegram_id))
+        pipe.srem(_digest_users_key(mode), telegram_id)
+        raw_ids, _, _ = await pipe.execute()
+    return [int(product_id) for product_id in raw_ids]
+
+
+async def _restore_digests(mode: str, digests: dict[int, list[int]]) -> None:
+    """Вернуть снятые дайджесты в Redis, чтобы их отправил следующий запуск."""
+    try:
+        async with redis_cache.pipeline(transaction=False) as pipe:
+            for telegram_id, product_ids in digests.items():
+                pipe.zadd(
+                    _digest_key(mode, telegram_id),
+                    {product_id: product_id for product_id in product_ids},
+                )
+                pipe.sadd(_digest_users_key(mode), telegram_id)
+            await pipe.execute()
+    except Exception as e:
+        logger.error("Digest %s restore failed for %s users: %s", mode, len(digests), e)
+
+
+async def flush_digests(bot: Bot, session: AsyncSession, mode: str) -> int:
+    """Отправить накопленные дайджесты режима `mode`; вернуть число сообщений.
+
+    `session` должна читать с primary: только что одобренное объявление
+    могло ещё не дойти до реплики и выпало бы из подборки. Если чтение или
+    отправка не удались, id возвращаются в Redis до следующего запуска
+    (кроме пользователей, заблокировавших бота).
+    """
+    digests = {}
+    for telegram_id in await redis_cache.smembers(_digest_users_key(mode)):
+        product_ids = await _pop_digest(mode, int(telegram_id))
+        if product_ids:
+            digests[int(telegram_id)] = product_ids
+    if not digests:
+        return 0
+
+    # Одним запросом все объявления всех дайджестов; снятые с публикации пропускаем
+    all_ids = {pid for ids in digests.values() for pid in ids}
+    try:
+        result = await session.execute(
+            select(Product.id, Product.name, Product.description, Product.price).where(
+                Product.id.in_(all_ids), Product.publication == True
+            )
+        )
+    except Exception:
+        await _restore_digests(mode, digests)
+        raise
+    cards = {
+        row["id"]: render_short_card(to_card_record(dict(row)))
+        for row in result.mappings().all()
+    }
+
+    semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+    async def deliver(telegram_id: int, product_ids: list[int]) -> bool:
+        if not any(pid in cards for pid in product_ids):
+            return False
+        text, shown = _digest_message(product_ids, cards)
+        async with semaphore:
+            try:
+                await _send(
+                    lambda: bot.send_message(
+                        telegram_id, text, reply_markup=_digest_keyboard(shown)
+                    ),
+                )
+                return True
+            except TelegramForbiddenError:
+                return False
+            except Exception as e:
+                logger.warning("Digest failed telegram_id=%s: %s", telegram_id, e)
+                await _restore_digests(mode, {telegram_id: product_ids})
+                return False
+
+    results = await asyncio.gather(
+        *(deliver(telegram_id, ids) for telegram_id, ids in digests.items())
+    )
+    logger.info("Digest %s sent=%s of %s", mode, sum(results), len(digests))
+    return sum(results)
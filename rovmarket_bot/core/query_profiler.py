@@ -0,0 +1,150 @@
+"""Профилировщик запросов к БД: медленные запросы и N+1.
+
+Подключается к движкам `DatabaseHelper` (события before/after_cursor_execute)
+и пишет предупреждения в logs/db.log с функцией CRUD/хендлера, из которой
+пришёл запрос:
+
+- запрос дольше DB_SLOW_QUERY_MS — сразу;
+- одна и та же «форма» запроса (SQL без значений параметров, списки IN
+  свёрнуты) DB_REPEAT_THRESHOLD и более раз за один апдейт — по окончании
+  апдейта; это типичный N+1: ленивая загрузка связей или запрос в цикле.
+
+Повторы отслеживаются в апдейтах, выбранных с вероятностью
+DB_PROFILE_SAMPLE_RATE (в разработке — 1, в продакшене — доля), медленные
+запросы — всегда.
+"""
+
+import random
+import re
+import sys
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+from .config import settings
+from .logger import get_component_logger
+from .metrics import query_duration_ms, track_query_start
+
+logger = get_component_logger("db")
+
+# Модули, которые не считаются «вызывающим кодом» при поиске источника запроса
+_SKIP_MODULES = (
+    "rovmarket_bot.core.models",
+    "rovmarket_bot.core.query_profiler",
+    "rovmarket_bot.core.metrics",
+    "rovmarket_bot.middleware",
+)
+
+_CAST = re.compile(r"::\w+(?: WITH(?:OUT)? TIME ZONE)?")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s|:\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class _Repeat:
+    count: int = 0
+    caller: str | None = None
+
+
+@dataclass
+class UpdateProfile:
+    shapes: dict[str, _Repeat] = field(default_factory=dict)
+
+
+_profile: ContextVar[UpdateProfile | None] = ContextVar("query_profile", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """SQL без значений: плейсхолдеры всех драйверов (и их ::типы) → ?, списки IN (?, ?, …) → (?)."""
+    shape = _PLACEHOLDER.sub("?", _CAST.sub("", statement))
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def _frames():
+    """Кадры текущего стека, включая корутины, ждущие в родительском greenlet.
+
+    Асинхронный SQLAlchemy выполняет курсор в дочернем greenlet, и вызвавший
+    CRUD-код виден только через кадр родителя.
+    """
+    frame = sys._getframe(1)
+    try:
+        import greenlet
+
+        current = greenlet.getcurrent()
+    except ImportError:
+        current = None
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+        if frame is None and current is not None and current.parent is not None:
+            frame = current.parent.gr_frame
+            current = current.parent
+
+
+def find_caller() -> str:
+    """Первая функция приложения (app/*, core/*) в стеке: module.function:line."""
+    for frame in _frames():
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("rovmarket_bot.") and not module.startswith(_SKIP_MODULES):
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+    return "?"
+
+
+def start_update() -> object | None:
+    """Начать отслеживание повторов для апдейта (если он попал в выборку)."""
+    if settings.DB_REPEAT_THRESHOLD <= 0:
+        return None
+    if random.random() >= settings.DB_PROFILE_SAMPLE_RATE:
+        return None
+    return _profile.set(UpdateProfile())
+
+
+def finish_update(token) -> None:
+    if token is None:
+        return
+    profile = _profile.get()
+    _profile.reset(token)
+    for shape, repeat in profile.shapes.items():
+        if repeat.count >= settings.DB_REPEAT_THRESHOLD:
+            logger.warning(
+                "Repeated query x%s (possible N+1) at %s: %s",
+                repeat.count,
+                repeat.caller,
+                shape[:500],
+            )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Старт выражения записывает общий с метриками хук (metrics.track_query_start)
+    elapsed_ms = query_duration_ms(context)
+
+    if (
+        settings.DB_SLOW_QUERY_MS
+        and elapsed_ms is not None
+        and elapsed_ms >= settings.DB_SLOW_QUERY_MS
+    ):
+        logger.warning(
+            "Slow query %.0f ms at %s: %s",
+            elapsed_ms,
+            find_caller(),
+            statement_shape(statement)[:500],
+            extra={"duration_ms": round(elapsed_ms, 1)},
+        )
+
+    profile = _profile.get()
+    if profile is None:
+        return
+    repeat = profile.shapes.setdefault(statement_shape(statement), _Repeat())
+    repeat.count += 1
+    if repeat.count == settings.DB_REPEAT_THRESHOLD:
+        # Источник ищем один раз — когда форма впервые достигла порога
+        repeat.caller = find_caller()
+
+
+def instrument_engine(engine) -> None:
+    sync_engine = getattr(engine, "sync_engine", engine)
+    track_query_start(sync_engine)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,187 @@
+"""Суточные счётчики для админской статистики.
+
+Статистика за неделю/месяц/год раньше считалась агрегатами по всем
+пользователям и объявлениям на каждое нажатие кнопки. Теперь события
+(регистрация, новое объявление, просмотр, одобрение модератором)
+копятся в хэше Redis `stats:pending:<день>` (HINCRBY), а
+`flush_daily_stats` раз в STATS_FLUSH_INTERVAL секунд переносит их в
+строку суток `daily_stats` одним UPSERT'ом. Строка суток одна на всех,
+и UPSERT на каждое событие в транзакции запроса выстраивал бы
+конкурирующие запросы в очередь на её блокировке. Если Redis недоступен,
+счётчики пишутся в БД сразу, как раньше. `daily_poster_stats` (топ
+авторов) — строка на автора, конкуренции нет, она обновляется в
+транзакции вызывающего кода. Статистика за период — сумма не более 365
+строк; события последней минуты в ней могут ещё не учитываться.
+
+`compact_daily_stats` раз в сутки пересчитывает закрытый день по базовым
+таблицам: исправляет расхождения (удалённые объявления, сбои между
+событием и коммитом — счётчик в Redis увеличивается до коммита). Одобрения
+в базовых таблицах не хранятся, поэтому их счётчик компактизация не
+трогает. Перед компактизацией буфер сбрасывается в БД.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import redis_cache
+from .models import DailyPosterStats, DailyStats, Product, ProductView, User
+
+STATS_COUNTERS = ("new_users", "new_products", "views", "approvals")
+
+# Как часто переносить накопленные в Redis счётчики в daily_stats, сек
+STATS_FLUSH_INTERVAL = 60
+PENDING_DAYS_KEY = "stats:pending_days"
+
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _insert(session: AsyncSession, model):
+    # INSERT ... ON CONFLICT есть и в PostgreSQL, и в SQLite (локальная БД)
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def _pending_key(day: str) -> str:
+    return f"stats:pending:{day}"
+
+
+async def _upsert_daily_stats(session: AsyncSession, day: date, counters: dict) -> None:
+    stmt = _insert(session, DailyStats).values(day=day, **counters)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStats.day],
+        set_={
+            name: getattr(DailyStats, name) + value for name, value in counters.items()
+        },
+    )
+    await session.execute(stmt)
+
+
+async def bump_daily_stats(
+    session: AsyncSession, *, day: date | None = None, **counters: int
+) -> None:
+    """Увеличить счётчики суток, например `bump_daily_stats(s, views=1)`.
+
+    Счётчики копятся в Redis; `session` нужна, только если Redis недоступен.
+    """
+    unknown = set(counters) - set(STATS_COUNTERS)
+    if unknown:
+        raise ValueError(f"Неизвестные счётчики: {', '.join(sorted(unknown))}")
+    day = day or today()
+    try:
+        async with redis_cache.pipeline(transaction=False) as pipe:
+            for name, value in counters.items():
+                pipe.hincrby(_pending_key(day.isoformat()), name, value)
+            pipe.sadd(PENDING_DAYS_KEY, day.isoformat())
+            await pipe.execute()
+    except Exception:
+        await _upsert_daily_stats(session, day, counters)
+
+
+async def _restore_pending(day: str, counters: dict) -> None:
+    async with redis_cache.pipeline(transaction=False) as pipe:
+        for name, value in counters.items():
+            pipe.hincrby(_pending_key(day), name, value)
+        pipe.sadd(PENDING_DAYS_KEY, day)
+        await pipe.execute()
+
+
+async def flush_daily_stats(session: AsyncSession) -> None:
+    """Перенести накопленные в Redis счётчики в daily_stats и закоммитить.
+
+    Хэш суток забирается и удаляется атомарно (MULTI), поэтому несколько
+    воркеров могут сбрасывать буфер одновременно. Если запись в БД не
+    удалась, счётчики возвращаются в Redis до следующего сброса.
+    """
+    for day in await redis_cache.smembers(PENDING_DAYS_KEY):
+        async with redis_cache.pipeline(transaction=True) as pipe:
+            pipe.hgetall(_pending_key(day))
+            pipe.delete(_pending_key(day))
+            pipe.srem(PENDING_DAYS_KEY, day)
+            raw, *_ = await pipe.execute()
+        counters = {
+            name: int(value)
+            for name, value in raw.items()
+            if name in STATS_COUNTERS and int(value)
+        }
+        if not counters:
+            continue
+        try:
+            await _upsert_daily_stats(session, date.fromisoformat(day), counters)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            await _restore_pending(day, counters)
+            raise
+
+
+async def bump_poster_stats(
+    session: AsyncSession, user_id: int, *, day: date | None = None
+) -> None:
+    """Засчитать пользователю новое объявление (и его в счётчик суток)."""
+    day = day or today()
+    stmt = _insert(session, DailyPosterStats).values(
+        day=day, user_id=user_id, products_count=1
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyPosterStats.day, DailyPosterStats.user_id],
+        set_={"products_count": DailyPosterStats.products_count + 1},
+    )
+    await session.execute(stmt)
+    await bump_daily_stats(session, day=day, new_products=1)
+
+
+async def compact_daily_stats(session: AsyncSession, day: date) -> None:
+    """Пересчитать сутки `day` по базовым таблицам и закоммитить."""
+    start, end = _day_bounds(day)
+
+    new_users = await session.scalar(
+        select(func.count(User.id)).where(
+            User.created_at >= start, User.created_at < end
+        )
+    )
+    views = await session.scalar(
+        select(func.count(ProductView.id)).where(
+            ProductView.viewed_at >= start, ProductView.viewed_at < end
+        )
+    )
+    posters = (
+        await session.execute(
+            select(Product.user_id, func.count(Product.id))
+            .where(Product.created_at >= start, Product.created_at < end)
+            .group_by(Product.user_id)
+        )
+    ).all()
+
+    await session.execute(delete(DailyPosterStats).where(DailyPosterStats.day == day))
+    if posters:
+        await session.execute(
+            _insert(session, DailyPosterStats),
+            [
+                {"day": day, "user_id": user_id, "products_count": count}
+                for user_id, count in posters
+            ],
+        )
+
+    values = {
+        "new_users": new_users or 0,
+        "new_products": sum(count for _, count in posters),
+        "views": views or 0,
+    }
+    stmt = _insert(session, DailyStats).values(day=day, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStats.day],
+        set_={name: getattr(stmt.excluded, name) for name in values},
+    )
+    await session.execute(stmt)
+    await session.commit()
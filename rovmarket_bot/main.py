@@ -1,5 +1,8 @@
 import asyncio
+import multiprocessing
 from aiogram import Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from aiogram.exceptions import (
     TelegramNetworkError,
     TelegramAPIError,
@@ -11,11 +14,18 @@ from aiogram.exceptions import (
 
 from aiogram.fsm.storage.redis import RedisStorage
 from rovmarket_bot.core.config import bot, settings
-from rovmarket_bot.core.logger import set_logging_enabled
-from rovmarket_bot.core.models import db_helper
-from rovmarket_bot.app.settings.crud import get_or_create_bot_settings
-from rovmarket_bot.middleware.album_middleware import AlbumMiddleware
+from rovmarket_bot.middleware.album_middleware import (
+    AlbumMiddleware,
+    RedisAlbumCollector,
+)
 from rovmarket_bot.middleware.user_check_middleware import UserCheckMiddleware
+from rovmarket_bot.middleware.db_session_middleware import DbSessionMiddleware
+from rovmarket_bot.middleware.log_context_middleware import LogContextMiddleware
+from rovmarket_bot.middleware.metrics_middleware import (
+    ApiMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    UpdateMetricsMiddleware,
+)
 from rovmarket_bot.app.search.redis_search import ensure_redis_index
 from rovmarket_bot.app.start.handler import router as start
 from rovmarket_bot.app.post.handler import router as post
@@ -26,28 +36,26 @@ from rovmarket_bot.app.chat.handler import router as chat
 from rovmarket_bot.app.settings.handler import router as settings_router
 from rovmarket_bot.app.help.handler import router as help_router
 from rovmarket_bot.app.advertisement.handler import router as advertisement_router
-from rovmarket_bot.app.advertisement.crud import get_next_broadcast_ad
-from rovmarket_bot.app.admin.crud import get_all_users
+from rovmarket_bot.core.jobs import WORKER
+from rovmarket_bot.core.metrics import instrument_redis, render_prometheus
+from rovmarket_bot.worker import SCHEDULERS, load_jobs, load_logging_flag
 
 
 storage = RedisStorage.from_url(settings.REDIS_URL)
+instrument_redis(storage.redis)
 dp = Dispatcher(storage=storage)
 
 
-async def main():
-    # Initialize logging flag from DB (CRUD-style)
-    try:
-        async with db_helper.session_factory() as session:
-            bot_settings = await get_or_create_bot_settings(session)
-            set_logging_enabled(bool(bot_settings.logging))
-    except Exception:
-        # Fall back silently to env-based setting if DB is unavailable at startup
-        pass
-
-    # Import routers only after logging flag is set to avoid early logger init
-
+def setup_dispatcher() -> None:
+    dp.update.outer_middleware(LogContextMiddleware())
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.update.outer_middleware(DbSessionMiddleware())
+    bot.session.middleware(ApiMetricsMiddleware())
     dp.message.middleware(UserCheckMiddleware())
-    dp.message.middleware(AlbumMiddleware())
+    album_collector = None
+    if settings.ALBUM_COLLECTOR == "redis":
+        album_collector = RedisAlbumCollector(storage.redis)
+    dp.message.middleware(AlbumMiddleware(collector=album_collector))
     dp.include_router(start)
     dp.include_router(post)
     dp.include_router(search)
@@ -57,69 +65,118 @@ async def main():
     dp.include_router(settings_router)
     dp.include_router(chat)
     dp.include_router(advertisement_router)
+    # Задержки хендлеров — inner-middleware корневых наблюдателей
+    # (наследуются вложенными роутерами); подключается последним,
+    # поэтому сборка альбомов и проверка пользователя в замер не входят
+    handler_metrics = HandlerMetricsMiddleware()
+    for event_name in dp.resolve_used_update_types():
+        dp.observers[event_name].middleware(handler_metrics)
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+
+# Планировщики в процессе бота (режим JOBS_MODE=inline)
+_background_tasks: set[asyncio.Task] = set()
 
+
+async def on_startup():
+    await load_logging_flag()
     await ensure_redis_index()
+    load_jobs()
+
+    # С отдельным воркером (JOBS_MODE=worker) планировщики работают в нём
+    if settings.JOBS_MODE != WORKER:
+        for scheduler in SCHEDULERS:
+            _background_tasks.add(asyncio.create_task(scheduler()))
+
+
+async def on_shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
+
+
+async def main():
+    setup_dispatcher()
+    # Только те типы апдейтов, на которые есть хендлеры
+    await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
 
-    async def broadcast_scheduler():
-        while True:
-            try:
-                async with db_helper.session_factory() as session:
-                    ad = await get_next_broadcast_ad(session)
-                    if ad:
-                        users = await get_all_users(session)
-                        # commit pointer advance even if sending fails later
-                        await session.commit()
-
-                        # prepare media/text
-                        text = ad.text
-                        sent = 0
-                        for user in users:
-                            try:
-                                if getattr(ad, "media", None):
-                                    from aiogram.types import InputMediaPhoto, InputMediaVideo
-
-                                    media_group = []
-                                    for idx, m in enumerate(ad.media[:10]):
-                                        if m.media_type == "photo":
-                                            item = InputMediaPhoto(media=m.file_id)
-                                        else:
-                                            item = InputMediaVideo(media=m.file_id)
-                                        if idx == 0:
-                                            item.caption = text
-                                        media_group.append(item)
-                                    msgs = await bot.send_media_group(chat_id=user.telegram_id, media=media_group)
-                                    if ad.pinned and msgs:
-                                        try:
-                                            await bot.pin_chat_message(chat_id=user.telegram_id, message_id=msgs[0].message_id)
-                                        except Exception:
-                                            pass
-                                else:
-                                    msg = await bot.send_message(chat_id=user.telegram_id, text=text)
-                                    if ad.pinned:
-                                        try:
-                                            await bot.pin_chat_message(chat_id=user.telegram_id, message_id=msg.message_id)
-                                        except Exception:
-                                            pass
-                                sent += 1
-                            except Exception:
-                                # ignore per-user failures
-                                pass
-            except Exception:
-                # swallow scheduler errors; continue next tick
-                pass
-            # wait one hour
-            await asyncio.sleep(60 * 60)
-
-    await asyncio.gather(
-        dp.start_polling(bot),
-        broadcast_scheduler(),
+
+def webhook_url() -> str:
+    return settings.WEBHOOK_BASE_URL.rstrip("/") + settings.WEBHOOK_PATH
+
+
+async def register_webhook() -> None:
+    """Один раз при деплое (а не в каждом воркере) сообщить Telegram адрес вебхука."""
+    try:
+        await bot.set_webhook(
+            webhook_url(),
+            secret_token=settings.WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+            drop_pending_updates=False,
+        )
+    finally:
+        # Сессию родителя не тащим в воркеры
+        await bot.session.close()
+
+
+async def metrics_view(request: web.Request) -> web.Response:
+    # Агрегаты этого воркера (у каждого процесса свои)
+    return web.Response(text=render_prometheus(), content_type="text/plain")
+
+
+def run_webhook_worker() -> None:
+    """aiohttp-сервер одного воркера: апдейты принимает SimpleRequestHandler."""
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=settings.WEBHOOK_SECRET
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    if settings.METRICS_PATH:
+        app.router.add_get(settings.METRICS_PATH, metrics_view)
+    web.run_app(
+        app,
+        host=settings.WEBHOOK_HOST,
+        port=settings.WEBHOOK_PORT,
+        reuse_port=settings.WEBHOOK_WORKERS > 1,
+        print=None,
     )
 
 
+def run_webhook() -> None:
+    setup_dispatcher()
+    asyncio.run(register_webhook())
+
+    workers = max(1, settings.WEBHOOK_WORKERS)
+    if workers == 1:
+        run_webhook_worker()
+        return
+
+    # Воркеры делят порт через SO_REUSEPORT; FSM и кэши общие в Redis
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=run_webhook_worker, name=f"webhook-worker-{n}")
+        for n in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        raise
+
+
 if __name__ == "__main__":
     print("Starting...")
     try:
-        asyncio.run(main())
+        if settings.BOT_MODE == "webhook":
+            run_webhook()
+        else:
+            asyncio.run(main())
     except TelegramNetworkError:
         print("No internet connection")
     except TelegramUnauthorizedError:
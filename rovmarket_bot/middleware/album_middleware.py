@@ -1,6 +1,6 @@
 # album_middleware.py
 import asyncio
-from collections import defaultdict
+import time
 from typing import Callable, Awaitable, Any
 
 from aiogram import BaseMiddleware, types
@@ -8,20 +8,146 @@ from aiogram import BaseMiddleware, types
 AlbumMessages = list[types.Message]
 DataType = dict[str, Any]
 
+# Telegram не присылает в одном альбоме больше 10 частей
+MAX_ALBUM_SIZE = 10
 
-class AlbumMiddleware(BaseMiddleware):
-    def __init__(self, timeout: float = 0.3):
+
+def _sorted_album(messages: AlbumMessages) -> AlbumMessages:
+    return sorted(messages, key=lambda m: m.message_id)
+
+
+class _AlbumGroup:
+    __slots__ = ("messages", "future", "timer", "started")
+
+    def __init__(self, future: asyncio.Future, started: float):
+        self.messages: AlbumMessages = []
+        self.future = future
+        self.timer: asyncio.TimerHandle | None = None
+        self.started = started
+
+
+class MemoryAlbumCollector:
+    """Сборщик альбомов в памяти процесса.
+
+    Первая часть альбома ждёт future группы; остальные части только
+    добавляются и сдвигают таймер (debounce) — и сразу возвращают None.
+    Группа закрывается, когда `timeout` секунд не приходило новых частей,
+    набралось `max_size` частей или прошло `ttl` секунд с первой части.
+    Одновременно хранится не больше `max_groups` групп — самая старая
+    закрывается досрочно.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 0.3,
+        max_size: int = MAX_ALBUM_SIZE,
+        ttl: float = 5.0,
+        max_groups: int = 1000,
+    ):
         self.timeout = timeout
-        self.album_messages = defaultdict(list)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_groups = max_groups
+        self._groups: dict[str, _AlbumGroup] = {}
+
+    async def collect(self, message: types.Message) -> AlbumMessages | None:
+        loop = asyncio.get_running_loop()
+        group_id = message.media_group_id
+        group = self._groups.get(group_id)
+
+        if group is not None:
+            group.messages.append(message)
+            if (
+                len(group.messages) >= self.max_size
+                or loop.time() - group.started >= self.ttl
+            ):
+                self._flush(group_id)
+            else:
+                self._schedule(loop, group_id, group)
+            return None
+
+        if len(self._groups) >= self.max_groups:
+            # dict хранит порядок вставки — первая группа самая старая
+            self._flush(next(iter(self._groups)))
+
+        group = _AlbumGroup(loop.create_future(), loop.time())
+        group.messages.append(message)
+        self._groups[group_id] = group
+        self._schedule(loop, group_id, group)
+        return await group.future
+
+    def _schedule(self, loop, group_id: str, group: _AlbumGroup) -> None:
+        if group.timer is not None:
+            group.timer.cancel()
+        group.timer = loop.call_later(self.timeout, self._flush, group_id)
 
-    def store_album_message(self, message: types.Message) -> int:
-        self.album_messages[message.media_group_id].append(message)
-        return len(self.album_messages[message.media_group_id])
+    def _flush(self, group_id: str) -> None:
+        group = self._groups.pop(group_id, None)
+        if group is None:
+            return
+        if group.timer is not None:
+            group.timer.cancel()
+        if not group.future.done():
+            group.future.set_result(_sorted_album(group.messages))
 
-    def get_result_album(self, message: types.Message) -> AlbumMessages:
-        album = self.album_messages.pop(message.media_group_id)
-        album.sort(key=lambda m: m.message_id)
-        return album
+
+class RedisAlbumCollector:
+    """Сборщик альбомов через Redis — для нескольких воркеров бота.
+
+    Части альбома могут прийти в разные процессы: каждая кладётся в список
+    `album:<chat_id>:<media_group_id>`, а первая (SET NX) становится владельцем
+    группы и ждёт, пока список не перестанет расти `timeout` секунд
+    (либо до `max_size` частей / `ttl`). Остальные части сразу возвращают None.
+    """
+
+    def __init__(
+        self,
+        redis,
+        timeout: float = 0.3,
+        max_size: int = MAX_ALBUM_SIZE,
+        ttl: float = 5.0,
+    ):
+        self.redis = redis
+        self.timeout = timeout
+        self.max_size = max_size
+        self.ttl = ttl
+
+    async def collect(self, message: types.Message) -> AlbumMessages | None:
+        key = f"album:{message.chat.id}:{message.media_group_id}"
+        owner_key = f"{key}:owner"
+        expire = int(self.ttl) + 5
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, message.model_dump_json(exclude_none=True))
+            pipe.expire(key, expire)
+            pipe.set(owner_key, "1", nx=True, ex=expire)
+            size, _, is_owner = await pipe.execute()
+        if not is_owner:
+            return None
+
+        started = time.monotonic()
+        while size < self.max_size and time.monotonic() - started < self.ttl:
+            await asyncio.sleep(self.timeout)
+            new_size = await self.redis.llen(key)
+            if new_size == size:
+                break
+            size = new_size
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(key, 0, -1)
+            pipe.delete(key, owner_key)
+            raw_messages, _ = await pipe.execute()
+
+        album = [
+            types.Message.model_validate_json(raw).as_(message.bot)
+            for raw in raw_messages
+        ]
+        return _sorted_album(album)
+
+
+class AlbumMiddleware(BaseMiddleware):
+    def __init__(self, timeout: float = 0.3, collector=None):
+        self.collector = collector or MemoryAlbumCollector(timeout=timeout)
 
     async def __call__(
         self,
@@ -29,15 +155,13 @@ class AlbumMiddleware(BaseMiddleware):
         event: types.Message,
         data: DataType,
     ) -> Any | None:
+        # Одиночные сообщения идут в хендлер сразу, без ожидания
         if event.media_group_id is None:
             return await handler(event, data)
 
-        count = self.store_album_message(event)
-        await asyncio.sleep(self.timeout)
-
-        new_count = len(self.album_messages[event.media_group_id])
-        if new_count != count:
+        album = await self.collector.collect(event)
+        if album is None:
             return None
 
-        data["album_messages"] = self.get_result_album(event)
+        data["album_messages"] = album
         return await handler(event, data)
@@ -0,0 +1,26 @@
+from aiogram.types import TelegramObject
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from typing import Callable, Awaitable, Dict, Any
+from rovmarket_bot.core.models import db_helper
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Одна сессия БД на апдейт.
+
+    Сессия кладётся в data["session"] и становится общей для всех
+    `db_helper.session_factory()` внутри обработки апдейта — и в других
+    middleware, и в хендлерах. Соединение берётся из пула только при первом
+    запросе внутри блока `async with` и возвращается в пул на выходе из него,
+    так что между блоками (вызовы Telegram API, ожидания) апдейт соединение
+    не держит.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        async with db_helper.update_session() as session:
+            data["session"] = session
+            return await handler(event, data)
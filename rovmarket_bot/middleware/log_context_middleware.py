@@ -0,0 +1,42 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from rovmarket_bot.core.logger import (
+    bind_log_context,
+    get_component_logger,
+    reset_log_context,
+)
+
+logger = get_component_logger("updates")
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Проставляет update_id и user_id во все логи, написанные при обработке апдейта.
+
+    По завершении пишет запись об апдейте с duration_ms; таких записей много,
+    их обычно сэмплируют (LOG_SAMPLE_RATES="updates=0.1").
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        token = bind_log_context(
+            update_id=event.update_id, user_id=user.id if user else None
+        )
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            logger.info(
+                "Update %s handled",
+                event.event_type,
+                extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)},
+            )
+            reset_log_context(token)
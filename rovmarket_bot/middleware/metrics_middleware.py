@@ -0,0 +1,70 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.middlewares.base import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from rovmarket_bot.core import metrics
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer-middleware апдейта: счётчики БД/Redis/API и общая задержка."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        stats, token = metrics.start_update()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            metrics.finish_update(
+                token,
+                event.event_type,
+                stats,
+                (time.perf_counter() - started) * 1000,
+            )
+
+
+def _handler_labels(data: Dict[str, Any]) -> tuple[str, str]:
+    """Имя хендлера и роутера: rovmarket_bot.app.search.handler → search."""
+    callback = data["handler"].callback
+    module = getattr(callback, "__module__", "") or ""
+    router = module.removeprefix("rovmarket_bot.app.").removesuffix(".handler")
+    return f"{router}.{getattr(callback, '__qualname__', repr(callback))}", router
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner-middleware: задержка хендлера и его доля запросов к БД, Redis и API."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        name, router = _handler_labels(data)
+        before = metrics.snapshot()
+        started = time.perf_counter()
+        failed = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            metrics.record_handler(
+                name, router, (time.perf_counter() - started) * 1000, before, failed
+            )
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Request-middleware сессии бота: вызовы Telegram API по методам."""
+
+    async def __call__(self, make_request, bot, method):
+        metrics.record_api_call(type(method).__name__)
+        return await make_request(bot, method)
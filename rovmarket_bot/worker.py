@@ -0,0 +1,132 @@
+"""Воркер фоновых задач: `python -m rovmarket_bot.worker`.
+
+Выполняет задачи из Redis-очереди (`core/jobs.py`) — уведомления о новых
+объявлениях, рекламные рассылки, переиндексацию поиска — и периодические
+работы: ротацию рекламы, сброс и пересчёт суточной статистики, дайджесты.
+Запускается при JOBS_MODE=worker; с JOBS_MODE=inline те же планировщики
+работают в процессе бота (см. main.py). Воркеров может быть несколько:
+периодические работы берут блокировку в Redis.
+"""
+
+import asyncio
+from datetime import datetime, time, timedelta, timezone
+
+from rovmarket_bot.core.cache import acquire_job_lock
+from rovmarket_bot.core.config import bot, settings
+from rovmarket_bot.core.jobs import consume_jobs, run_job
+from rovmarket_bot.core.logger import apply_logging_configuration, get_component_logger
+from rovmarket_bot.core.models import db_helper
+from rovmarket_bot.core.notifications import DAILY, HOURLY, flush_digests
+from rovmarket_bot.core.stats import (
+    STATS_FLUSH_INTERVAL,
+    compact_daily_stats,
+    flush_daily_stats,
+    today,
+)
+from rovmarket_bot.app.settings.crud import get_or_create_bot_settings
+
+logger = get_component_logger("worker")
+
+
+def load_jobs() -> None:
+    """Импортировать модули с обработчиками задач (@register_job)."""
+    import rovmarket_bot.app.search.redis_search  # noqa: F401
+    import rovmarket_bot.app.advertisement.broadcast  # noqa: F401
+
+
+async def load_logging_flag() -> None:
+    # Initialize logging flag from DB (CRUD-style)
+    try:
+        async with db_helper.session_factory() as session:
+            bot_settings = await get_or_create_bot_settings(session)
+            apply_logging_configuration(bool(bot_settings.logging))
+    except Exception:
+        # Fall back silently to env-based setting if DB is unavailable at startup
+        pass
+
+
+async def broadcast_scheduler():
+    while True:
+        # Несколько реплик/воркеров: рассылку за этот час делает один
+        if await acquire_job_lock("broadcast", 60 * 60 - 60):
+            await run_job("scheduled_broadcast", {})
+        # wait one hour
+        await asyncio.sleep(60 * 60)
+
+
+async def stats_compaction_scheduler():
+    # Раз в сутки, в начале нового дня (UTC), пересчитываем вчерашние счётчики
+    while True:
+        now = datetime.now(timezone.utc)
+        next_run = datetime.combine(
+            now.date() + timedelta(days=1), time(0, 5), tzinfo=timezone.utc
+        )
+        await asyncio.sleep((next_run - now).total_seconds())
+        day = today() - timedelta(days=1)
+        if not await acquire_job_lock(f"stats_compaction:{day}", 24 * 60 * 60):
+            continue
+        try:
+            async with db_helper.new_session() as session:
+                # Одобрения за вчера компактизация не пересчитывает — сперва буфер
+                await flush_daily_stats(session)
+                await compact_daily_stats(session, day)
+        except Exception:
+            logger.exception("Stats compaction failed for %s", day)
+
+
+async def stats_flush_scheduler():
+    # Счётчики событий копятся в Redis (core/stats.py) — переносим их в daily_stats
+    while True:
+        await asyncio.sleep(STATS_FLUSH_INTERVAL)
+        try:
+            async with db_helper.new_session() as session:
+                await flush_daily_stats(session)
+        except Exception:
+            logger.exception("Stats flush failed")
+
+
+async def digest_scheduler():
+    # В начале каждого часа — часовые дайджесты, в NOTIFY_DAILY_HOUR (UTC) — суточные
+    while True:
+        now = datetime.now(timezone.utc)
+        next_run = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        modes = [HOURLY]
+        if next_run.hour == settings.NOTIFY_DAILY_HOUR:
+            modes.append(DAILY)
+        for mode in modes:
+            if not await acquire_job_lock(
+                f"digest:{mode}:{next_run:%Y%m%d%H}", 60 * 60
+            ):
+                continue
+            try:
+                # С primary: свежеодобренных объявлений на реплике может ещё не быть
+                async with db_helper.session_factory() as session:
+                    await flush_digests(bot, session, mode)
+            except Exception:
+                logger.exception("Digest %s failed", mode)
+
+
+SCHEDULERS = (
+    broadcast_scheduler,
+    stats_compaction_scheduler,
+    stats_flush_scheduler,
+    digest_scheduler,
+)
+
+
+async def main():
+    await load_logging_flag()
+    load_jobs()
+    logger.info("Worker started, concurrency=%s", settings.JOBS_CONCURRENCY)
+    try:
+        await asyncio.gather(consume_jobs(), *(scheduler() for scheduler in SCHEDULERS))
+    finally:
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("Exit")
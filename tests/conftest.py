@@ -0,0 +1,145 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# Настройки читаются при импорте rovmarket_bot — задаём их до него
+_DB_DIR = tempfile.mkdtemp(prefix="rovmarket-tests-")
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:TEST-token")
+os.environ.setdefault("BOT_USERNAME", "test_bot")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_DIR}/test.sqlite3"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+# Redis в тестах не нужен: случайное обращение сразу падает, а не ждёт таймаута
+os.environ["REDIS_URL"] = "redis://127.0.0.1:1"
+os.environ["LOGGER"] = "false"
+
+from aiogram.exceptions import TelegramBadRequest  # noqa: E402
+from aiogram.methods import CopyMessage  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from rovmarket_bot.core.models import (  # noqa: E402
+    Base,
+    Categories,
+    Product,
+    ProductPhoto,
+    ProductVideo,
+    User,
+    UserCategoryNotification,
+    db_helper,
+)
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Выполнить корутину в общем для всех тестов event loop (пул aiosqlite
+    привязан к циклу, в котором создан)."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.run_until_complete(db_helper.engine.dispose())
+    loop.close()
+
+
+class QueryCounter:
+    """Выражения, отправленные в БД внутри `with counter:`."""
+
+    def __init__(self, engine):
+        self.engine = engine.sync_engine
+        self.statements: list[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        self.statements.clear()
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+        return False
+
+
+@pytest.fixture
+def queries():
+    return QueryCounter(db_helper.engine)
+
+
+@pytest.fixture
+def catalogue(run):
+    """Чистая схема и небольшой каталог: 3 опубликованных и 2 ожидающих
+    модерации объявления продавца, у каждого по 2 фото и видео."""
+
+    async def seed():
+        async with db_helper.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        async with db_helper.new_session() as session:
+            category = Categories(name="Электроника", description="")
+            seller = User(telegram_id=1001, username="seller")
+            buyer = User(telegram_id=2002, username="buyer")
+            session.add_all([category, seller, buyer])
+            await session.flush()
+            session.add(
+                UserCategoryNotification(user_id=buyer.id, category_id=category.id)
+            )
+            product_ids = []
+            for i in range(5):
+                product = Product(
+                    name=f"Товар {i}",
+                    description="Описание",
+                    price=1000 + i,
+                    contact="via_bot",
+                    geo=None,
+                    user_id=seller.id,
+                    category_id=category.id,
+                    publication=True if i < 3 else None,
+                )
+                session.add(product)
+                await session.flush()
+                session.add_all(
+                    [
+                        ProductPhoto(product_id=product.id, photo_url=f"photo-{i}-1"),
+                        ProductPhoto(product_id=product.id, photo_url=f"photo-{i}-2"),
+                        ProductVideo(product_id=product.id, video_file_id=f"video-{i}"),
+                    ]
+                )
+                product_ids.append(product.id)
+            await session.commit()
+            return {
+                "category_id": category.id,
+                "category_name": category.name,
+                "seller_id": seller.id,
+                "seller_tg": seller.telegram_id,
+                "buyer_id": buyer.id,
+                "buyer_tg": buyer.telegram_id,
+                "product_ids": product_ids,
+                "published_ids": product_ids[:3],
+                "pending_ids": product_ids[3:],
+            }
+
+    return run(seed())
+
+
+class FakeBot:
+    """Записывает вызовы методов Bot API; `fail` — методы, падающие с BadRequest."""
+
+    def __init__(self, fail: set[str] = frozenset()):
+        self.calls: list[tuple[str, dict]] = []
+        self.fail = fail
+
+    def __getattr__(self, name):
+        async def method(*args, **kwargs):
+            self.calls.append((name, {"args": args, **kwargs}))
+            if name in self.fail:
+                raise TelegramBadRequest(CopyMessage, "message can't be copied")
+
+        return method
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _ in self.calls]
@@ -0,0 +1,59 @@
+"""Форматы кэша: чтение записанного любым кодеком и выбор кодека по умолчанию."""
+
+import pytest
+
+from rovmarket_bot.core.cache_codec import (
+    ALL_ADS,
+    CATEGORIES_PAGE,
+    CODECS,
+    decode,
+    encode,
+    get_codec,
+)
+
+FEED = {
+    "product_ids": ["2", "1"],
+    "products": {
+        "2": {
+            "name": "Велосипед",
+            "description": "Торг",
+            "price": 1500,
+            "contact": "via_bot",
+            "geo": {"latitude": 47.23, "longitude": 39.72},
+            "created_at": "2025-01-01T00:02:00",
+        },
+        "1": {
+            "name": "Диван",
+            "description": "",
+            "price": "договорная",
+            "contact": "@seller",
+            "geo": None,
+            "created_at": "2025-01-01T00:01:00",
+        },
+    },
+    "photos": {"2": ["file-1", "file-2"], "1": []},
+}
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_round_trip(name):
+    codec = CODECS[name]
+    categories = [{"id": 1, "name": "Электроника"}]
+
+    assert decode(ALL_ADS, encode(ALL_ADS, FEED, codec)) == FEED
+    assert decode(CATEGORIES_PAGE, encode(CATEGORIES_PAGE, categories, codec)) == (
+        categories
+    )
+
+
+def test_auto_prefers_binary_codec():
+    pytest.importorskip("orjson")
+
+    assert get_codec("auto").name != "json"
+
+
+@pytest.mark.parametrize(
+    "data", [None, b"", b'{"product_ids": []}', b"j\x09[]", b"z\x01[]", b"j\x01{"]
+)
+def test_unreadable_entry_is_a_miss(data):
+    assert decode(ALL_ADS, data) is None
@@ -0,0 +1,153 @@
+"""Число запросов к Bot API на одно пересланное сообщение анонимного чата."""
+
+import datetime
+
+import pytest
+from aiogram.types import (
+    Audio,
+    Chat,
+    Document,
+    Message,
+    MessageEntity,
+    PhotoSize,
+    Sticker,
+    Video,
+    Voice,
+)
+
+from rovmarket_bot.app.chat.handler import relay_by_copy
+
+from conftest import FakeBot
+
+HEADER = "💬 Новое сообщение от покупателя по объявлению Товар(1)"
+RECIPIENT = 555
+SENDER_CHAT = Chat(id=42, type="private")
+
+
+def make_message(message_id: int = 1, **content) -> Message:
+    return Message(
+        message_id=message_id,
+        date=datetime.datetime(2025, 1, 1),
+        chat=SENDER_CHAT,
+        **content,
+    )
+
+
+PHOTO = [PhotoSize(file_id="photo", file_unique_id="p", width=10, height=10)]
+VIDEO = Video(file_id="video", file_unique_id="v", width=10, height=10, duration=1)
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ({"text": "Ещё актуально?"}, ["send_message"]),
+        ({"photo": PHOTO}, ["copy_message"]),
+        ({"photo": PHOTO, "caption": "вот фото"}, ["copy_message"]),
+        ({"video": VIDEO}, ["copy_message"]),
+        (
+            {"voice": Voice(file_id="voice", file_unique_id="vc", duration=1)},
+            ["copy_message"],
+        ),
+        (
+            {"audio": Audio(file_id="audio", file_unique_id="a", duration=1)},
+            ["copy_message"],
+        ),
+        (
+            {"document": Document(file_id="doc", file_unique_id="d")},
+            ["copy_message"],
+        ),
+        # у стикера нет подписи — заголовок отдельным сообщением
+        (
+            {
+                "sticker": Sticker(
+                    file_id="st",
+                    file_unique_id="s",
+                    type="regular",
+                    width=10,
+                    height=10,
+                    is_animated=False,
+                    is_video=False,
+                )
+            },
+            ["send_message", "copy_message"],
+        ),
+    ],
+)
+def test_single_message_calls(run, content, expected):
+    bot = FakeBot()
+    run(relay_by_copy(bot, RECIPIENT, HEADER, [make_message(**content)]))
+
+    assert bot.names == expected
+
+
+def test_text_carries_header_and_formatting(run):
+    bot = FakeBot()
+    entity = MessageEntity(type="bold", offset=0, length=3)
+    message = make_message(text="Привет", entities=[entity])
+    run(relay_by_copy(bot, RECIPIENT, HEADER, [message]))
+
+    ((_, call),) = bot.calls
+    text = call["args"][1]
+    assert text == f"{HEADER}:\n\nПривет"
+    # сущность автора сдвинута за заголовок (смещения — в UTF-16)
+    (shifted,) = call["entities"]
+    offset = len(f"{HEADER}:\n\n".encode("utf-16-le")) // 2
+    assert (shifted.offset, shifted.length) == (offset, 3)
+    assert call["parse_mode"] is None
+
+
+def test_media_caption_combines_header(run):
+    bot = FakeBot()
+    message = make_message(photo=PHOTO, caption="вот фото")
+    run(relay_by_copy(bot, RECIPIENT, HEADER, [message]))
+
+    ((_, call),) = bot.calls
+    assert call["caption"] == f"{HEADER}:\n\nвот фото"
+
+
+def test_long_caption_sends_header_separately(run):
+    bot = FakeBot()
+    message = make_message(photo=PHOTO, caption="x" * 1020)
+    run(relay_by_copy(bot, RECIPIENT, HEADER, [message]))
+
+    assert bot.names == ["send_message", "copy_message"]
+    assert "caption" not in bot.calls[1][1]
+
+
+def test_album_calls(run):
+    bot = FakeBot()
+    album = [
+        make_message(2, photo=PHOTO, media_group_id="g"),
+        make_message(1, video=VIDEO, media_group_id="g"),
+    ]
+    run(relay_by_copy(bot, RECIPIENT, HEADER, album))
+
+    assert bot.names == ["send_message", "copy_messages"]
+    assert bot.calls[1][1]["args"][2] == [1, 2]
+
+
+def test_single_media_fallback_resends_with_header(run):
+    bot = FakeBot(fail={"copy_message"})
+    run(relay_by_copy(bot, RECIPIENT, HEADER, [make_message(photo=PHOTO)]))
+
+    assert bot.names == ["copy_message", "send_photo"]
+    assert bot.calls[1][1]["caption"] == f"{HEADER} (фото)"
+
+
+def test_album_fallback_sends_header_once(run):
+    bot = FakeBot(fail={"copy_messages", "copy_message"})
+    album = [
+        make_message(1, photo=PHOTO, media_group_id="g"),
+        make_message(2, video=VIDEO, media_group_id="g"),
+    ]
+    run(relay_by_copy(bot, RECIPIENT, HEADER, album))
+
+    assert bot.names == [
+        "send_message",
+        "copy_messages",
+        "copy_message",
+        "send_photo",
+        "copy_message",
+        "send_video",
+    ]
+    assert bot.calls[3][1]["caption"] is None
@@ -0,0 +1,57 @@
+"""Число запросов к Bot API на страницу ленты в каждом режиме отправки."""
+
+import datetime
+
+import pytest
+from aiogram.types import Chat, Message
+
+from conftest import FakeBot
+from rovmarket_bot.core.delivery import PageItem, deliver_page
+
+
+def make_page(cards: int, with_photo: bool = True) -> list[PageItem]:
+    items = [
+        PageItem(
+            text=f"Товар {n}",
+            photo=f"photo-{n}" if with_photo else None,
+            product_id=n,
+        )
+        for n in range(1, cards + 1)
+    ]
+    # рекламная вставка после третьей карточки
+    items.insert(3, PageItem(text="Реклама"))
+    return items
+
+
+def deliver(run, items, mode=None) -> FakeBot:
+    bot = FakeBot()
+    message = Message(
+        message_id=1,
+        date=datetime.datetime(2025, 1, 1),
+        chat=Chat(id=42, type="private"),
+    ).as_(bot)
+    run(deliver_page(message, items, mode))
+    return bot
+
+
+def test_default_mode_collapses_page(run):
+    bot = deliver(run, make_page(5))
+
+    # альбом карточек, кнопки по номерам, реклама
+    assert bot.names == ["send_media_group", "send_message", "send_message"]
+    album = bot.calls[0][1]["args"][1]
+    assert [m.caption for m in album] == [f"{n}. Товар {n}" for n in range(1, 6)]
+
+
+@pytest.mark.parametrize(
+    "mode, with_photo, expected",
+    [
+        ("list", True, ["send_message", "send_message"]),
+        ("album", False, ["send_message", "send_message"]),
+        ("cards", True, ["send_photo"] * 3 + ["send_message"] + ["send_photo"] * 2),
+    ],
+)
+def test_mode_requests(run, mode, with_photo, expected):
+    bot = deliver(run, make_page(5, with_photo), mode)
+
+    assert bot.names == expected
@@ -0,0 +1,80 @@
+"""Дайджесты не теряются, если чтение из БД или отправка не удались."""
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+
+from conftest import FakeBot
+from rovmarket_bot.core import notifications
+from rovmarket_bot.core.models import db_helper
+from rovmarket_bot.core.notifications import (
+    HOURLY,
+    Recipient,
+    _digest_key,
+    _digest_users_key,
+    _enqueue,
+    flush_digests,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(notifications, "redis_cache", fake)
+    return fake
+
+
+@pytest.fixture
+def queued(run, redis, catalogue):
+    """Часовой дайджест покупателя с опубликованными объявлениями."""
+    buyer = Recipient(catalogue["buyer_tg"], HOURLY)
+    run(_enqueue({HOURLY: [(buyer, catalogue["published_ids"])]}))
+    return catalogue
+
+
+def pending(run, redis, telegram_id) -> tuple[list[int], bool]:
+    ids = run(redis.zrange(_digest_key(HOURLY, telegram_id), 0, -1))
+    member = run(redis.sismember(_digest_users_key(HOURLY), telegram_id))
+    return sorted(int(pid) for pid in ids), bool(member)
+
+
+def flush(run, bot) -> int:
+    async def go():
+        async with db_helper.new_session() as session:
+            return await flush_digests(bot, session, HOURLY)
+
+    return run(go())
+
+
+def test_sent_digest_is_removed(run, redis, queued):
+    bot = FakeBot()
+
+    assert flush(run, bot) == 1
+    assert bot.names == ["send_message"]
+    assert pending(run, redis, queued["buyer_tg"]) == ([], False)
+
+
+def test_failed_send_is_restored(run, redis, queued):
+    assert flush(run, FakeBot(fail={"send_message"})) == 0
+    assert pending(run, redis, queued["buyer_tg"]) == (queued["published_ids"], True)
+
+
+def test_blocked_user_is_not_restored(run, redis, queued):
+    class BlockedBot(FakeBot):
+        async def send_message(self, *args, **kwargs):
+            raise TelegramForbiddenError(SendMessage, "bot was blocked by the user")
+
+    assert flush(run, BlockedBot()) == 0
+    assert pending(run, redis, queued["buyer_tg"]) == ([], False)
+
+
+def test_failed_read_is_restored(run, redis, queued):
+    class BrokenSession:
+        async def execute(self, *args, **kwargs):
+            raise ConnectionError("primary unavailable")
+
+    with pytest.raises(ConnectionError):
+        run(flush_digests(FakeBot(), BrokenSession(), HOURLY))
+    assert pending(run, redis, queued["buyer_tg"]) == (queued["published_ids"], True)
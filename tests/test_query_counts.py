@@ -0,0 +1,331 @@
+"""Число запросов к БД на вызов CRUD-функции.
+
+Коллекции моделей объявлены с lazy="raise", поэтому каждая функция сама
+перечисляет нужные связи. Тесты фиксируют, сколько выражений она
+отправляет, и что это число не растёт с количеством строк (N+1), а обращение
+к связям результата не упирается в незагруженную коллекцию.
+
+Redis в тестах недоступен: `bump_daily_stats` в этом случае пишет счётчик
+в БД сразу — это один дополнительный UPSERT, он учтён в ожиданиях.
+"""
+
+import pytest
+
+from rovmarket_bot.app.admin import crud as admin_crud
+from rovmarket_bot.app.ads import crud as ads_crud
+from rovmarket_bot.app.chat import crud as chat_crud
+from rovmarket_bot.app.search import crud as search_crud
+from rovmarket_bot.app.settings import crud as settings_crud
+from rovmarket_bot.core.models import db_helper
+from rovmarket_bot.core.notifications import get_new_product_recipients
+
+
+@pytest.fixture
+def call(run, queries):
+    """Вызвать `fn(session)` в новой сессии, считая выражения в `queries`."""
+
+    def _call(fn):
+        async def go():
+            async with db_helper.new_session() as session:
+                with queries:
+                    return await fn(session)
+
+        return run(go())
+
+    return _call
+
+
+# ----- ads -----
+
+
+def test_get_user_products(call, queries, catalogue):
+    products = call(lambda s: ads_crud.get_user_products(catalogue["seller_tg"], s))
+
+    assert len(products) == 5
+    # товары + selectin фото, видео, категорий и авторов — независимо от числа товаров
+    assert queries.count == 5
+    assert all(len(p.photos) == 2 and len(p.videos) == 1 for p in products)
+    assert {p.category.name for p in products} == {catalogue["category_name"]}
+
+
+def test_get_user_products_page(call, queries, catalogue):
+    items, total = call(
+        lambda s: ads_crud.get_user_products_page(catalogue["seller_tg"], s, limit=3)
+    )
+
+    assert total == 5 and len(items) == 3
+    assert queries.count == 1
+    assert all(item["first_photo"] and item["first_video"] for item in items)
+
+
+def test_get_user_product_with_photos(call, queries, catalogue):
+    product_id = catalogue["product_ids"][0]
+    product = call(
+        lambda s: ads_crud.get_user_product_with_photos(
+            product_id, catalogue["seller_tg"], s
+        )
+    )
+
+    assert queries.count == 5
+    assert [p.photo_url for p in product.photos] == ["photo-0-1", "photo-0-2"]
+
+
+def test_get_user_product_with_photos_foreign_owner(call, queries, catalogue):
+    product_id = catalogue["product_ids"][0]
+    product = call(
+        lambda s: ads_crud.get_user_product_with_photos(
+            product_id, catalogue["buyer_tg"], s
+        )
+    )
+
+    assert product is None
+    assert queries.count == 1
+
+
+def test_get_product_views_count(call, queries, catalogue):
+    count = call(
+        lambda s: ads_crud.get_product_views_count(catalogue["product_ids"][0], s)
+    )
+
+    assert count == 0
+    assert queries.count == 1
+
+
+def test_unpublish_user_product(call, queries, catalogue):
+    product_id = catalogue["published_ids"][0]
+    assert call(
+        lambda s: ads_crud.unpublish_user_product(product_id, catalogue["seller_tg"], s)
+    )
+    # SELECT владельца и UPDATE — без загрузки фото
+    assert queries.count == 2
+
+
+def test_update_user_product(call, queries, catalogue):
+    product_id = catalogue["product_ids"][0]
+    product = call(
+        lambda s: ads_crud.update_user_product(
+            product_id, catalogue["seller_tg"], s, name="Новое название"
+        )
+    )
+
+    assert product.name == "Новое название"
+    assert queries.count == 3
+
+
+# ----- admin -----
+
+
+def test_get_product_with_photos(call, queries, catalogue):
+    product = call(
+        lambda s: admin_crud.get_product_with_photos(s, catalogue["product_ids"][0])
+    )
+
+    assert queries.count == 4
+    assert len(product.photos) == 2 and len(product.videos) == 1
+    assert product.user.telegram_id == catalogue["seller_tg"]
+
+
+def test_get_product_with_photos_and_user(call, queries, catalogue):
+    product = call(
+        lambda s: admin_crud.get_product_with_photos_and_user(
+            s, catalogue["product_ids"][1]
+        )
+    )
+
+    assert queries.count == 4
+    assert product.videos[0].video_file_id == "video-1"
+
+
+def test_get_published_products_page(call, queries, catalogue):
+    products = call(lambda s: admin_crud.get_published_products_page(s, 1))
+
+    assert len(products) == 3
+    assert queries.count == 4
+    assert all(p.photos and p.videos and p.user for p in products)
+
+
+def test_get_pending_queue_stats(call, queries, catalogue):
+    total, last_id = call(admin_crud.get_pending_queue_stats)
+
+    assert (total, last_id) == (2, catalogue["pending_ids"][-1])
+    assert queries.count == 1
+
+
+def test_get_pending_products_page(call, queries, catalogue):
+    rows, has_more = call(lambda s: admin_crud.get_pending_products_page(s, 5))
+
+    assert [row["id"] for row in rows] == catalogue["pending_ids"]
+    assert not has_more
+    assert queries.count == 1
+    assert rows[0]["photo"] == "photo-3-1"
+
+
+def test_get_complaints_page(call, queries, catalogue):
+    for text in ("спам", "мошенник"):
+        call(
+            lambda s, text=text: search_crud.create_complaint(
+                user_id=catalogue["buyer_id"], text=text, session=s
+            )
+        )
+
+    rows, has_more = call(lambda s: admin_crud.get_complaints_page(s, 1))
+
+    assert [row["title"] for row in rows] == ["мошенник"]
+    assert has_more
+    assert queries.count == 1
+
+
+def test_moderate_pending_products(call, queries, catalogue):
+    moderated = call(
+        lambda s: admin_crud.moderate_pending_products(
+            s, True, product_ids=catalogue["pending_ids"]
+        )
+    )
+
+    assert [row.id for row in moderated] == catalogue["pending_ids"]
+    # UPDATE ... RETURNING на всю пачку + счётчик одобрений
+    assert queries.count == 2
+
+
+def test_decline_product(call, queries, catalogue):
+    product = call(lambda s: admin_crud.decline_product(s, catalogue["pending_ids"][0]))
+
+    assert product.publication is False
+    assert product.user.telegram_id == catalogue["seller_tg"]
+    assert queries.count == 3
+
+
+def test_get_users_page(call, queries, catalogue):
+    call(lambda s: admin_crud.get_users_page(s, 1))
+
+    assert queries.count == 1
+
+
+# ----- search -----
+
+
+def test_get_product_by_id(call, queries, catalogue):
+    product = call(
+        lambda s: search_crud.get_product_by_id(catalogue["published_ids"][0], s)
+    )
+
+    assert product["photos"] == ["photo-0-1", "photo-0-2"]
+    assert queries.count == 3
+
+
+def test_get_fields_and_photos_for_products(call, queries, catalogue):
+    ids = catalogue["product_ids"]
+    fields = call(lambda s: search_crud.get_fields_for_products(ids, s))
+    assert len(fields) == 5 and queries.count == 1
+
+    photos = call(lambda s: search_crud.get_photos_for_products(ids, s))
+    assert len(photos) == 5 and queries.count == 1
+
+
+def test_get_products_by_category(call, queries, catalogue):
+    ids = call(
+        lambda s: search_crud.get_products_by_category(s, catalogue["category_name"])
+    )
+
+    assert ids == sorted(catalogue["published_ids"], reverse=True)
+    assert queries.count == 1
+
+
+def test_add_product_view(call, queries, catalogue, monkeypatch):
+    async def drop_cached_gallery(product_id, variant):
+        pass
+
+    monkeypatch.setattr(search_crud, "drop_cached_gallery", drop_cached_gallery)
+    product_id = catalogue["published_ids"][0]
+
+    call(lambda s: search_crud.add_product_view(product_id, catalogue["buyer_id"], s))
+    # владелец, существующий просмотр, INSERT, счётчик суток
+    assert queries.count == 4
+
+    call(lambda s: search_crud.add_product_view(product_id, catalogue["seller_id"], s))
+    # просмотр владельца не записывается — только проверка владельца
+    assert queries.count == 1
+
+
+# ----- chat -----
+
+
+def test_chat_flow(call, queries, catalogue):
+    product_id = catalogue["published_ids"][0]
+    chat = call(
+        lambda s: chat_crud.create_or_get_chat(
+            s, product_id, catalogue["buyer_id"], catalogue["seller_id"]
+        )
+    )
+
+    async def write(session):
+        for text in ("привет", "ещё актуально?"):
+            message = await chat_crud.add_message(
+                session, chat.id, catalogue["buyer_id"], text
+            )
+            await chat_crud.add_attachment_to_message(
+                session, message.id, "photo", f"file-{text}"
+            )
+
+    call(write)
+
+    messages = call(lambda s: chat_crud.get_last_messages(s, chat.id))
+    assert [m["text"] for m in messages] == ["привет", "ещё актуально?"]
+    assert messages[1]["photos"] == ["file-ещё актуально?"]
+    # сообщения + вложения одним selectin, независимо от числа сообщений
+    assert queries.count == 2
+
+    chats = call(lambda s: chat_crud.get_user_chats(s, catalogue["buyer_id"]))
+    assert queries.count == 1
+
+    names = call(
+        lambda s: chat_crud.get_product_names(s, [c.product_id for c in chats])
+    )
+    assert names == {product_id: "Товар 0"}
+    assert queries.count == 1
+
+    chat_row = call(lambda s: chat_crud.get_chat_by_id(s, chat.id))
+    assert chat_row.buyer.telegram_id == catalogue["buyer_tg"]
+    assert queries.count == 3
+
+
+def test_get_product_name(call, queries, catalogue):
+    name = call(lambda s: chat_crud.get_product_name(s, catalogue["product_ids"][0]))
+
+    assert name == "Товар 0"
+    assert queries.count == 1
+
+
+# ----- settings / notifications -----
+
+
+def test_get_user_with_subscriptions(call, queries, catalogue):
+    user = call(
+        lambda s: settings_crud.get_user_with_subscriptions(catalogue["buyer_tg"], s)
+    )
+
+    assert user.notification_mode == "instant"
+    # подписки пользователя больше не грузятся вместе с ним
+    assert queries.count == 1
+
+
+def test_toggle_category_subscription(call, queries, catalogue):
+    subscribed = call(
+        lambda s: settings_crud.toggle_category_subscription(
+            catalogue["buyer_tg"], catalogue["category_id"], s
+        )
+    )
+
+    assert subscribed is False
+    assert queries.count == 3
+
+
+def test_get_new_product_recipients(call, queries, catalogue):
+    recipients = call(
+        lambda s: get_new_product_recipients(
+            s, catalogue["category_id"], exclude_user_id=catalogue["seller_id"]
+        )
+    )
+
+    assert [r.telegram_id for r in recipients] == [catalogue["buyer_tg"]]
+    assert queries.count == 1